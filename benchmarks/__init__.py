@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for EvolutePrompt.
+
+Run the suite with ``python -m benchmarks run`` and compare two result files
+with ``python -m benchmarks compare``.
+"""
@@ -0,0 +1,78 @@
+"""
+Run the benchmark suite or compare two runs.
+
+Usage:
+    python -m benchmarks run [--filter NAME] [--scale 1.0] [--output results.json]
+    python -m benchmarks compare baseline.json results.json [--threshold 0.1]
+
+``compare`` exits with status 1 when any benchmark's throughput dropped by
+more than the threshold, so it can gate CI against a saved baseline.
+"""
+
+import argparse
+import sys
+
+from benchmarks import hot_paths  # noqa: F401  (registers the benchmarks)
+from benchmarks.runner import compare_results, load_results, run_suite, save_results
+
+
+def _run(args: argparse.Namespace) -> int:
+    results = run_suite(args.filter, args.scale, args.rounds, args.min_time)
+    if args.output:
+        save_results(results, args.output)
+        print(f"Saved results to {args.output}")
+    return 1 if any("error" in r for r in results["results"].values()) else 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+    if baseline.get("scale") != current.get("scale"):
+        print(
+            f"Warning: comparing runs at scale {baseline.get('scale')} "
+            f"and {current.get('scale')}"
+        )
+
+    rows = compare_results(baseline, current, args.threshold)
+    print(f"{'benchmark (ops/s)':<40} {'baseline':>14} {'current':>14} {'change':>8}")
+    for row in rows:
+        change = "" if row["change"] is None else f"{row['change']:+.1%}"
+        old = "-" if row["baseline"] is None else f"{row['baseline']:,.1f}"
+        new = "-" if row["current"] is None else f"{row['current']:,.1f}"
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<40} {old:>14} {new:>14} {change:>8}{flag}")
+
+    regressions = [row["name"] for row in rows if row["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def main() -> None:
+    """Entry point."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks")
+    run.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    run.add_argument("--scale", type=float, default=1.0, help="Multiplier for dataset sizes")
+    run.add_argument("--rounds", type=int, default=5)
+    run.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per round")
+    run.add_argument("--output", help="Save the results as JSON")
+    run.set_defaults(handler=_run)
+
+    compare = commands.add_parser("compare", help="Compare two saved runs")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument(
+        "--threshold", type=float, default=0.1, help="Allowed relative throughput drop"
+    )
+    compare.set_defaults(handler=_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
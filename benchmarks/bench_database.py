@@ -0,0 +1,95 @@
+"""
+Read and write throughput benchmark for DBPromptRepo.
+
+Usage:
+    python benchmarks/bench_database.py [--count 10000] [--db-url sqlite://:memory:]
+"""
+
+import argparse
+import asyncio
+import time
+
+from evoluteprompt.core.database import DBPromptRepo, PromptModel
+from evoluteprompt.core.prompt import Prompt, PromptBuilder
+from evoluteprompt.core.types import PromptCategory
+
+
+def make_prompt(i: int) -> Prompt:
+    """Build a realistic prompt with metadata, parameters and a few messages."""
+    return (
+        PromptBuilder()
+        .add_system("You are a helpful assistant. " * 20)
+        .add_user(f"Question number {i}: what is the capital of France?")
+        .add_assistant("The capital of France is Paris.")
+        .add_user("And of Spain?")
+        .set_metadata(
+            description=f"Benchmark prompt {i}",
+            tags=["bench", "geo"],
+            category=PromptCategory.QA,
+            is_active=True,
+        )
+        .set_parameters(temperature=0.2, max_tokens=256, model="gpt-4o-mini")
+        .build()
+    )
+
+
+def report(label: str, count: int, elapsed: float) -> None:
+    """Print a throughput line."""
+    print(f"{label:<32} {count / elapsed:>12,.0f} ops/s  ({elapsed * 1000:,.1f} ms total)")
+
+
+async def run(count: int, db_url: str) -> None:
+    """Run the benchmark."""
+    repo = DBPromptRepo(db_url)
+    db = await repo.init()
+
+    prompts = [make_prompt(i) for i in range(count)]
+
+    start = time.perf_counter()
+    for i, prompt in enumerate(prompts):
+        await repo.save_prompt(f"prompt-{i}", prompt, version="0.1.0")
+    report("save_prompt", count, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(count):
+        await repo.get_prompt(f"prompt-{i}", "0.1.0")
+    report("get_prompt", count, time.perf_counter() - start)
+
+    # Isolate the deserialization cost from the query cost
+    rows = await PromptModel.all().using_db(db)
+
+    start = time.perf_counter()
+    for row in rows:
+        Prompt(
+            messages=row.messages,
+            metadata=row.metadata,
+            parameters=row.parameters,
+            stats=row.stats,
+        )
+    report("per-field validation", len(rows), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for row in rows:
+        row.to_prompt()
+    report("to_prompt", len(rows), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i, prompt in enumerate(prompts):
+        PromptModel.from_prompt(f"prompt-{i}", "0.1.0", prompt)
+    report("from_prompt", count, time.perf_counter() - start)
+
+    await repo.close()
+
+
+def main() -> None:
+    """Entry point."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10_000)
+    parser.add_argument("--db-url", default="sqlite://:memory:")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.count, args.db_url))
+
+
+if __name__ == "__main__":
+    main()
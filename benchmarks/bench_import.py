@@ -0,0 +1,80 @@
+"""
+Import time benchmark for the evoluteprompt package.
+
+Each statement runs in a fresh interpreter under ``python -X importtime`` and
+the best of several runs is reported. The exit status is 1 when the base
+``import evoluteprompt`` is over budget, so this can run as a CI check.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 5] [--budget-ms 100]
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import Dict
+
+STATEMENTS = [
+    "import evoluteprompt",
+    "from evoluteprompt import Prompt",
+    "from evoluteprompt import PromptRepo",
+    "from evoluteprompt import PromptSelector",
+    "from evoluteprompt import DBPromptRepo",
+    "from evoluteprompt.prompt_filters import MaxTokenFilter",
+    "from evoluteprompt import EvolutePrompt",
+]
+
+
+def import_times(statement: str) -> Dict[str, int]:
+    """
+    Run a statement in a fresh interpreter and collect its import times.
+
+    Args:
+        statement: The Python statement to run.
+
+    Returns:
+        A mapping from top-level module to cumulative import time in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        # Only count modules imported directly by the statement, not nested ones
+        if not module.startswith("  ") and cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+def best_time_ms(statement: str, runs: int) -> float:
+    """Best total import time of a statement over several runs, in milliseconds."""
+    return min(sum(import_times(statement).values()) for _ in range(runs)) / 1000
+
+
+def main() -> None:
+    """Entry point."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    base = None
+    for statement in STATEMENTS:
+        elapsed = best_time_ms(statement, args.runs)
+        if base is None:
+            base = elapsed
+        print(f"{statement:<60} {elapsed:>8.1f} ms")
+
+    if base > args.budget_ms:
+        print(f"import evoluteprompt took {base:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Synthetic datasets for the benchmarks.
+
+Everything is generated from a seeded random number generator, so every run
+of the suite sees the same data.
+"""
+
+import random
+from typing import List
+
+from evoluteprompt.core.database import DBPromptRepo, PromptModel
+from evoluteprompt.core.prompt import Prompt, PromptBuilder
+from evoluteprompt.core.types import PromptCategory
+
+_WORDS = (
+    "the model answer question context user system assistant data report summary table "
+    "customer order invoice shipping refund account password policy language code python "
+    "error request response latency budget token prompt version release feature test"
+).split()
+
+
+def sentence(rng: random.Random, length: int = 12) -> str:
+    """A sentence of random words."""
+    return " ".join(rng.choice(_WORDS) for _ in range(length)).capitalize() + "."
+
+
+def paragraph(rng: random.Random, sentences: int = 5) -> str:
+    """A paragraph of random sentences."""
+    return " ".join(sentence(rng, rng.randint(6, 20)) for _ in range(sentences))
+
+
+def long_chat(turns: int, seed: int = 0) -> Prompt:
+    """
+    A chat with a long system message and ``turns`` user/assistant exchanges.
+
+    Args:
+        turns: Number of exchanges.
+        seed: Random seed.
+
+    Returns:
+        The prompt.
+    """
+    rng = random.Random(seed)
+    builder = PromptBuilder().add_system(paragraph(rng, 20))
+    for _ in range(turns):
+        builder.add_user(paragraph(rng, 2))
+        builder.add_assistant(paragraph(rng, 4))
+    builder.add_user(sentence(rng))
+    return (
+        builder.set_metadata(description="Long chat", tags=["bench"], category=PromptCategory.CHAT)
+        .set_parameters(temperature=0.2, max_tokens=256, model="gpt-4o-mini")
+        .build()
+    )
+
+
+def keyword_list(count: int, seed: int = 0) -> List[str]:
+    """
+    Banned keywords that do not occur in the generated text.
+
+    Args:
+        count: Number of keywords.
+        seed: Random seed.
+
+    Returns:
+        The keywords.
+    """
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(8, 14))) for _ in range(count)]
+
+
+async def fill_repo(repo: DBPromptRepo, prompt_name: str, versions: int, seed: int = 0) -> str:
+    """
+    Store ``versions`` versions of a prompt and activate the last one.
+
+    Rows are inserted in bulk, so a 10k-version repository takes seconds to
+    build.
+
+    Args:
+        repo: The repository to fill.
+        prompt_name: Name of the prompt.
+        versions: Number of versions.
+        seed: Random seed.
+
+    Returns:
+        The active version.
+    """
+    db = await repo.init()
+    base = long_chat(4, seed)
+
+    models = []
+    for i in range(versions):
+        prompt = base.model_copy(deep=True)
+        prompt.messages[-1].content = f"Variant {i}: {prompt.messages[-1].content}"
+        version = f"{i // 10000}.{i // 100 % 100}.{i % 100}"
+        prompt.metadata.version = version
+        models.append(PromptModel.from_prompt(prompt_name, version, prompt))
+
+    await PromptModel.bulk_create(models, batch_size=1000, using_db=db)
+    await repo.set_active(prompt_name, version)
+    return version
@@ -0,0 +1,148 @@
+"""
+Benchmarks for the library's hot paths.
+
+Dataset sizes are given for ``scale=1.0``; pass ``--scale`` to the runner to
+shrink them for a quick check.
+"""
+
+import random
+
+from benchmarks.datasets import fill_repo, keyword_list, long_chat, paragraph
+from benchmarks.runner import benchmark
+from evoluteprompt.core.database import DBPromptRepo
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.core.response import LLMResponse
+from evoluteprompt.core.strategy import ActivePromptStrategy, PromptSelector
+from evoluteprompt.core.template import PromptTemplate
+from evoluteprompt.integrations.mock import FakeOpenAIServer
+from evoluteprompt.integrations.openai import OpenAIProvider
+from evoluteprompt.prompt_filters import FilterPipeline, KeywordFilter, RegexFilter
+from evoluteprompt.utils import InMemoryCache, hash_prompt
+from evoluteprompt.utils.instrumentation import traced
+
+TEMPLATE = """
+You are a {{ role }} assistant for {{ company }}.
+{% for rule in rules %}
+- {{ rule }}
+{% endfor %}
+Context:
+{{ context }}
+
+Question: {{ question }}
+Answer in {{ style }} style.
+"""
+
+
+def _size(base: int, scale: float) -> int:
+    return max(1, int(base * scale))
+
+
+@benchmark("template.render")
+def template_render(scale):
+    """Render a template with a loop and a long context."""
+    rng = random.Random(0)
+    template = PromptTemplate(template=TEMPLATE)
+    variables = {
+        "role": "support",
+        "company": "Example Corp",
+        "rules": [paragraph(rng, 1) for _ in range(10)],
+        "context": paragraph(rng, 30),
+        "question": paragraph(rng, 1),
+        "style": "concise",
+    }
+    yield lambda: template.render(**variables)
+
+
+@benchmark("hashing.hash_prompt")
+def hashing_hash_prompt(scale):
+    """Hash a long chat."""
+    prompt = long_chat(_size(100, scale))
+    yield lambda: hash_prompt(prompt)
+
+
+@benchmark("cache.in_memory_get")
+def cache_in_memory_get(scale):
+    """Look up a long chat in a populated in-memory cache."""
+    cache = InMemoryCache()
+    response = LLMResponse(text="cached", model="gpt-4o-mini", provider="openai")
+    prompts = [long_chat(_size(50, scale), seed) for seed in range(_size(1000, scale))]
+    for prompt in prompts:
+        cache.set(prompt, response)
+    prompt = prompts[len(prompts) // 2]
+    yield lambda: cache.get(prompt)
+
+
+@benchmark("filters.pipeline_check")
+def filters_pipeline_check(scale):
+    """Check a long chat against a large keyword list and some patterns."""
+    pipeline = FilterPipeline(
+        [
+            KeywordFilter(keyword_list(_size(5000, scale)), check_user_messages_only=False),
+            RegexFilter(
+                [r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b", r"\b[\w.]+@[\w.]+\.\w+\b"],
+                check_user_messages_only=False,
+            ),
+        ]
+    )
+    prompt = long_chat(_size(20, scale))
+    yield lambda: pipeline.check(prompt)
+
+
+@benchmark("repo.get_active_prompt")
+async def repo_get_active_prompt(scale):
+    """Get the active version of a prompt with 10k versions."""
+    repo = DBPromptRepo("sqlite://:memory:")
+    await fill_repo(repo, "chat", _size(10000, scale))
+    yield lambda: repo.get_active_prompt("chat")
+    await repo.close()
+
+
+@benchmark("selector.select_prompt")
+async def selector_select_prompt(scale):
+    """Select the active version of a prompt with 10k versions."""
+    repo = DBPromptRepo("sqlite://:memory:")
+    await fill_repo(repo, "chat", _size(10000, scale))
+    selector = PromptSelector(repo)
+    yield lambda: selector.select_prompt("chat")
+    await repo.close()
+
+
+@benchmark("selector.compiled_select")
+async def selector_compiled_select(scale):
+    """Select from a compiled strategy, which serves from memory."""
+    repo = DBPromptRepo("sqlite://:memory:")
+    await fill_repo(repo, "chat", _size(10000, scale))
+    compiled = await PromptSelector(repo).compile_strategy(ActivePromptStrategy(repo), ["chat"])
+    yield lambda: compiled.select("chat")
+    await repo.close()
+
+
+@benchmark("provider.round_trip")
+async def provider_round_trip(scale):
+    """Send a chat completion to a local fake OpenAI server and parse the reply."""
+    prompt = PromptBuilder().add_system("You are terse.").add_user("Say hello.").build()
+
+    async with FakeOpenAIServer() as server:
+        provider = OpenAIProvider(model="gpt-4o-mini", base_url=server.url)
+        yield lambda: provider.generate(prompt)
+
+
+@benchmark("provider.stream_round_trip")
+async def provider_stream_round_trip(scale):
+    """Stream a chat completion of 50 chunks from a local fake OpenAI server."""
+    prompt = PromptBuilder().add_system("You are terse.").add_user("Say hello.").build()
+
+    async with FakeOpenAIServer(reply=" ".join(["word"] * 50)) as server:
+        provider = OpenAIProvider(model="gpt-4o-mini", base_url=server.url)
+        yield lambda: provider.generate_stream(prompt)
+
+
+@traced("bench.noop")
+def _traced_noop():
+    return None
+
+
+@benchmark("instrumentation.traced_disabled")
+def instrumentation_traced_disabled(scale):
+    """Call a traced function while instrumentation is off."""
+    yield _traced_noop
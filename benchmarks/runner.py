@@ -0,0 +1,246 @@
+"""
+A small benchmark runner with JSON baselines.
+
+A benchmark is a generator (sync or async) that takes a dataset scale, does
+its setup, yields the function to time and then cleans up. The function may
+return an awaitable, which is awaited on every call.
+"""
+
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+RESULTS_FORMAT = 1
+
+BENCHMARKS: Dict[str, Callable[[float], Any]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """
+    Register a benchmark.
+
+    Args:
+        name: Dotted name of the benchmark, such as ``"template.render"``.
+
+    Returns:
+        A decorator for the benchmark's generator function.
+    """
+
+    def decorator(setup: Callable[[float], Any]) -> Callable[[float], Any]:
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark '{name}' is already registered")
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+async def _time_calls(fn: Callable[[], Any], is_async: bool, number: int) -> float:
+    """Call ``fn`` ``number`` times and return the elapsed seconds."""
+    if is_async:
+        start = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+
+async def run_benchmark(
+    setup: Callable[[float], Any], scale: float = 1.0, rounds: int = 5, min_time: float = 0.2
+) -> Dict[str, Any]:
+    """
+    Time one benchmark.
+
+    The number of calls per round is calibrated so that each round takes at
+    least ``min_time`` seconds.
+
+    Args:
+        setup: The benchmark's generator function.
+        scale: Multiplier for the dataset sizes.
+        rounds: Number of timed rounds.
+        min_time: Minimum duration of a round in seconds.
+
+    Returns:
+        The timings, in seconds per call, and the derived throughput.
+    """
+    steps = setup(scale)
+    is_async_gen = inspect.isasyncgen(steps)
+    fn = await steps.__anext__() if is_async_gen else next(steps)
+
+    try:
+        # The first call warms caches and tells whether the function is async
+        start = time.perf_counter()
+        result = fn()
+        is_async = inspect.isawaitable(result)
+        if is_async:
+            await result
+        first = time.perf_counter() - start
+
+        number = max(1, min(1_000_000, int(min_time / max(first, 1e-7))))
+        elapsed = await _time_calls(fn, is_async, number)
+        number = max(1, min(1_000_000, int(number * min_time / max(elapsed, 1e-7))))
+
+        timings: List[float] = []
+        for _ in range(rounds):
+            timings.append(await _time_calls(fn, is_async, number) / number)
+    finally:
+        if is_async_gen:
+            try:
+                await steps.__anext__()
+            except StopAsyncIteration:
+                pass
+        else:
+            next(steps, None)
+
+    median = statistics.median(timings)
+    return {
+        "ops_per_sec": 1 / median,
+        "median_s": median,
+        "min_s": min(timings),
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": rounds,
+        "number": number,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    """The current git commit, if the suite runs from a checkout."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def run_suite(
+    pattern: Optional[str] = None,
+    scale: float = 1.0,
+    rounds: int = 5,
+    min_time: float = 0.2,
+    report: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """
+    Run every registered benchmark whose name contains ``pattern``.
+
+    A benchmark that raises is reported with its error and does not stop the
+    rest of the suite.
+
+    Args:
+        pattern: Substring to select benchmarks by name.
+        scale: Multiplier for the dataset sizes.
+        rounds: Number of timed rounds per benchmark.
+        min_time: Minimum duration of a round in seconds.
+        report: Called with a line of progress for each benchmark.
+
+    Returns:
+        The results document, ready to be saved as JSON.
+    """
+    results: Dict[str, Any] = {}
+    for name in sorted(BENCHMARKS):
+        if pattern and pattern not in name:
+            continue
+        try:
+            result = asyncio.run(run_benchmark(BENCHMARKS[name], scale, rounds, min_time))
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            report(f"{name:<40} error: {results[name]['error']}")
+            continue
+        results[name] = result
+        report(
+            f"{name:<40} {result['ops_per_sec']:>14,.1f} ops/s"
+            f"  ({result['median_s'] * 1e6:,.1f} us/op)"
+        )
+
+    return {
+        "format": RESULTS_FORMAT,
+        "created_at": datetime.now().isoformat(),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "scale": scale,
+        "results": results,
+    }
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    """
+    Save a results document.
+
+    Args:
+        results: The document returned by ``run_suite``.
+        path: Where to write it.
+    """
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """
+    Load a results document.
+
+    Args:
+        path: Path to a file written by ``save_results``.
+
+    Returns:
+        The results document.
+
+    Raises:
+        ValueError: If the file is not a supported results document.
+    """
+    with open(path, "r") as f:
+        results = json.load(f)
+    if results.get("format") != RESULTS_FORMAT:
+        raise ValueError(f"Unsupported results format {results.get('format')!r} in '{path}'")
+    return results
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    Compare the throughput of two runs.
+
+    Args:
+        baseline: The reference results document.
+        current: The results document to check.
+        threshold: Largest allowed relative drop in throughput, such as
+            ``0.1`` for 10%.
+
+    Returns:
+        One row per benchmark in either run, with the relative ``change`` in
+        throughput and whether it is a ``regression``. Benchmarks that are
+        missing from a run or failed have a ``change`` of None; a benchmark
+        that failed in the current run counts as a regression.
+    """
+    rows = []
+    old_results = baseline["results"]
+    new_results = current["results"]
+    for name in sorted(old_results.keys() | new_results.keys()):
+        old = old_results.get(name, {}).get("ops_per_sec")
+        new = new_results.get(name, {}).get("ops_per_sec")
+        change = new / old - 1 if old and new else None
+        failed = name in new_results and new is None
+        rows.append(
+            {
+                "name": name,
+                "baseline": old,
+                "current": new,
+                "change": change,
+                "regression": failed or (change is not None and change < -threshold),
+            }
+        )
+    return rows
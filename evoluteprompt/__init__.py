@@ -2,34 +2,97 @@
 EvolutePrompt: A comprehensive prompt management library for Large Language Models.
 """
 
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
 __version__ = "0.1.0"
 
-from evoluteprompt.api import EvolutePrompt
-from evoluteprompt.core.database import DBPromptRepo
-from evoluteprompt.core.prompt import Prompt, PromptBuilder
-from evoluteprompt.core.provider import LLMProvider
-from evoluteprompt.core.repository import PromptRepo
-from evoluteprompt.core.response import LLMResponse
-from evoluteprompt.core.strategy import (
-    ABTestingPromptStrategy,
-    ActivePromptStrategy,
-    CategoryPromptStrategy,
-    ConditionalPromptStrategy,
-    ContextAwarePromptStrategy,
-    FallbackPromptStrategy,
-    LatestPromptStrategy,
-    PromptSelector,
-    PromptStrategy,
-)
-from evoluteprompt.core.template import MultiMessageTemplate, PromptTemplate
-from evoluteprompt.core.types import (
-    Message,
-    MessageRole,
-    PromptCategory,
-    PromptMetadata,
-    PromptParameters,
-    PromptStats,
-)
+# Public names and the modules that define them. They are imported on first
+# access, so "import evoluteprompt" does not pull in Tortoise ORM, semver or
+# tiktoken until they are used.
+_LAZY_IMPORTS = {
+    "EvolutePrompt": "evoluteprompt.api",
+    "BanditPromptStrategy": "evoluteprompt.core.bandit",
+    "DatabaseConfig": "evoluteprompt.core.database",
+    "DBPromptRepo": "evoluteprompt.core.database",
+    "PackedPromptRepo": "evoluteprompt.core.packed",
+    "Prompt": "evoluteprompt.core.prompt",
+    "PromptBuilder": "evoluteprompt.core.prompt",
+    "LLMProvider": "evoluteprompt.core.provider",
+    "PromptRepo": "evoluteprompt.core.repository",
+    "LLMResponse": "evoluteprompt.core.response",
+    "StatsAggregator": "evoluteprompt.core.stats",
+    "ABTestingPromptStrategy": "evoluteprompt.core.strategy",
+    "ActivePromptStrategy": "evoluteprompt.core.strategy",
+    "CategoryPromptStrategy": "evoluteprompt.core.strategy",
+    "CompiledStrategy": "evoluteprompt.core.strategy",
+    "ConditionalPromptStrategy": "evoluteprompt.core.strategy",
+    "ContextAwarePromptStrategy": "evoluteprompt.core.strategy",
+    "FallbackPromptStrategy": "evoluteprompt.core.strategy",
+    "LatestPromptStrategy": "evoluteprompt.core.strategy",
+    "PromptSelector": "evoluteprompt.core.strategy",
+    "PromptStrategy": "evoluteprompt.core.strategy",
+    "MultiMessageTemplate": "evoluteprompt.core.template",
+    "PromptTemplate": "evoluteprompt.core.template",
+    "Message": "evoluteprompt.core.types",
+    "MessageRole": "evoluteprompt.core.types",
+    "PromptCategory": "evoluteprompt.core.types",
+    "PromptMetadata": "evoluteprompt.core.types",
+    "PromptParameters": "evoluteprompt.core.types",
+    "PromptStats": "evoluteprompt.core.types",
+    "ModelPrice": "evoluteprompt.core.usage",
+    "UsageSummary": "evoluteprompt.core.usage",
+    "RevisionWatcher": "evoluteprompt.core.watcher",
+}
+
+if TYPE_CHECKING:
+    from evoluteprompt.api import EvolutePrompt
+    from evoluteprompt.core.bandit import BanditPromptStrategy
+    from evoluteprompt.core.database import DatabaseConfig, DBPromptRepo
+    from evoluteprompt.core.packed import PackedPromptRepo
+    from evoluteprompt.core.prompt import Prompt, PromptBuilder
+    from evoluteprompt.core.provider import LLMProvider
+    from evoluteprompt.core.repository import PromptRepo
+    from evoluteprompt.core.response import LLMResponse
+    from evoluteprompt.core.stats import StatsAggregator
+    from evoluteprompt.core.strategy import (
+        ABTestingPromptStrategy,
+        ActivePromptStrategy,
+        CategoryPromptStrategy,
+        CompiledStrategy,
+        ConditionalPromptStrategy,
+        ContextAwarePromptStrategy,
+        FallbackPromptStrategy,
+        LatestPromptStrategy,
+        PromptSelector,
+        PromptStrategy,
+    )
+    from evoluteprompt.core.template import MultiMessageTemplate, PromptTemplate
+    from evoluteprompt.core.types import (
+        Message,
+        MessageRole,
+        PromptCategory,
+        PromptMetadata,
+        PromptParameters,
+        PromptStats,
+    )
+    from evoluteprompt.core.usage import ModelPrice, UsageSummary
+    from evoluteprompt.core.watcher import RevisionWatcher
+
+
+def __getattr__(name: str) -> Any:
+    """Import a public name on first access."""
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
 
 # Define UI availability flag without importing Streamlit
 HAS_UI = False
@@ -56,10 +119,16 @@ __all__ = [
     "PromptTemplate",
     "MultiMessageTemplate",
     "PromptRepo",
+    "PackedPromptRepo",
     "LLMProvider",
     "LLMResponse",
     # Database
     "DBPromptRepo",
+    "DatabaseConfig",
+    "StatsAggregator",
+    "ModelPrice",
+    "UsageSummary",
+    "RevisionWatcher",
     # Strategies
     "PromptStrategy",
     "ActivePromptStrategy",
@@ -67,8 +136,10 @@ __all__ = [
     "LatestPromptStrategy",
     "ConditionalPromptStrategy",
     "ABTestingPromptStrategy",
+    "BanditPromptStrategy",
     "ContextAwarePromptStrategy",
     "CategoryPromptStrategy",
+    "CompiledStrategy",
     "PromptSelector",
     # Types
     "MessageRole",
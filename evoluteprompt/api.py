@@ -3,9 +3,10 @@ High-level API for EvolutePrompt.
 """
 
 import asyncio
+import os
 from typing import Any, Callable, Dict, List, Optional
 
-from evoluteprompt.core.database import DBPromptRepo
+from evoluteprompt.core.database import DatabaseConfig, DBPromptRepo
 from evoluteprompt.core.prompt import Prompt, PromptBuilder
 from evoluteprompt.core.strategy import (
     ActivePromptStrategy,
@@ -21,13 +22,24 @@ from evoluteprompt.core.types import MessageRole, PromptCategory
 class EvolutePrompt:
     """Main class for interacting with EvolutePrompt."""
 
-    def __init__(self, db_url: str = "sqlite:///:memory:"):
+    def __init__(
+        self,
+        db_url: Optional[str] = None,
+        config: Optional[DatabaseConfig] = None,
+    ):
         """Initialize EvolutePrompt.
 
         Args:
-            db_url: URL for the database. Defaults to in-memory SQLite.
+            db_url: URL for the database. Defaults to the EVOLUTEPROMPT_DB_URL
+                environment variable, or in-memory SQLite if that is unset.
+                Point every worker at the same URL to share one store.
+            config: Connection settings (pool sizes, timeouts, SQLite pragmas).
+                If given, its ``db_url`` takes precedence over ``db_url``.
         """
-        self.repo = DBPromptRepo(db_url)
+        if db_url is None:
+            db_url = os.environ.get("EVOLUTEPROMPT_DB_URL", "sqlite://:memory:")
+
+        self.repo = DBPromptRepo(db_url, config=config)
         self.selector = PromptSelector(self.repo)
 
     def _get_or_create_event_loop(self):
@@ -1,5 +1,27 @@
 """Core module for EvolutePrompt."""
 
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+# Imported on first access
+_LAZY_IMPORTS = {
+    "Prompt": "evoluteprompt.core.prompt",
+    "PromptBuilder": "evoluteprompt.core.prompt",
+    "PromptTemplate": "evoluteprompt.core.template",
+    "PromptRepo": "evoluteprompt.core.repository",
+    "LLMProvider": "evoluteprompt.core.provider",
+    "LLMResponse": "evoluteprompt.core.response",
+    "MessageRole": "evoluteprompt.core.types",
+}
+
+if TYPE_CHECKING:
+    from evoluteprompt.core.prompt import Prompt, PromptBuilder
+    from evoluteprompt.core.provider import LLMProvider
+    from evoluteprompt.core.repository import PromptRepo
+    from evoluteprompt.core.response import LLMResponse
+    from evoluteprompt.core.template import PromptTemplate
+    from evoluteprompt.core.types import MessageRole
+
 __all__ = [
     "Prompt",
     "PromptBuilder",
@@ -10,9 +32,16 @@ __all__ = [
     "MessageRole",
 ]
 
-from evoluteprompt.core.prompt import Prompt, PromptBuilder
-from evoluteprompt.core.provider import LLMProvider
-from evoluteprompt.core.repository import PromptRepo
-from evoluteprompt.core.response import LLMResponse
-from evoluteprompt.core.template import PromptTemplate
-from evoluteprompt.core.types import MessageRole
+
+def __getattr__(name: str) -> Any:
+    """Import a public name on first access."""
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
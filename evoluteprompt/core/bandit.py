@@ -0,0 +1,295 @@
+"""
+Multi-armed bandit strategies that shift traffic towards the best prompt.
+"""
+
+import asyncio
+import math
+import random
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from evoluteprompt.core.prompt import Prompt
+from evoluteprompt.core.snapshot import PromptDependencies, PromptSnapshot
+from evoluteprompt.core.strategy import PromptStrategy
+from evoluteprompt.core.types import PromptStats
+
+if TYPE_CHECKING:
+    from evoluteprompt.core.database import DBPromptRepo
+    from evoluteprompt.core.stats import StatsAggregator
+
+# An arm is a prompt name (its active version) or a (name, version) pair
+Arm = Union[str, Tuple[str, str]]
+
+
+class ArmStats:
+    """In-memory posterior counters for one arm."""
+
+    __slots__ = ("pulls", "reward")
+
+    def __init__(self, pulls: float = 0.0, reward: float = 0.0):
+        self.pulls = pulls
+        self.reward = reward
+
+    @property
+    def mean(self) -> float:
+        """Average reward, or 0.0 before the first pull."""
+        return self.reward / self.pulls if self.pulls else 0.0
+
+
+class BanditPromptStrategy(PromptStrategy):
+    """
+    Strategy that learns which prompt works best while serving traffic.
+
+    Each arm is either a prompt name, meaning its active version, or a
+    ``(name, version)`` pair. Rewards are reported with ``record`` and kept
+    in memory, so selection never touches the database. When a
+    ``StatsAggregator`` is given, the success and failure counts are also
+    batched to the repository in the background.
+
+    Two algorithms are available: ``"thompson"`` draws from a Beta
+    posterior per arm, and ``"ucb1"`` picks the arm with the highest upper
+    confidence bound.
+    """
+
+    ALGORITHMS = ("thompson", "ucb1")
+
+    def __init__(
+        self,
+        repo: "DBPromptRepo",
+        arms: List[Arm],
+        algorithm: str = "thompson",
+        aggregator: Optional["StatsAggregator"] = None,
+        latency_weight: float = 0.0,
+        cost_weight: float = 0.0,
+        latency_budget_ms: float = 1000.0,
+        token_budget: int = 1000,
+        exploration: float = 2.0,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Initialize the strategy.
+
+        Args:
+            repo: The prompt repository.
+            arms: The prompts to choose between.
+            algorithm: ``"thompson"`` or ``"ucb1"``.
+            aggregator: Optional aggregator that persists usage counts.
+            latency_weight: How much of the reward a response at or above
+                ``latency_budget_ms`` loses.
+            cost_weight: How much of the reward a response using
+                ``token_budget`` or more tokens loses.
+            latency_budget_ms: Latency at which the full latency penalty applies.
+            token_budget: Token count at which the full cost penalty applies.
+            exploration: The UCB1 exploration constant.
+            rng: Random generator, for reproducible Thompson sampling.
+
+        Raises:
+            ValueError: If there are no arms or the algorithm is unknown.
+        """
+        if not arms:
+            raise ValueError("At least one arm is required")
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(
+                f"Unknown algorithm '{algorithm}', expected one of {self.ALGORITHMS}"
+            )
+
+        self.repo = repo
+        self.arms: List[Tuple[str, Optional[str]]] = [
+            (arm, None) if isinstance(arm, str) else (arm[0], arm[1]) for arm in arms
+        ]
+        self.algorithm = algorithm
+        self.aggregator = aggregator
+        self.latency_weight = latency_weight
+        self.cost_weight = cost_weight
+        self.latency_budget_ms = latency_budget_ms
+        self.token_budget = token_budget
+        self.exploration = exploration
+        self.random = rng or random.Random()
+
+        self.stats: List[ArmStats] = [ArmStats() for _ in self.arms]
+        self._index = {arm: i for i, arm in enumerate(self.arms)}
+        # Specific versions do not change, so they are fetched once
+        self._versions: Dict[Tuple[str, str], Prompt] = {}
+        # Active prompts of the unversioned arms, reloaded when the repository's
+        # epoch changes
+        self._active_names = [name for name, version in self.arms if version is None]
+        self._active: Dict[str, Prompt] = {}
+        self._active_epoch: Optional[int] = None
+        self._active_lock = asyncio.Lock()
+
+    async def load_priors(self) -> None:
+        """
+        Seed the counters with the success and failure counts stored in the
+        repository. Call once at startup, before any rewards are recorded.
+        """
+        # Counters change without bumping the epoch, so always reload here
+        self._active_epoch = None
+        active = await self._get_active()
+
+        for i, (name, version) in enumerate(self.arms):
+            if version is None:
+                prompt = active.get(name)
+            else:
+                prompt = await self._get_version(name, version)
+
+            if prompt is not None and prompt.stats is not None:
+                successes = prompt.stats.success_count
+                self.stats[i].pulls += successes + prompt.stats.failure_count
+                self.stats[i].reward += successes
+
+    def choose_arm(self) -> int:
+        """
+        Pick the arm to play next.
+
+        Returns:
+            The index of the arm in ``arms``.
+        """
+        if self.algorithm == "thompson":
+            draws = [
+                self.random.betavariate(1.0 + s.reward, 1.0 + s.pulls - s.reward)
+                for s in self.stats
+            ]
+            return max(range(len(draws)), key=draws.__getitem__)
+
+        # UCB1: play every arm once, then the highest upper confidence bound
+        total = 0.0
+        for i, s in enumerate(self.stats):
+            if s.pulls == 0:
+                return i
+            total += s.pulls
+
+        log_total = math.log(total)
+        bounds = [
+            s.mean + math.sqrt(self.exploration * log_total / s.pulls) for s in self.stats
+        ]
+        return max(range(len(bounds)), key=bounds.__getitem__)
+
+    def reward(self, success: bool, stats: Optional[PromptStats] = None) -> float:
+        """
+        Score one response.
+
+        A failure scores 0.0. A success scores 1.0 minus the latency and cost
+        penalties, each scaled by how much of its budget the response used.
+
+        Args:
+            success: Whether the response was acceptable.
+            stats: Latency and token usage of the response.
+
+        Returns:
+            A reward between 0.0 and 1.0.
+        """
+        if not success:
+            return 0.0
+
+        reward = 1.0
+        if stats is not None:
+            if stats.latency_ms is not None and self.latency_weight:
+                reward -= self.latency_weight * min(
+                    stats.latency_ms / self.latency_budget_ms, 1.0
+                )
+            if stats.total_tokens is not None and self.cost_weight:
+                reward -= self.cost_weight * min(stats.total_tokens / self.token_budget, 1.0)
+
+        return max(reward, 0.0)
+
+    def record(
+        self,
+        prompt: Prompt,
+        success: bool = True,
+        stats: Optional[PromptStats] = None,
+    ) -> None:
+        """
+        Report the outcome of a prompt chosen by this strategy.
+
+        Args:
+            prompt: The prompt returned by ``select_prompt``.
+            success: Whether the response was acceptable.
+            stats: Latency and token usage of the response.
+
+        Raises:
+            KeyError: If the prompt is not one of the arms.
+        """
+        metadata = prompt.metadata
+        if metadata is None or metadata.name is None:
+            raise KeyError("Prompt has no name; record prompts loaded from the repository")
+        name, version = metadata.name, metadata.version
+
+        i = self._index.get((name, version))
+        if i is None:
+            i = self._index[(name, None)]
+
+        self.stats[i].pulls += 1
+        self.stats[i].reward += self.reward(success, stats)
+
+        if self.aggregator is not None:
+            self.aggregator.record(name, version, success=success)
+
+    async def _get_version(self, name: str, version: str) -> Optional[Prompt]:
+        """Fetch a specific version, caching it for later selections."""
+        prompt = self._versions.get((name, version))
+        if prompt is None:
+            prompt = await self.repo.get_prompt(name, version)
+            if prompt is not None:
+                self._versions[(name, version)] = prompt
+        return prompt
+
+    async def _get_active(self) -> Dict[str, Prompt]:
+        """Get the active prompts of the unversioned arms, reloading them after writes."""
+        if self._active_epoch == self.repo.epoch:
+            return self._active
+
+        async with self._active_lock:
+            epoch = self.repo.epoch
+            if self._active_epoch != epoch:
+                self._active = (
+                    await self.repo.get_active_prompts(self._active_names)
+                    if self._active_names
+                    else {}
+                )
+                self._active_epoch = epoch
+            return self._active
+
+    async def select_prompt(
+        self, prompt_name: str, context: Dict[str, Any] = None
+    ) -> Optional[Prompt]:
+        """
+        Select the arm to play.
+
+        Active prompts are loaded with one query and reused until the
+        repository's epoch changes, like a ``CompiledStrategy`` snapshot.
+
+        Args:
+            prompt_name: The name of the prompt (ignored).
+            context: Additional context for prompt selection (not used).
+
+        Returns:
+            The prompt for the chosen arm, or None if it does not exist.
+        """
+        name, version = self.arms[self.choose_arm()]
+        if version is None:
+            return (await self._get_active()).get(name)
+        return await self._get_version(name, version)
+
+    def dependencies(self, prompt_name: str) -> Optional[PromptDependencies]:
+        """
+        Depend on the active prompt of every unversioned arm.
+
+        Versioned arms are served from the cache filled by ``load_priors``,
+        so the strategy can only be compiled once they are all cached.
+        """
+        for name, version in self.arms:
+            if version is not None and (name, version) not in self._versions:
+                return None
+
+        return PromptDependencies(active=[name for name, version in self.arms if version is None])
+
+    def select_from_snapshot(
+        self,
+        snapshot: PromptSnapshot,
+        prompt_name: str,
+        context: Dict[str, Any] = None,
+    ) -> Optional[Prompt]:
+        """Select an arm from the snapshot and the version cache."""
+        name, version = self.arms[self.choose_arm()]
+        if version is None:
+            return snapshot.active.get(name)
+        return self._versions.get((name, version))
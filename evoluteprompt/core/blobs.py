@@ -0,0 +1,105 @@
+"""
+Content-addressed storage helpers for prompt messages.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+
+def message_hash(message: Dict[str, Any]) -> str:
+    """
+    Hash a serialized message.
+
+    Args:
+        message: The message as produced by ``model_dump(mode="json")``.
+
+    Returns:
+        The hex SHA-256 of the message's canonical JSON.
+    """
+    data = json.dumps(message, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class BlobCache:
+    """
+    A thread-safe LRU cache of message blobs by hash.
+
+    Blobs are immutable, so a cached blob never goes stale and can be shared
+    by every repository in the process. Callers must not modify the
+    returned dictionaries.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of blobs to keep.
+        """
+        self.max_entries = max_entries
+        self._blobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, blob_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a blob.
+
+        Args:
+            blob_hash: The hash of the blob.
+
+        Returns:
+            The blob, or None if it is not cached.
+        """
+        with self._lock:
+            blob = self._blobs.get(blob_hash)
+            if blob is not None:
+                self._blobs.move_to_end(blob_hash)
+            return blob
+
+    def get_many(self, blob_hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the cached subset of several blobs.
+
+        Args:
+            blob_hashes: The hashes to look up.
+
+        Returns:
+            A mapping from hash to blob for the hashes that are cached.
+        """
+        found = {}
+        with self._lock:
+            for blob_hash in blob_hashes:
+                blob = self._blobs.get(blob_hash)
+                if blob is not None:
+                    self._blobs.move_to_end(blob_hash)
+                    found[blob_hash] = blob
+        return found
+
+    def put(self, blob_hash: str, blob: Dict[str, Any]) -> None:
+        """
+        Add a blob, evicting the least recently used ones if full.
+
+        Args:
+            blob_hash: The hash of the blob.
+            blob: The blob.
+        """
+        with self._lock:
+            self._blobs[blob_hash] = blob
+            self._blobs.move_to_end(blob_hash)
+            while len(self._blobs) > self.max_entries:
+                self._blobs.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every blob."""
+        with self._lock:
+            self._blobs.clear()
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+
+# Shared by all repositories in the process
+shared_blob_cache = BlobCache()
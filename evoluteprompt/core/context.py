@@ -0,0 +1,412 @@
+"""
+Keeping conversations within a model's context window.
+"""
+
+import inspect
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple, Union
+
+from evoluteprompt.core.prompt import Prompt, PromptBuilder
+from evoluteprompt.core.provider import LLMProvider
+from evoluteprompt.core.types import Message, MessageRole
+from evoluteprompt.utils import tokenizers
+from evoluteprompt.utils.instrumentation import counter, traced
+
+# Name of the system message that holds the summary of dropped turns
+SUMMARY_NAME = "context_summary"
+
+# Turns summarized into text, synchronously or not
+Summarizer = Callable[[List[Message]], Union[str, Awaitable[str]]]
+
+
+class ContextBudgetError(ValueError):
+    """Raised when the pinned messages and the latest turn alone exceed the budget."""
+
+
+class ContextBudget:
+    """
+    A token budget that long conversations are fitted into before each call.
+
+    Leading system messages are pinned. The rest of the conversation is split
+    into turns, each starting at a user message, and the oldest turns are
+    dropped until the conversation fits. With a summarizer, dropped turns are
+    replaced by a summary, which is folded into the next summary when more
+    turns are dropped.
+
+    Token counts are cached per message, so fitting a conversation that grew
+    by one turn only tokenizes the new messages.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        reserve_tokens: int = 0,
+        summarizer: Optional[Summarizer] = None,
+        summary_tokens: int = 256,
+        min_recent_turns: int = 1,
+        encoding_name: str = tokenizers.DEFAULT_ENCODING,
+        token_counter: Optional[Callable[[str], int]] = None,
+        cache_size: int = 10000,
+    ):
+        """
+        Initialize the budget.
+
+        Args:
+            max_tokens: The model's context window, in tokens.
+            reserve_tokens: Tokens kept free for the completion.
+            summarizer: Summarizes dropped turns. Without one, they are dropped.
+            summary_tokens: Tokens kept free for the summary when turns are
+                summarized.
+            min_recent_turns: The number of latest turns that are never dropped.
+            encoding_name: The tokenizer encoding used to count tokens.
+            token_counter: Counts the tokens of a text, instead of the encoding.
+            cache_size: How many message token counts to cache.
+        """
+        self.max_tokens = max_tokens
+        self.reserve_tokens = reserve_tokens
+        self.summarizer = summarizer
+        self.summary_tokens = summary_tokens
+        self.min_recent_turns = max(1, min_recent_turns)
+        self.encoding_name = encoding_name
+        self.token_counter = token_counter
+        self.cache_size = cache_size
+        self._counts: "OrderedDict[Tuple[str, Optional[str], str], int]" = OrderedDict()
+
+    @property
+    def limit(self) -> int:
+        """The number of tokens a fitted prompt may use."""
+        return self.max_tokens - self.reserve_tokens
+
+    def count_message(self, message: Message) -> int:
+        """
+        Count the tokens of a message, using the cache.
+
+        Args:
+            message: The message.
+
+        Returns:
+            Number of tokens, including the message's formatting overhead.
+        """
+        key = (message.role.value, message.name, message.content)
+        count = self._counts.get(key)
+        if count is not None:
+            self._counts.move_to_end(key)
+            return count
+
+        if self.token_counter is not None:
+            count = tokenizers.MESSAGE_OVERHEAD_TOKENS + self.token_counter(message.content)
+            if message.name:
+                count += self.token_counter(message.name)
+        else:
+            count = tokenizers.count_message_tokens(
+                message, tokenizers.get_encoding(self.encoding_name)
+            )
+
+        self._counts[key] = count
+        if len(self._counts) > self.cache_size:
+            self._counts.popitem(last=False)
+        return count
+
+    def count_prompt(self, prompt: Prompt) -> int:
+        """
+        Count the tokens of a prompt, using the cache.
+
+        Args:
+            prompt: The prompt.
+
+        Returns:
+            Number of tokens.
+        """
+        return (
+            sum(self.count_message(message) for message in prompt.messages)
+            + tokenizers.PROMPT_OVERHEAD_TOKENS
+        )
+
+    def window(self, prompt: Optional[Prompt] = None) -> "ContextWindow":
+        """
+        Start tracking a conversation within this budget.
+
+        Args:
+            prompt: The conversation so far.
+
+        Returns:
+            A context window holding the conversation.
+        """
+        return ContextWindow(self, prompt)
+
+    async def fit(self, prompt: Prompt) -> Prompt:
+        """
+        Fit a prompt into the budget, summarizing dropped turns if possible.
+
+        Args:
+            prompt: The prompt.
+
+        Returns:
+            The prompt itself if it fits, or a shorter copy.
+
+        Raises:
+            ContextBudgetError: If the pinned messages and the latest turns
+                do not fit on their own.
+        """
+        window = self.window(prompt)
+        if window.total_tokens <= self.limit:
+            return prompt
+        await window.fit()
+        return window.to_prompt()
+
+    def truncate(self, prompt: Prompt) -> Prompt:
+        """
+        Fit a prompt into the budget by dropping its oldest turns.
+
+        Args:
+            prompt: The prompt.
+
+        Returns:
+            The prompt itself if it fits, or a shorter copy.
+
+        Raises:
+            ContextBudgetError: If the pinned messages and the latest turns
+                do not fit on their own.
+        """
+        window = self.window(prompt)
+        if window.total_tokens <= self.limit:
+            return prompt
+        window.truncate()
+        return window.to_prompt()
+
+
+class _Turn:
+    """A user message with the replies that follow it, and their tokens."""
+
+    __slots__ = ("messages", "tokens")
+
+    def __init__(self) -> None:
+        self.messages: List[Message] = []
+        self.tokens = 0
+
+
+class ContextWindow:
+    """
+    A conversation kept within a ``ContextBudget`` as it grows.
+
+    Adding a message tokenizes only that message and updates a running total,
+    and each message is dropped at most once, so keeping a long chat within
+    budget costs O(1) per turn.
+    """
+
+    def __init__(self, budget: ContextBudget, prompt: Optional[Prompt] = None):
+        """
+        Initialize the window.
+
+        Args:
+            budget: The budget to keep the conversation within.
+            prompt: The conversation so far. Its leading system messages are
+                pinned, and its metadata and parameters are kept.
+        """
+        self.budget = budget
+        self.metadata = prompt.metadata if prompt is not None else None
+        self.parameters = prompt.parameters if prompt is not None else None
+        self.dropped_messages = 0
+
+        self._pinned: List[Message] = []
+        self._summary: Optional[Message] = None
+        self._turns: Deque[_Turn] = deque()
+        self._total = tokenizers.PROMPT_OVERHEAD_TOKENS
+
+        for message in prompt.messages if prompt is not None else []:
+            if message.role == MessageRole.SYSTEM and message.name == SUMMARY_NAME:
+                self._set_summary(message)
+            elif message.role == MessageRole.SYSTEM and not self._turns:
+                self.pin(message)
+            else:
+                self.add(message)
+
+    @property
+    def total_tokens(self) -> int:
+        """The number of tokens the conversation uses."""
+        return self._total
+
+    @property
+    def summary(self) -> Optional[str]:
+        """The summary of the dropped turns, if any."""
+        return self._summary.content if self._summary is not None else None
+
+    def pin(self, message: Message) -> "ContextWindow":
+        """
+        Add a message that is never dropped, such as instructions.
+
+        Pinned messages come first, in the order they were pinned.
+
+        Args:
+            message: The message.
+
+        Returns:
+            The window.
+        """
+        self._pinned.append(message)
+        self._total += self.budget.count_message(message)
+        return self
+
+    def add(self, message: Message) -> "ContextWindow":
+        """
+        Add a message to the conversation. A user message starts a new turn.
+
+        Args:
+            message: The message.
+
+        Returns:
+            The window.
+        """
+        if message.role == MessageRole.USER or not self._turns:
+            self._turns.append(_Turn())
+        turn = self._turns[-1]
+        tokens = self.budget.count_message(message)
+        turn.messages.append(message)
+        turn.tokens += tokens
+        self._total += tokens
+        return self
+
+    def add_message(
+        self, role: Union[str, MessageRole], content: str, name: Optional[str] = None
+    ) -> "ContextWindow":
+        """Add a message to the conversation."""
+        return self.add(Message(role=MessageRole(role), content=content, name=name))
+
+    def add_system(self, content: str, pinned: bool = True) -> "ContextWindow":
+        """Add a system message, pinned unless it belongs to the current turn."""
+        message = Message(role=MessageRole.SYSTEM, content=content)
+        return self.pin(message) if pinned else self.add(message)
+
+    def add_user(self, content: str) -> "ContextWindow":
+        """Add a user message, starting a new turn."""
+        return self.add_message(MessageRole.USER, content)
+
+    def add_assistant(self, content: str) -> "ContextWindow":
+        """Add an assistant message to the current turn."""
+        return self.add_message(MessageRole.ASSISTANT, content)
+
+    def truncate(self) -> List[Message]:
+        """
+        Drop the oldest turns until the conversation fits the budget.
+
+        Returns:
+            The dropped messages.
+
+        Raises:
+            ContextBudgetError: If the conversation still does not fit.
+        """
+        dropped = self._drop_until(self.budget.limit)
+        self._check()
+        return dropped
+
+    @traced("context.fit")
+    async def fit(self) -> List[Message]:
+        """
+        Fit the conversation into the budget, summarizing dropped turns.
+
+        Without a summarizer on the budget, this is the same as ``truncate``.
+
+        Returns:
+            The dropped messages.
+
+        Raises:
+            ContextBudgetError: If the conversation still does not fit.
+        """
+        budget = self.budget
+        if budget.summarizer is None or self._total <= budget.limit:
+            return self.truncate()
+
+        # Leave room for the summary that replaces the dropped turns
+        summary_tokens = self.budget.count_message(self._summary) if self._summary else 0
+        dropped = self._drop_until(budget.limit - budget.summary_tokens + summary_tokens)
+        if dropped:
+            summarized = ([self._summary] if self._summary is not None else []) + dropped
+            text = budget.summarizer(summarized)
+            if inspect.isawaitable(text):
+                text = await text
+            self._set_summary(
+                Message(role=MessageRole.SYSTEM, content=text, name=SUMMARY_NAME)
+            )
+            counter("context.summarized", messages=len(summarized))
+
+        # A summary longer than the room left for it is dropped as well
+        if self._total > budget.limit and self._summary is not None:
+            self._set_summary(None)
+        self._check()
+        return dropped
+
+    def to_prompt(self) -> Prompt:
+        """
+        Build the prompt to send.
+
+        Returns:
+            The pinned messages, the summary and the remaining turns.
+        """
+        messages = list(self._pinned)
+        if self._summary is not None:
+            messages.append(self._summary)
+        for turn in self._turns:
+            messages.extend(turn.messages)
+        return Prompt(messages=messages, metadata=self.metadata, parameters=self.parameters)
+
+    def _drop_until(self, limit: int) -> List[Message]:
+        """Drop the oldest turns until the total is within a limit."""
+        dropped: List[Message] = []
+        while self._total > limit and len(self._turns) > self.budget.min_recent_turns:
+            turn = self._turns.popleft()
+            self._total -= turn.tokens
+            dropped.extend(turn.messages)
+        if dropped:
+            self.dropped_messages += len(dropped)
+            counter("context.dropped", messages=len(dropped))
+        return dropped
+
+    def _set_summary(self, message: Optional[Message]) -> None:
+        if self._summary is not None:
+            self._total -= self.budget.count_message(self._summary)
+        self._summary = message
+        if message is not None:
+            self._total += self.budget.count_message(message)
+
+    def _check(self) -> None:
+        if self._total > self.budget.limit:
+            raise ContextBudgetError(
+                f"Prompt needs {self._total} tokens after dropping old turns, "
+                f"but the budget is {self.budget.limit}"
+            )
+
+
+class ProviderSummarizer:
+    """
+    Summarizes dropped turns with an LLM provider.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        instructions: str = (
+            "Summarize the conversation below in a few sentences. Keep names, facts, "
+            "decisions and open questions; leave out small talk."
+        ),
+    ):
+        """
+        Initialize the summarizer.
+
+        Args:
+            provider: The provider that writes the summaries.
+            instructions: The system message sent with the turns.
+        """
+        self.provider = provider
+        self.instructions = instructions
+
+    async def __call__(self, messages: List[Message]) -> str:
+        transcript = "\n".join(
+            f"{'summary so far' if m.name == SUMMARY_NAME else m.role.value}: {m.content}"
+            for m in messages
+        )
+        prompt = PromptBuilder().add_system(self.instructions).add_user(transcript).build()
+        response = await self.provider.generate(prompt)
+        return response.text.strip()
+
+    def __repr__(self) -> str:
+        return f"ProviderSummarizer({self.provider.__class__.__name__})"
@@ -2,64 +2,140 @@
 Database storage for prompts using Tortoise ORM.
 """
 
-import json
+import asyncio
+import importlib
+import itertools
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Type, Union
-
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
+
+import tortoise
+from pydantic import BaseModel
 from tortoise import Tortoise, fields, models
-from tortoise.contrib.pydantic import pydantic_model_creator
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.backends.base.schema_generator import BaseSchemaGenerator
+from tortoise.backends.base.config_generator import expand_db_url
+from tortoise.expressions import F
 
+from evoluteprompt.core.blobs import message_hash, shared_blob_cache
+from evoluteprompt.core.diff import PromptDiff, diff_prompts, versions_in_range
 from evoluteprompt.core.prompt import Prompt
 from evoluteprompt.core.types import PromptCategory, PromptMetadata, PromptParameters, PromptStats
+from evoluteprompt.core.usage import UsageRecord, UsageSummary, UsageWindow
+from evoluteprompt.utils.histogram import LatencyHistogram
+from evoluteprompt.utils.instrumentation import traced
 
 
-class BaseModel(models.Model):
-    """Base model with common fields."""
+_POSTGRES_ENGINES = ("tortoise.backends.asyncpg", "tortoise.backends.psycopg")
 
-    id = fields.IntField(primary_key=True)
-    created_at = fields.DatetimeField(auto_now_add=True)
-    updated_at = fields.DatetimeField(auto_now=True)
 
-    class Meta:
-        abstract = True
+class DatabaseConfig(BaseModel):
+    """
+    Connection settings for DBPromptRepo.
 
+    Pool sizes and the statement timeout apply to Postgres and MySQL. The
+    ``sqlite_*`` settings are issued as PRAGMAs when a SQLite connection is
+    opened; for SQLite the statement timeout becomes ``busy_timeout``.
+    """
 
-class Prompt(BaseModel):
-    """Model for storing prompts."""
+    db_url: str = "sqlite://db.sqlite3"
+    min_pool_size: Optional[int] = None
+    max_pool_size: Optional[int] = None
+    statement_timeout_ms: Optional[int] = None
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64 * 1024  # Negative values are KiB
 
-    name = fields.CharField(max_length=255)
-    version = fields.CharField(max_length=50)
-    description = fields.TextField(null=True)
-    template = fields.TextField()
-    variables = fields.JSONField(default=dict)
-    metadata = fields.JSONField(default=dict)
-    tags = fields.JSONField(default=list)
+    def to_tortoise(self) -> Dict[str, Any]:
+        """
+        Build a Tortoise connection definition for this configuration.
 
-    class Meta:
-        table = "prompts"
-        unique_together = [("name", "version")]
+        Returns:
+            A dictionary with ``engine`` and ``credentials`` keys.
+        """
+        info = expand_db_url(self.db_url)
+        engine = info["engine"]
+        credentials = info["credentials"]
+
+        if engine == "tortoise.backends.sqlite":
+            credentials.update(
+                journal_mode=self.sqlite_journal_mode,
+                synchronous=self.sqlite_synchronous,
+                mmap_size=self.sqlite_mmap_size,
+                cache_size=self.sqlite_cache_size,
+            )
+            if self.statement_timeout_ms is not None:
+                credentials["busy_timeout"] = self.statement_timeout_ms
+            return info
 
+        if self.min_pool_size is not None:
+            credentials["minsize"] = self.min_pool_size
+        if self.max_pool_size is not None:
+            credentials["maxsize"] = self.max_pool_size
 
-class PromptStats(BaseModel):
-    """Model for storing prompt usage statistics."""
+        if self.statement_timeout_ms is not None:
+            if engine in _POSTGRES_ENGINES:
+                server_settings = dict(credentials.get("server_settings") or {})
+                server_settings["statement_timeout"] = str(self.statement_timeout_ms)
+                credentials["server_settings"] = server_settings
+            elif engine == "tortoise.backends.mysql":
+                credentials["init_command"] = (
+                    f"SET SESSION max_execution_time={self.statement_timeout_ms}"
+                )
 
-    prompt = fields.ForeignKeyField(
-        "models.Prompt",
-        related_name="stats",
-        on_delete=fields.CASCADE)
-    total_uses = fields.IntField(default=0)
-    successful_uses = fields.IntField(default=0)
-    failed_uses = fields.IntField(default=0)
-    last_used = fields.DatetimeField(null=True)
+        return info
 
-    class Meta:
-        table = "prompt_stats"
 
+def _prompt_columns(prompt: Prompt) -> Dict[str, Any]:
+    """
+    Serialize a prompt into PromptModel column values.
+
+    A single ``model_dump(mode="json")`` call produces fresh, JSON-safe
+    structures, so no further copying is needed before they are stored.
 
-# Create Pydantic models
-PromptInDB = pydantic_model_creator(
-    Prompt, name="PromptInDB", exclude=(
-        "created_at", "updated_at"))
+    Args:
+        prompt: The prompt to serialize.
+
+    Returns:
+        A dictionary of column names to values.
+    """
+    data = prompt.model_dump(mode="json")
+    metadata = data["metadata"] or {}
+
+    return {
+        "messages": data["messages"],
+        "metadata_json": metadata,
+        "parameters_json": data["parameters"] or {},
+        "stats_json": data["stats"] or {},
+        "category": metadata.get("category"),
+        "is_active": metadata.get("is_active", False),
+        "is_fallback": metadata.get("is_fallback", False),
+        "fallback_for": metadata.get("fallback_for"),
+        "priority": metadata.get("priority", 0),
+    }
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO timestamp stored in prompt stats, ignoring invalid ones."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
 
 
 class PromptModel(models.Model):
@@ -69,7 +145,8 @@ class PromptModel(models.Model):
     name = fields.CharField(max_length=255, db_index=True)
     version = fields.CharField(max_length=50, db_index=True)
 
-    # JSON encoded data
+    # JSON encoded data. With message deduplication, messages holds a list of
+    # MessageBlob hashes instead of the messages themselves.
     messages = fields.JSONField()
     metadata_json = fields.JSONField(default={})
     parameters_json = fields.JSONField(default={})
@@ -82,6 +159,11 @@ class PromptModel(models.Model):
     fallback_for = fields.CharField(max_length=255, null=True, db_index=True)
     priority = fields.IntField(default=0)
 
+    # Usage counters, updated in place with atomic increments
+    success_count = fields.IntField(default=0)
+    failure_count = fields.IntField(default=0)
+    last_used: Optional[datetime] = fields.DatetimeField(null=True)
+
     # Timestamps
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
@@ -89,6 +171,7 @@ class PromptModel(models.Model):
     class Meta:
         table = "prompts"
         unique_together = (("name", "version"),)
+        indexes = (("category", "is_active", "priority"),)
 
     @property
     def metadata(self) -> PromptMetadata:
@@ -106,17 +189,78 @@ class PromptModel(models.Model):
     @property
     def stats(self) -> Optional[PromptStats]:
         """Get the prompt stats as a Pydantic model."""
-        if not self.stats_json:
+        data = self._stats_data()
+        if data is None:
             return None
-        return PromptStats(**self.stats_json)
-
-    def to_prompt(self) -> Prompt:
-        """Convert the database model to a Prompt object."""
-        return Prompt(
-            messages=self.messages,
-            metadata=self.metadata,
-            parameters=self.parameters,
-            stats=self.stats,
+        return PromptStats(**data)
+
+    def _stats_data(self) -> Optional[Dict[str, Any]]:
+        """Merge the stored stats with the usage counter columns."""
+        if not self.stats_json and not self.success_count and not self.failure_count:
+            return None
+
+        return {
+            **self.stats_json,
+            "success_count": self.success_count,
+            "failure_count": self.failure_count,
+            "last_used": self.last_used.isoformat() if self.last_used else None,
+        }
+
+    @property
+    def has_message_refs(self) -> bool:
+        """Whether the messages are stored as blob hashes."""
+        return bool(self.messages) and isinstance(self.messages[0], str)
+
+    def to_prompt(self, blobs: Optional[Mapping[str, Dict[str, Any]]] = None) -> Prompt:
+        """
+        Convert the database model to a Prompt object.
+
+        The metadata's name and version are taken from the row's columns, so
+        rows written before the repository stored them in the metadata still
+        load with both set.
+
+        The stored JSON is handed to Pydantic in a single ``model_validate``
+        call instead of building each nested model separately. On
+        pydantic-core this is faster than ``model_construct``, which runs its
+        field loop in Python.
+
+        Args:
+            blobs: Message blobs by hash, required if the messages are stored
+                by reference.
+
+        Returns:
+            The prompt.
+
+        Raises:
+            ValueError: If the messages are references and ``blobs`` is
+                missing or lacks one of them.
+        """
+        messages = self.messages
+        if self.has_message_refs:
+            if blobs is None:
+                raise ValueError(
+                    f"Prompt '{self.name}' stores message references; "
+                    "load it through DBPromptRepo"
+                )
+            missing = [blob_hash for blob_hash in messages if blob_hash not in blobs]
+            if missing:
+                raise ValueError(
+                    f"Prompt '{self.name}' version '{self.version}' references missing "
+                    f"message blobs: {', '.join(missing)}"
+                )
+            messages = [blobs[blob_hash] for blob_hash in messages]
+
+        return Prompt.model_validate(
+            {
+                "messages": messages,
+                "metadata": {
+                    **(self.metadata_json or {}),
+                    "name": self.name,
+                    "version": self.version,
+                },
+                "parameters": self.parameters_json or None,
+                "stats": self._stats_data(),
+            }
         )
 
     @classmethod
@@ -126,60 +270,364 @@ class PromptModel(models.Model):
             version: str,
             prompt: Prompt) -> "PromptModel":
         """Convert a Prompt object to a database model."""
-        # Extract metadata fields for indexing
-        metadata_dict = prompt.metadata.dict() if prompt.metadata else {}
-        category = metadata_dict.get("category")
-        is_active = metadata_dict.get("is_active", False)
-        is_fallback = metadata_dict.get("is_fallback", False)
-        fallback_for = metadata_dict.get("fallback_for")
-        priority = metadata_dict.get("priority", 0)
-
-        return cls(
-            name=name,
-            version=version,
-            messages=json.loads(json.dumps([m.dict() for m in prompt.messages])),
-            metadata_json=json.loads(json.dumps(metadata_dict)) if prompt.metadata else {},
-            parameters_json=(
-                json.loads(json.dumps(prompt.parameters.dict())) if prompt.parameters else {}
-            ),
-            stats_json=json.loads(json.dumps(prompt.stats.dict())) if prompt.stats else {},
-            category=category,
-            is_active=is_active,
-            is_fallback=is_fallback,
-            fallback_for=fallback_for,
-            priority=priority,
+        model = cls(name=name, version=version, **_prompt_columns(prompt))
+
+        # Counters are only seeded on creation; saving a prompt again must not
+        # overwrite increments recorded since it was loaded.
+        if prompt.stats is not None:
+            model.success_count = prompt.stats.success_count
+            model.failure_count = prompt.stats.failure_count
+            model.last_used = _parse_datetime(prompt.stats.last_used)
+
+        return model
+
+
+class MessageBlob(models.Model):
+    """A message stored once and referenced by hash from prompt versions."""
+
+    hash = fields.CharField(max_length=64, primary_key=True)
+    content: Dict[str, Any] = fields.JSONField()
+
+    class Meta:
+        table = "message_blobs"
+
+
+_APP_LABEL = "models"
+_K = TypeVar("_K")
+_connection_ids = itertools.count(1)
+_registration_lock = asyncio.Lock()
+
+
+class PromptRevision(models.Model):
+    """
+    Change feed of prompt writes.
+
+    Every write through ``DBPromptRepo`` appends a row, so the auto-increment
+    id is a database-wide revision number that other processes can poll.
+
+    Rows are never removed by the repository, so the table grows by one row
+    per write. Old rows can be deleted once every watcher has seen them; keep
+    the newest row, as some databases reuse ids after the highest is deleted.
+    """
+
+    id = fields.IntField(primary_key=True)
+    name = fields.CharField(max_length=255)
+    version = fields.CharField(max_length=50, null=True)
+    action = fields.CharField(max_length=20)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        table = "prompt_revisions"
+
+
+class PromptUsage(models.Model):
+    """
+    Latency, token and cost totals of one prompt version and model.
+
+    ``StatsAggregator`` appends one row per (prompt, version, model) per
+    flush, so concurrent writers never contend for a row. Latencies are kept
+    as a serialized ``LatencyHistogram``, which merges across rows.
+    """
+
+    id = fields.IntField(primary_key=True)
+    name = fields.CharField(max_length=255)
+    version = fields.CharField(max_length=50)
+    model = fields.CharField(max_length=255, default="")
+    window_start = fields.DatetimeField()
+    window_end = fields.DatetimeField()
+    requests = fields.IntField(default=0)
+    failures = fields.IntField(default=0)
+    prompt_tokens = fields.BigIntField(default=0)
+    cached_tokens = fields.BigIntField(default=0)
+    completion_tokens = fields.BigIntField(default=0)
+    cost = fields.FloatField(default=0)
+    latency: Dict[str, Any] = fields.JSONField(default={})
+
+    class Meta:
+        table = "prompt_usage"
+        indexes = (("name", "version", "window_start"),)
+
+
+# The tables created by _generate_schema, in dependency order
+_MODELS: Tuple[Type[models.Model], ...] = (PromptModel, MessageBlob, PromptRevision, PromptUsage)
+
+
+class PromptChange(BaseModel):
+    """A single entry of the prompt change feed."""
+
+    revision: int
+    name: str
+    version: Optional[str] = None
+    action: str
+    created_at: datetime
+
+
+async def _register_models(config: DatabaseConfig) -> None:
+    """
+    Register the prompt models with Tortoise once per process.
+
+    Tortoise binds a model's SQL dialect to a default connection, so the first
+    repository's configuration is registered under its own alias for that
+    purpose. Repositories never query through it; each one runs every query on
+    its own client via ``using_db``. Repositories sharing a process should
+    therefore use the same database backend.
+    """
+    async with _registration_lock:
+        if PromptModel._meta.default_connection is not None:
+            return
+
+        if Tortoise.apps:
+            raise RuntimeError(
+                "Tortoise ORM is already initialized without the EvolutePrompt models. "
+                f"Add '{__name__}' to the models of your Tortoise config."
+            )
+
+        await Tortoise.init(
+            config={
+                "connections": {"evoluteprompt": config.to_tortoise()},
+                "apps": {
+                    _APP_LABEL: {
+                        "models": [__name__],
+                        "default_connection": "evoluteprompt",
+                    }
+                },
+            }
         )
 
 
+async def _table_columns(client: BaseDBAsyncClient, table: str) -> List[str]:
+    """List the columns of a table, or nothing if it does not exist yet."""
+    dialect = client.capabilities.dialect
+    if dialect == "sqlite":
+        rows = await client.execute_query_dict(f'PRAGMA table_info("{table}")')
+    else:
+        schema = "current_schema()" if dialect == "postgres" else "DATABASE()"
+        rows = await client.execute_query_dict(
+            "SELECT column_name AS name FROM information_schema.columns "
+            f"WHERE table_schema = {schema} AND table_name = '{table}'"
+        )
+    return [row["name"] for row in rows]
+
+
+def _column_sql(field: fields.Field, dialect: str) -> str:
+    """Build the definition of a column added to an existing table."""
+    sql_type = field.get_for_dialect(dialect, "SQL_TYPE")
+    if field.null:
+        return sql_type
+    if isinstance(field.default, bool) or not isinstance(field.default, (int, float)):
+        raise RuntimeError(
+            f"Cannot add column '{field.source_field or field.model_field_name}' to an "
+            "existing table; add it with a migration"
+        )
+    return f"{sql_type} NOT NULL DEFAULT {field.default}"
+
+
+async def _upgrade_schema(client: BaseDBAsyncClient) -> List[Type[models.Model]]:
+    """
+    Add the columns that newer versions of the models define to existing tables.
+
+    Schema generation only creates missing tables, so tables created by an
+    earlier version would otherwise lack them. Running this again is a no-op.
+
+    Returns:
+        The models whose tables already existed.
+    """
+    dialect = client.capabilities.dialect
+    quote = "`" if dialect == "mysql" else '"'
+    existing = []
+    for model in _MODELS:
+        table = model._meta.db_table
+        columns = set(await _table_columns(client, table))
+        if not columns:
+            continue
+        existing.append(model)
+
+        added = []
+        for field_name, column in model._meta.fields_db_projection.items():
+            if column not in columns:
+                field = model._meta.fields_map[field_name]
+                await client.execute_script(
+                    f"ALTER TABLE {quote}{table}{quote} "
+                    f"ADD COLUMN {quote}{column}{quote} {_column_sql(field, dialect)}"
+                )
+                added.append(column)
+
+        if model is PromptModel and "success_count" in added:
+            await _backfill_counters(client)
+    return existing
+
+
+async def _backfill_counters(client: BaseDBAsyncClient) -> None:
+    """Copy the counters kept in stats_json into the newly added counter columns."""
+    rows = await PromptModel.all().using_db(client).values_list("id", "stats_json")
+    for row_id, stats in rows:
+        stats = stats or {}
+        if stats.get("success_count") or stats.get("failure_count") or stats.get("last_used"):
+            await PromptModel.filter(id=row_id).using_db(client).update(
+                success_count=stats.get("success_count") or 0,
+                failure_count=stats.get("failure_count") or 0,
+                last_used=_parse_datetime(stats.get("last_used")),
+            )
+
+
+async def _add_missing_indexes(
+    client: BaseDBAsyncClient, generator: BaseSchemaGenerator, existing: List[Type[models.Model]]
+) -> None:
+    """
+    Create the composite indexes of tables that existed before they were declared.
+
+    SQLite and Postgres get them from the schema script, which creates indexes
+    with IF NOT EXISTS; MySQL declares indexes inside CREATE TABLE instead.
+    """
+    for model in existing:
+        table = model._meta.db_table
+        rows = await client.execute_query_dict(
+            "SELECT index_name AS name FROM information_schema.statistics "
+            f"WHERE table_schema = DATABASE() AND table_name = '{table}'"
+        )
+        names = {row["name"] for row in rows}
+        for index in model._meta.indexes:
+            if not isinstance(index, tuple):
+                continue  # Only plain column tuples are declared here
+            columns = [model._meta.fields_map[name].source_field or name for name in index]
+            index_name = generator._get_index_name("idx", model, columns)
+            if index_name not in names:
+                column_sql = ", ".join(f"`{column}`" for column in columns)
+                await client.execute_script(
+                    f"CREATE INDEX `{index_name}` ON `{table}` ({column_sql})"
+                )
+
+
+_generator_classes: Dict[type, type] = {}
+
+
+def _schema_generator(client: BaseDBAsyncClient) -> BaseSchemaGenerator:
+    """
+    Build a schema generator for the EvolutePrompt models on the given client.
+
+    The stock generator only picks models whose default connection is the
+    client; repositories use their own clients, so a subclass lists the models
+    directly. It overrides the private ``_get_models_to_create``, tested with
+    tortoise-orm 0.24; setup.py and pyproject.toml keep the dependency below 0.25.
+
+    Raises:
+        RuntimeError: If the installed Tortoise no longer has the hook.
+    """
+    base = client.schema_generator
+    if not callable(getattr(base, "_get_models_to_create", None)):
+        raise RuntimeError(
+            f"tortoise-orm {tortoise.__version__} is not supported: its schema generator "
+            "has no _get_models_to_create. Install tortoise-orm>=0.24.2,<0.25."
+        )
+
+    generator_class = _generator_classes.get(base)
+    if generator_class is None:
+
+        class _Generator(base):  # type: ignore[valid-type, misc]
+            def _get_models_to_create(self) -> List[Type[models.Model]]:
+                return list(_MODELS)
+
+        generator_class = _generator_classes[base] = _Generator
+    return cast(BaseSchemaGenerator, generator_class(client))
+
+
+async def _generate_schema(client: BaseDBAsyncClient) -> None:
+    """Create any missing EvolutePrompt tables, columns and indexes on the given client."""
+    generator = _schema_generator(client)
+
+    # Columns first, so that the script's indexes can refer to new columns
+    existing = await _upgrade_schema(client)
+    await generator.generate_from_string(generator.get_create_schema_sql(safe=True))
+    if client.capabilities.dialect == "mysql":
+        await _add_missing_indexes(client, generator, existing)
+
+
 class DBPromptRepo:
     """
     A repository for managing and versioning prompts using a database.
     """
 
-    def __init__(self, db_url: str = "sqlite://db.sqlite3"):
+    def __init__(
+        self,
+        db_url: str = "sqlite://db.sqlite3",
+        config: Optional[DatabaseConfig] = None,
+        connection_name: Optional[str] = None,
+        generate_schemas: bool = True,
+        dedupe_messages: bool = False,
+    ):
         """
         Initialize a database prompt repository.
 
         Args:
             db_url: Database URL. Defaults to SQLite.
+            config: Connection settings (pool sizes, timeouts, SQLite pragmas).
+                If given, its ``db_url`` takes precedence over ``db_url``.
+            connection_name: Name of this repository's connection. Defaults to
+                a unique name, so several repositories (or tenants) can
+                coexist in one process.
+            generate_schemas: Create missing tables on startup. Disable this in
+                production deployments that manage the schema with migrations.
+            dedupe_messages: Store each distinct message once in a blob table
+                and save versions as lists of message hashes. Prompts saved
+                either way can always be read.
         """
-        self.db_url = db_url
-        self._is_initialized = False
+        self.config = config or DatabaseConfig(db_url=db_url)
+        self.db_url = self.config.db_url
+        self.connection_name = connection_name or f"evoluteprompt_{next(_connection_ids)}"
+        self.generate_schemas = generate_schemas
+        self.dedupe_messages = dedupe_messages
+        self._client: Optional[BaseDBAsyncClient] = None
+        self._init_lock = asyncio.Lock()
+        # Bumped on every local write, and by RevisionWatcher on remote ones,
+        # so in-process snapshots know when to refresh
+        self.epoch = 0
+
+    async def __aenter__(self) -> "DBPromptRepo":
+        await self.init()
+        return self
 
-    async def init(self):
-        """Initialize the database connection."""
-        if not self._is_initialized:
-            await Tortoise.init(
-                db_url=self.db_url, modules={"models": ["evoluteprompt.core.database"]}
-            )
-            await Tortoise.generate_schemas()
-            self._is_initialized = True
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def init(self) -> BaseDBAsyncClient:
+        """
+        Open this repository's connection.
 
-    async def close(self):
-        """Close the database connection."""
-        await Tortoise.close_connections()
-        self._is_initialized = False
+        Safe to call concurrently and repeatedly: the first caller connects
+        (and generates the schema if enabled) while the others wait for it.
+        Repository methods call this lazily, but calling it once at startup
+        keeps connection errors out of the request path.
 
+        Returns:
+            The database client used by this repository.
+        """
+        if self._client is not None:
+            return self._client
+
+        async with self._init_lock:
+            if self._client is None:
+                await _register_models(self.config)
+
+                info = self.config.to_tortoise()
+                client_class = importlib.import_module(info["engine"]).client_class
+                client = client_class(connection_name=self.connection_name, **info["credentials"])
+                await client.create_connection(with_db=True)
+
+                if self.generate_schemas:
+                    await _generate_schema(client)
+
+                self._client = client
+
+        return self._client
+
+    async def close(self) -> None:
+        """Close this repository's connection. Other repositories are not affected."""
+        async with self._init_lock:
+            if self._client is not None:
+                await self._client.close()
+                self._client = None
+
+    @traced("repo.save_prompt", attribute="prompt_name")
     async def save_prompt(
         self,
         prompt_name: str,
@@ -199,7 +647,7 @@ class DBPromptRepo:
         Returns:
             The version of the saved prompt.
         """
-        await self.init()
+        db = self._client or await self.init()
 
         # If no version specified, get the next version
         if version is None:
@@ -207,9 +655,10 @@ class DBPromptRepo:
 
         # Update the prompt metadata
         if prompt.metadata is None:
-            prompt.metadata = PromptMetadata(version=version)
+            prompt.metadata = PromptMetadata(version=version, name=prompt_name)
         else:
             prompt.metadata.version = version
+            prompt.metadata.name = prompt_name
 
         if prompt.metadata.created_at is None:
             prompt.metadata.created_at = datetime.now().isoformat()
@@ -217,41 +666,90 @@ class DBPromptRepo:
         prompt.metadata.updated_at = datetime.now().isoformat()
 
         # Create or update the prompt in the database
-        prompt_model = await PromptModel.filter(name=prompt_name, version=version).first()
+        prompt_model = (
+            await PromptModel.filter(name=prompt_name, version=version).using_db(db).first()
+        )
+        columns = _prompt_columns(prompt)
+        if self.dedupe_messages:
+            columns["messages"] = await self._store_blobs(db, columns["messages"])
+
         if prompt_model:
             # Update existing prompt
-            prompt_model.messages = json.loads(
-                json.dumps([m.dict() for m in prompt.messages]))
-            prompt_model.metadata_json = (
-                json.loads(
-                    json.dumps(
-                        prompt.metadata.dict())) if prompt.metadata else {})
-            prompt_model.parameters_json = (
-                json.loads(
-                    json.dumps(
-                        prompt.parameters.dict())) if prompt.parameters else {})
-            prompt_model.stats_json = (
-                json.loads(
-                    json.dumps(
-                        prompt.stats.dict())) if prompt.stats else {})
-
-            # Update indexable fields
-            metadata_dict = prompt.metadata.dict() if prompt.metadata else {}
-            prompt_model.category = metadata_dict.get("category")
-            prompt_model.is_active = metadata_dict.get("is_active", False)
-            prompt_model.is_fallback = metadata_dict.get("is_fallback", False)
-            prompt_model.fallback_for = metadata_dict.get("fallback_for")
-            prompt_model.priority = metadata_dict.get("priority", 0)
-
-            await prompt_model.save()
+            prompt_model.update_from_dict(columns)
+            await prompt_model.save(using_db=db)
         else:
             # Create new prompt
             prompt_model = PromptModel.from_prompt(
                 prompt_name, version, prompt)
-            await prompt_model.save()
+            prompt_model.messages = columns["messages"]
+            await prompt_model.save(using_db=db)
 
+        await self._record_change(db, prompt_name, version, "save")
         return version
 
+    async def _store_blobs(
+        self, db: BaseDBAsyncClient, messages: List[Dict[str, Any]]
+    ) -> List[str]:
+        """Store any new message blobs and return the hashes of ``messages``."""
+        hashes = [message_hash(message) for message in messages]
+        blobs = dict(zip(hashes, messages))
+
+        existing = set(
+            await MessageBlob.filter(hash__in=list(blobs))
+            .using_db(db)
+            .values_list("hash", flat=True)
+        )
+        missing = [
+            MessageBlob(hash=blob_hash, content=blob)
+            for blob_hash, blob in blobs.items()
+            if blob_hash not in existing
+        ]
+        if missing:
+            # Another writer may store the same blob concurrently
+            await MessageBlob.bulk_create(missing, ignore_conflicts=True, using_db=db)
+
+        for blob_hash, blob in blobs.items():
+            shared_blob_cache.put(blob_hash, blob)
+
+        return hashes
+
+    async def _load_prompts(
+        self, db: BaseDBAsyncClient, prompt_models: Mapping[_K, PromptModel]
+    ) -> Dict[_K, Prompt]:
+        """
+        Convert rows to prompts, resolving message references.
+
+        Blobs are taken from the shared cache where possible; the rest are
+        fetched in one query.
+        """
+        refs = {
+            blob_hash
+            for prompt_model in prompt_models.values()
+            if prompt_model.has_message_refs
+            for blob_hash in prompt_model.messages
+        }
+
+        blobs = None
+        if refs:
+            blobs = shared_blob_cache.get_many(refs)
+            missing = refs - blobs.keys()
+            if missing:
+                rows = (
+                    await MessageBlob.filter(hash__in=list(missing))
+                    .using_db(db)
+                    .values_list("hash", "content")
+                )
+                for blob_hash, blob in rows:
+                    shared_blob_cache.put(blob_hash, blob)
+                    blobs[blob_hash] = blob
+
+        return {key: prompt_model.to_prompt(blobs) for key, prompt_model in prompt_models.items()}
+
+    async def _load_prompt(self, db: BaseDBAsyncClient, prompt_model: PromptModel) -> Prompt:
+        """Convert a single row to a prompt, resolving message references."""
+        return (await self._load_prompts(db, {None: prompt_model}))[None]
+
+    @traced("repo.get_prompt", attribute="prompt_name")
     async def get_prompt(
             self,
             prompt_name: str,
@@ -266,7 +764,7 @@ class DBPromptRepo:
         Returns:
             The prompt, or None if not found.
         """
-        await self.init()
+        db = self._client or await self.init()
 
         # If no version specified, get the latest version
         if version is None:
@@ -275,12 +773,15 @@ class DBPromptRepo:
                 return None
 
         # Get the prompt from the database
-        prompt_model = await PromptModel.filter(name=prompt_name, version=version).first()
+        prompt_model = (
+            await PromptModel.filter(name=prompt_name, version=version).using_db(db).first()
+        )
         if prompt_model is None:
             return None
 
-        return prompt_model.to_prompt()
+        return await self._load_prompt(db, prompt_model)
 
+    @traced("repo.get_active_prompt", attribute="prompt_name")
     async def get_active_prompt(self, prompt_name: str) -> Optional[Prompt]:
         """
         Get the active prompt for the given name.
@@ -291,17 +792,141 @@ class DBPromptRepo:
         Returns:
             The active prompt, or None if not found.
         """
-        await self.init()
+        db = self._client or await self.init()
+
+        prompt_model = (
+            await PromptModel.filter(name=prompt_name, is_active=True)
+            .using_db(db)
+            .order_by("-priority")
+            .first()
+        )
+
+        if prompt_model is None:
+            return None
+
+        return await self._load_prompt(db, prompt_model)
+
+    @traced("repo.get_active_prompts")
+    async def get_active_prompts(self, prompt_names: Iterable[str]) -> Dict[str, Prompt]:
+        """
+        Get the active prompts for several names in one query.
+
+        Args:
+            prompt_names: The names of the prompts.
+
+        Returns:
+            A mapping from name to active prompt. Names without an active
+            prompt are omitted.
+        """
+        db = self._client or await self.init()
+
+        prompt_models = (
+            await PromptModel.filter(name__in=list(prompt_names), is_active=True)
+            .using_db(db)
+            .order_by("-priority")
+        )
+
+        chosen: Dict[str, PromptModel] = {}
+        for prompt_model in prompt_models:
+            chosen.setdefault(prompt_model.name, prompt_model)
+
+        return await self._load_prompts(db, chosen)
+
+    @traced("repo.get_latest_prompts")
+    async def get_latest_prompts(self, prompt_names: Iterable[str]) -> Dict[str, Prompt]:
+        """
+        Get the latest version of several prompts.
+
+        Versions are compared the same way as in ``get_latest_version``. Only
+        the chosen rows are loaded in full.
+
+        Args:
+            prompt_names: The names of the prompts.
+
+        Returns:
+            A mapping from name to latest prompt. Unknown names are omitted.
+        """
+        db = self._client or await self.init()
+
+        rows = (
+            await PromptModel.filter(name__in=list(prompt_names))
+            .using_db(db)
+            .values("id", "name", "version")
+        )
+
+        latest: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            current = latest.get(row["name"])
+            if current is None or row["version"] > current["version"]:
+                latest[row["name"]] = row
+
+        if not latest:
+            return {}
+
+        prompt_models = await PromptModel.filter(
+            id__in=[row["id"] for row in latest.values()]
+        ).using_db(db)
+        return await self._load_prompts(
+            db, {prompt_model.name: prompt_model for prompt_model in prompt_models}
+        )
+
+    @traced("repo.get_fallback_prompts")
+    async def get_fallback_prompts(self, prompt_names: Iterable[str]) -> Dict[str, Prompt]:
+        """
+        Get the fallback prompts for several names in one query.
+
+        Args:
+            prompt_names: The names of the prompts to find fallbacks for.
+
+        Returns:
+            A mapping from name to fallback prompt. Names without a fallback
+            are omitted.
+        """
+        db = self._client or await self.init()
+
+        prompt_models = (
+            await PromptModel.filter(fallback_for__in=list(prompt_names), is_fallback=True)
+            .using_db(db)
+            .order_by("-priority")
+        )
+
+        chosen: Dict[str, PromptModel] = {}
+        for prompt_model in prompt_models:
+            chosen.setdefault(prompt_model.fallback_for, prompt_model)
+
+        return await self._load_prompts(db, chosen)
+
+    @traced("repo.get_active_prompt_in_category", attribute="category")
+    async def get_active_prompt_in_category(
+            self, category: PromptCategory) -> Optional[Prompt]:
+        """
+        Get the highest-priority active prompt in a category.
+
+        This is a single query served by the (category, is_active, priority)
+        index, so its cost does not grow with the number of prompts in the
+        category.
+
+        Args:
+            category: The category to search.
+
+        Returns:
+            The active prompt with the highest priority, or None if not found.
+        """
+        db = self._client or await self.init()
 
         prompt_model = (
-            await PromptModel.filter(name=prompt_name, is_active=True).order_by("-priority").first()
+            await PromptModel.filter(category=category, is_active=True)
+            .using_db(db)
+            .order_by("-priority", "-id")
+            .first()
         )
 
         if prompt_model is None:
             return None
 
-        return prompt_model.to_prompt()
+        return await self._load_prompt(db, prompt_model)
 
+    @traced("repo.get_fallback_prompt", attribute="prompt_name")
     async def get_fallback_prompt(self, prompt_name: str) -> Optional[Prompt]:
         """
         Get the fallback prompt for the given name.
@@ -312,10 +937,11 @@ class DBPromptRepo:
         Returns:
             The fallback prompt, or None if not found.
         """
-        await self.init()
+        db = self._client or await self.init()
 
         prompt_model = (
             await PromptModel.filter(fallback_for=prompt_name, is_fallback=True)
+            .using_db(db)
             .order_by("-priority")
             .first()
         )
@@ -323,7 +949,7 @@ class DBPromptRepo:
         if prompt_model is None:
             return None
 
-        return prompt_model.to_prompt()
+        return await self._load_prompt(db, prompt_model)
 
     async def list_prompts(
             self,
@@ -337,9 +963,9 @@ class DBPromptRepo:
         Returns:
             A list of prompt names.
         """
-        await self.init()
+        db = self._client or await self.init()
 
-        query = PromptModel.all()
+        query = PromptModel.all().using_db(db)
         if category:
             query = query.filter(category=category)
 
@@ -356,13 +982,96 @@ class DBPromptRepo:
         Returns:
             A list of versions.
         """
-        await self.init()
+        db = self._client or await self.init()
 
         prompt_models = (
-            await PromptModel.filter(name=prompt_name).order_by("version").values("version")
+            await PromptModel.filter(name=prompt_name)
+            .using_db(db)
+            .order_by("version")
+            .values("version")
         )
         return [p["version"] for p in prompt_models]
 
+    async def compare_versions(
+            self,
+            prompt_name: str,
+            version1: str,
+            version2: str) -> Optional[Dict[str, Any]]:
+        """
+        Compare two versions of a prompt.
+
+        Args:
+            prompt_name: The name of the prompt.
+            version1: First version.
+            version2: Second version.
+
+        Returns:
+            A dictionary with differences between the versions, or None if
+            either version does not exist.
+        """
+        diff = await self.diff_versions(prompt_name, version1, version2)
+        return diff.summary() if diff is not None else None
+
+    async def diff_versions(
+        self,
+        prompt_name: str,
+        version1: str,
+        version2: str,
+        granularity: str = "line",
+    ) -> Optional[PromptDiff]:
+        """
+        Diff two versions of a prompt, message by message.
+
+        Only the two versions are loaded, however many lie between them.
+
+        Args:
+            prompt_name: The name of the prompt.
+            version1: The old version.
+            version2: The new version.
+            granularity: ``"line"`` or ``"word"`` for message text diffs.
+
+        Returns:
+            The diff, or None if either version does not exist.
+        """
+        old = await self.get_prompt(prompt_name, version1)
+        new = await self.get_prompt(prompt_name, version2)
+        if old is None or new is None:
+            return None
+
+        return diff_prompts(old, new, granularity)
+
+    async def history(
+        self,
+        prompt_name: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        granularity: str = "line",
+    ) -> AsyncIterator[PromptDiff]:
+        """
+        Iterate over the changes between consecutive versions in a range.
+
+        Versions are loaded one at a time as the iterator advances, so at
+        most two are held in memory.
+
+        Args:
+            prompt_name: The name of the prompt.
+            start: The first version of the range (default: the first version).
+            end: The last version of the range (default: the latest version).
+            granularity: ``"line"`` or ``"word"`` for message text diffs.
+
+        Yields:
+            The diff from each version to the next.
+        """
+        versions = versions_in_range(await self.list_versions(prompt_name), start, end)
+
+        previous = None
+        for version in versions:
+            current = await self.get_prompt(prompt_name, version)
+            if previous is not None and current is not None:
+                yield diff_prompts(previous, current, granularity)
+            previous = current or previous
+
+    @traced("repo.get_latest_version", attribute="prompt_name")
     async def get_latest_version(self, prompt_name: str) -> Optional[str]:
         """
         Get the latest version of a prompt.
@@ -373,9 +1082,11 @@ class DBPromptRepo:
         Returns:
             The latest version, or None if not found.
         """
-        await self.init()
+        db = self._client or await self.init()
 
-        prompt_model = await PromptModel.filter(name=prompt_name).order_by("-version").first()
+        prompt_model = (
+            await PromptModel.filter(name=prompt_name).using_db(db).order_by("-version").first()
+        )
         if prompt_model is None:
             return None
 
@@ -407,6 +1118,7 @@ class DBPromptRepo:
         major, minor, patch = map(int, parts)
         return f"{major}.{minor}.{patch + 1}"
 
+    @traced("repo.set_active", attribute="prompt_name")
     async def set_active(
             self,
             prompt_name: str,
@@ -420,21 +1132,29 @@ class DBPromptRepo:
             version: The version to update.
             active: Whether the prompt should be active.
         """
-        await self.init()
+        db = self._client or await self.init()
 
-        prompt_model = await PromptModel.filter(name=prompt_name, version=version).first()
+        prompt_model = (
+            await PromptModel.filter(name=prompt_name, version=version).using_db(db).first()
+        )
         if prompt_model is None:
             return
 
         prompt_model.is_active = active
-        await prompt_model.save()
+        await prompt_model.save(using_db=db)
 
         # If setting this prompt as active, deactivate all other versions
         if active:
-            await PromptModel.filter(name=prompt_name).exclude(version=version).update(
-                is_active=False
+            await (
+                PromptModel.filter(name=prompt_name)
+                .using_db(db)
+                .exclude(version=version)
+                .update(is_active=False)
             )
 
+        await self._record_change(db, prompt_name, version, "activate" if active else "deactivate")
+
+    @traced("repo.set_fallback", attribute="prompt_name")
     async def set_fallback(
             self,
             prompt_name: str,
@@ -448,15 +1168,135 @@ class DBPromptRepo:
             version: The version to update.
             fallback_for: The name of the prompt this is a fallback for.
         """
-        await self.init()
+        db = self._client or await self.init()
 
-        prompt_model = await PromptModel.filter(name=prompt_name, version=version).first()
+        prompt_model = (
+            await PromptModel.filter(name=prompt_name, version=version).using_db(db).first()
+        )
         if prompt_model is None:
             return
 
         prompt_model.is_fallback = True
         prompt_model.fallback_for = fallback_for
-        await prompt_model.save()
+        await prompt_model.save(using_db=db)
+
+        await self._record_change(db, prompt_name, version, "fallback")
+
+    async def _record_change(
+        self,
+        db: BaseDBAsyncClient,
+        prompt_name: str,
+        version: Optional[str],
+        action: str,
+    ) -> None:
+        """Append a write to the change feed and bump the local epoch."""
+        await PromptRevision.create(name=prompt_name, version=version, action=action, using_db=db)
+        self.epoch += 1
+
+    async def current_revision(self) -> int:
+        """
+        Get the latest revision of the change feed.
+
+        Returns:
+            The revision of the most recent write, or 0 if there are none.
+        """
+        db = self._client or await self.init()
+
+        revisions = (
+            await PromptRevision.all()
+            .using_db(db)
+            .order_by("-id")
+            .limit(1)
+            .values_list("id", flat=True)
+        )
+        return cast(int, revisions[0]) if revisions else 0
+
+    async def changes_since(self, revision: int, limit: int = 1000) -> List[PromptChange]:
+        """
+        Get the writes made after a revision, oldest first.
+
+        This is a primary key range scan, so polling it is cheap even when
+        nothing has changed.
+
+        Args:
+            revision: The last revision the caller has seen.
+            limit: Maximum number of changes to return.
+
+        Returns:
+            The changes, in revision order.
+        """
+        db = self._client or await self.init()
+
+        rows = (
+            await PromptRevision.filter(id__gt=revision)
+            .using_db(db)
+            .order_by("id")
+            .limit(limit)
+            .values("id", "name", "version", "action", "created_at")
+        )
+        return [PromptChange(revision=row.pop("id"), **row) for row in rows]
+
+    @traced("repo.add_usage")
+    async def add_usage(self, records: Iterable[UsageRecord]) -> None:
+        """
+        Store flushed usage windows.
+
+        Args:
+            records: The windows to store.
+        """
+        db = self._client or await self.init()
+
+        rows = [PromptUsage(**record.model_dump()) for record in records]
+        if rows:
+            await PromptUsage.bulk_create(rows, using_db=db)
+
+    @traced("repo.usage_summary", attribute="prompt_name")
+    async def usage_summary(
+        self,
+        prompt_name: str,
+        version: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[UsageSummary]:
+        """
+        Summarize the latency, tokens and cost of a prompt's versions.
+
+        Args:
+            prompt_name: The name of the prompt.
+            version: Only summarize this version.
+            since: Only include windows that ended at or after this time.
+            until: Only include windows that started before this time.
+
+        Returns:
+            One summary per (version, model), ordered by version and model.
+        """
+        db = self._client or await self.init()
+
+        query = PromptUsage.filter(name=prompt_name).using_db(db)
+        if version is not None:
+            query = query.filter(version=version)
+        if since is not None:
+            query = query.filter(window_end__gte=since)
+        if until is not None:
+            query = query.filter(window_start__lt=until)
+
+        windows: Dict[Tuple[str, str], UsageWindow] = {}
+        for row in await query:
+            window = windows.get((row.version, row.model))
+            if window is None:
+                window = windows[(row.version, row.model)] = UsageWindow()
+            window.requests += row.requests
+            window.failures += row.failures
+            window.prompt_tokens += row.prompt_tokens
+            window.cached_tokens += row.cached_tokens
+            window.completion_tokens += row.completion_tokens
+            window.cost += row.cost
+            window.latency.merge(LatencyHistogram.from_dict(row.latency))
+
+        return [
+            UsageSummary.from_window(prompt_name, version, model, window)
+            for (version, model), window in sorted(windows.items())
+        ]
 
     async def update_stats(
             self,
@@ -471,20 +1311,44 @@ class DBPromptRepo:
             version: The version to update.
             success: Whether the prompt was used successfully.
         """
-        await self.init()
-
-        prompt_model = await PromptModel.filter(name=prompt_name, version=version).first()
-        if prompt_model is None:
-            return
-
-        stats = prompt_model.stats or PromptStats()
+        await self.increment_stats(
+            prompt_name,
+            version,
+            successes=1 if success else 0,
+            failures=0 if success else 1,
+        )
 
-        if success:
-            stats.successful_uses += 1
-        else:
-            stats.failed_uses += 1
+    @traced("repo.increment_stats", attribute="prompt_name")
+    async def increment_stats(
+        self,
+        prompt_name: str,
+        version: str,
+        successes: int = 0,
+        failures: int = 0,
+        last_used: Optional[datetime] = None,
+    ) -> None:
+        """
+        Atomically add to the usage counters of a prompt.
 
-        stats.last_used = datetime.now().isoformat()
+        The increment is a single ``UPDATE ... SET count = count + n``, so
+        concurrent callers never lose updates and the prompt body is not
+        rewritten.
 
-        prompt_model.stats_json = json.loads(json.dumps(stats.dict()))
-        await prompt_model.save()
+        Args:
+            prompt_name: The name of the prompt.
+            version: The version to update.
+            successes: Number of successful uses to add.
+            failures: Number of failed uses to add.
+            last_used: When the prompt was last used. Defaults to now.
+        """
+        db = self._client or await self.init()
+
+        await (
+            PromptModel.filter(name=prompt_name, version=version)
+            .using_db(db)
+            .update(
+                success_count=F("success_count") + successes,
+                failure_count=F("failure_count") + failures,
+                last_used=last_used or datetime.now(),
+            )
+        )
@@ -0,0 +1,324 @@
+"""
+Diffs between prompt versions.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from evoluteprompt.core.blobs import message_hash
+from evoluteprompt.core.prompt import Prompt
+
+_WORD_RE = re.compile(r"\s+|\S+")
+
+
+class DiffOp(BaseModel):
+    """A run of text that is unchanged, inserted or deleted."""
+
+    tag: str  # "equal", "insert" or "delete"
+    text: str
+
+
+class MessageDiff(BaseModel):
+    """The difference between two versions of one message."""
+
+    status: str  # "equal", "changed", "added" or "removed"
+    role: str
+    old_index: Optional[int] = None
+    new_index: Optional[int] = None
+    ops: List[DiffOp] = Field(default_factory=list)
+
+
+class PromptDiff(BaseModel):
+    """The difference between two prompt versions."""
+
+    old_version: Optional[str] = None
+    new_version: Optional[str] = None
+    messages: List[MessageDiff] = Field(default_factory=list)
+    metadata_changes: Dict[str, Tuple[Any, Any]] = Field(default_factory=dict)
+    parameters_changes: Dict[str, Tuple[Any, Any]] = Field(default_factory=dict)
+
+    @property
+    def changed_messages(self) -> List[MessageDiff]:
+        """The messages that are not equal."""
+        return [message for message in self.messages if message.status != "equal"]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the diff in the format of ``PromptRepo.compare_versions``.
+
+        Returns:
+            A dictionary of change counts and flags.
+        """
+        old_count = sum(1 for m in self.messages if m.old_index is not None)
+        new_count = sum(1 for m in self.messages if m.new_index is not None)
+
+        return {
+            "message_count_diff": new_count - old_count,
+            "messages_added": new_count > old_count,
+            "messages_removed": new_count < old_count,
+            "messages_changed": len(self.changed_messages),
+            "metadata_diff": bool(self.metadata_changes),
+            "parameters_diff": bool(self.parameters_changes),
+        }
+
+
+def myers_diff(a: Sequence[Any], b: Sequence[Any]) -> List[Tuple[str, int, int]]:
+    """
+    Compute a shortest edit script between two sequences.
+
+    This is Myers' O(ND) algorithm in its linear-space form: each step finds
+    the middle snake of the edit graph and recurses on both halves, so memory
+    stays proportional to the input size.
+
+    Args:
+        a: The old sequence.
+        b: The new sequence.
+
+    Returns:
+        Operations in order: ``("equal", i, j)``, ``("delete", i, -1)`` or
+        ``("insert", -1, j)``, with indices into ``a`` and ``b``.
+    """
+    ops: List[Tuple[str, int, int]] = []
+    _diff(a, 0, len(a), b, 0, len(b), ops)
+    return ops
+
+
+def _diff(
+    a: Sequence[Any],
+    a_lo: int,
+    a_hi: int,
+    b: Sequence[Any],
+    b_lo: int,
+    b_hi: int,
+    ops: List[Tuple[str, int, int]],
+) -> None:
+    """Append the edit script of ``a[a_lo:a_hi]`` to ``b[b_lo:b_hi]`` to ``ops``."""
+    # Common prefix
+    while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+        ops.append(("equal", a_lo, b_lo))
+        a_lo += 1
+        b_lo += 1
+
+    # Common suffix, emitted after the middle part
+    suffix = 0
+    while a_lo < a_hi - suffix and b_lo < b_hi - suffix and (
+        a[a_hi - suffix - 1] == b[b_hi - suffix - 1]
+    ):
+        suffix += 1
+    a_hi -= suffix
+    b_hi -= suffix
+
+    if a_lo == a_hi:
+        ops.extend(("insert", -1, j) for j in range(b_lo, b_hi))
+    elif b_lo == b_hi:
+        ops.extend(("delete", i, -1) for i in range(a_lo, a_hi))
+    else:
+        x0, y0, x1, y1 = _middle_snake(a, a_lo, a_hi, b, b_lo, b_hi)
+        _diff(a, a_lo, x0, b, b_lo, y0, ops)
+        ops.extend(("equal", x0 + i, y0 + i) for i in range(x1 - x0))
+        _diff(a, x1, a_hi, b, y1, b_hi, ops)
+
+    ops.extend(("equal", a_hi + i, b_hi + i) for i in range(suffix))
+
+
+def _middle_snake(
+    a: Sequence[Any], a_lo: int, a_hi: int, b: Sequence[Any], b_lo: int, b_hi: int
+) -> Tuple[int, int, int, int]:
+    """
+    Find the middle snake of the edit graph of two non-empty sequences.
+
+    Returns:
+        The snake's start and end points ``(x0, y0, x1, y1)`` as absolute
+        indices into ``a`` and ``b``.
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    delta = n - m
+    odd = delta % 2 != 0
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    forward = [0] * (2 * max_d + 3)
+    backward = [0] * (2 * max_d + 3)
+
+    for d in range(max_d + 1):
+        # Extend the furthest forward paths by one edit
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x_start, y_start = x, y
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+
+            kb = delta - k
+            if odd and -(d - 1) <= kb <= d - 1 and x + backward[offset + kb] >= n:
+                return a_lo + x_start, b_lo + y_start, a_lo + x, b_lo + y
+
+        # Extend the furthest backward paths, walking both sequences from the end
+        for kb in range(-d, d + 1, 2):
+            if kb == -d or (kb != d and backward[offset + kb - 1] < backward[offset + kb + 1]):
+                x = backward[offset + kb + 1]
+            else:
+                x = backward[offset + kb - 1] + 1
+            y = x - kb
+            x_start, y_start = x, y
+            while x < n and y < m and a[a_hi - 1 - x] == b[b_hi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + kb] = x
+
+            k = delta - kb
+            if not odd and -d <= k <= d and x + forward[offset + k] >= n:
+                return a_hi - x, b_hi - y, a_hi - x_start, b_hi - y_start
+
+    raise AssertionError("No middle snake found")  # pragma: no cover
+
+
+def _tokenize(text: str, granularity: str) -> List[str]:
+    """Split text into the units to diff."""
+    if granularity == "line":
+        return text.splitlines(keepends=True)
+    if granularity == "word":
+        return _WORD_RE.findall(text)
+    raise ValueError(f"Unknown granularity '{granularity}', expected 'line' or 'word'")
+
+
+def diff_text(old: str, new: str, granularity: str = "line") -> List[DiffOp]:
+    """
+    Diff two strings by line or by word.
+
+    Args:
+        old: The old text.
+        new: The new text.
+        granularity: ``"line"`` or ``"word"``.
+
+    Returns:
+        Runs of equal, deleted and inserted text, in order.
+    """
+    a = _tokenize(old, granularity)
+    b = _tokenize(new, granularity)
+
+    result: List[DiffOp] = []
+    for tag, i, j in myers_diff(a, b):
+        text = b[j] if tag == "insert" else a[i]
+        if result and result[-1].tag == tag:
+            result[-1].text += text
+        else:
+            result.append(DiffOp(tag=tag, text=text))
+    return result
+
+
+def _field_changes(
+    old: Optional[BaseModel], new: Optional[BaseModel]
+) -> Dict[str, Tuple[Any, Any]]:
+    """Compare two models field by field."""
+    old_data = old.model_dump(mode="json") if old is not None else {}
+    new_data = new.model_dump(mode="json") if new is not None else {}
+    return {
+        key: (old_data.get(key), new_data.get(key))
+        for key in sorted(old_data.keys() | new_data.keys())
+        if old_data.get(key) != new_data.get(key)
+    }
+
+
+def diff_prompts(old: Prompt, new: Prompt, granularity: str = "line") -> PromptDiff:
+    """
+    Diff two prompts message by message.
+
+    Messages are first aligned by content hash, so unchanged messages cost
+    one hash each and are never diffed as text. Runs of removed and added
+    messages are paired up in order and reported as changed messages with a
+    text diff; any surplus is reported as added or removed.
+
+    Args:
+        old: The old prompt.
+        new: The new prompt.
+        granularity: ``"line"`` or ``"word"`` for the text diffs.
+
+    Returns:
+        The diff.
+    """
+    old_messages = [m.model_dump(mode="json") for m in old.messages]
+    new_messages = [m.model_dump(mode="json") for m in new.messages]
+    old_hashes = [message_hash(m) for m in old_messages]
+    new_hashes = [message_hash(m) for m in new_messages]
+
+    messages: List[MessageDiff] = []
+    removed: List[int] = []
+    added: List[int] = []
+
+    def flush() -> None:
+        for i, j in zip(removed, added):
+            messages.append(
+                MessageDiff(
+                    status="changed",
+                    role=new_messages[j]["role"],
+                    old_index=i,
+                    new_index=j,
+                    ops=diff_text(
+                        old_messages[i]["content"], new_messages[j]["content"], granularity
+                    ),
+                )
+            )
+        for i in removed[len(added):]:
+            messages.append(
+                MessageDiff(status="removed", role=old_messages[i]["role"], old_index=i)
+            )
+        for j in added[len(removed):]:
+            messages.append(MessageDiff(status="added", role=new_messages[j]["role"], new_index=j))
+        removed.clear()
+        added.clear()
+
+    for tag, i, j in myers_diff(old_hashes, new_hashes):
+        if tag == "equal":
+            flush()
+            messages.append(
+                MessageDiff(status="equal", role=new_messages[j]["role"], old_index=i, new_index=j)
+            )
+        elif tag == "delete":
+            removed.append(i)
+        else:
+            added.append(j)
+    flush()
+
+    return PromptDiff(
+        old_version=old.metadata.version if old.metadata else None,
+        new_version=new.metadata.version if new.metadata else None,
+        messages=messages,
+        metadata_changes=_field_changes(old.metadata, new.metadata),
+        parameters_changes=_field_changes(old.parameters, new.parameters),
+    )
+
+
+def versions_in_range(
+    versions: Sequence[str], start: Optional[str] = None, end: Optional[str] = None
+) -> List[str]:
+    """
+    Select the versions between two bounds, inclusive, in semver order.
+
+    Args:
+        versions: The versions to choose from.
+        start: The lowest version to include, or None for no lower bound.
+        end: The highest version to include, or None for no upper bound.
+
+    Returns:
+        The selected versions, sorted.
+    """
+    import semver
+
+    low = semver.VersionInfo.parse(start) if start else None
+    high = semver.VersionInfo.parse(end) if end else None
+
+    selected = []
+    for version in versions:
+        parsed = semver.VersionInfo.parse(version)
+        if (low is None or parsed >= low) and (high is None or parsed <= high):
+            selected.append((parsed, version))
+
+    return [version for _, version in sorted(selected)]
@@ -0,0 +1,299 @@
+"""
+Single-file packed archives of a prompt repository.
+"""
+
+import os
+import sqlite3
+import tempfile
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from evoluteprompt.core.prompt import Prompt
+from evoluteprompt.core.repository import PromptRepo, _atomic_write
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+PACKED_FORMAT = 1
+
+_SCHEMA = """
+CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE prompts (
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (name, version)
+) WITHOUT ROWID;
+"""
+
+
+def _compressor(codec: str) -> Callable[[bytes], bytes]:
+    """Get the compression function for a codec."""
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress
+    return lambda data: zlib.compress(data, 9)
+
+
+def _decompressor(codec: str) -> Callable[[bytes], bytes]:
+    """Get the decompression function for a codec."""
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise ImportError(
+                "The 'zstandard' package is required to read this archive. "
+                "Install it with 'pip install evoluteprompt[zstd]'.")
+        return zstandard.ZstdDecompressor().decompress
+    if codec == "zlib":
+        return zlib.decompress
+    raise ValueError(f"Unknown archive codec '{codec}'")
+
+
+def export_packed(repo: PromptRepo, path: str, codec: Optional[str] = None) -> int:
+    """
+    Pack every version of every prompt into a single archive file.
+
+    The archive is an SQLite database with a (name, version) index and one
+    compressed blob per version. The stored bytes are the ``prompt.json``
+    files as they are on disk, so nothing is re-serialized, except that
+    versions saved with message deduplication get their messages inlined. The archive is
+    built next to ``path`` and moved into place when complete.
+
+    Args:
+        repo: The repository to export.
+        path: Where to write the archive.
+        codec: ``"zstd"`` or ``"zlib"``. Defaults to zstd when the
+            ``zstandard`` package is installed.
+
+    Returns:
+        The number of prompt versions written.
+    """
+    codec = codec or ("zstd" if ZSTD_AVAILABLE else "zlib")
+    if codec == "zstd" and not ZSTD_AVAILABLE:
+        raise ImportError(
+            "The 'zstandard' package is required for zstd archives. "
+            "Install it with 'pip install zstandard'.")
+    compress = _compressor(codec)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    os.chmod(temp_path, 0o644)
+
+    count = 0
+    try:
+        conn = sqlite3.connect(temp_path)
+        try:
+            conn.executescript(_SCHEMA)
+            conn.executemany(
+                "INSERT INTO info VALUES (?, ?)",
+                [("format", str(PACKED_FORMAT)), ("codec", codec)],
+            )
+            for name in sorted(repo.list_prompts()):
+                rows = []
+                for seq, version in enumerate(repo.list_versions(name)):
+                    with open(repo._get_prompt_file(name, version), "rb") as f:
+                        body = f.read()
+                    if b'"message_refs"' in body:
+                        # Archives are self-contained, so inline deduplicated messages
+                        body = repo.get_prompt(name, version).to_json().encode("utf-8")
+                    rows.append((name, version, seq, compress(body)))
+                conn.executemany("INSERT INTO prompts VALUES (?, ?, ?, ?)", rows)
+                count += len(rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    return count
+
+
+def import_packed(path: str, repo: PromptRepo) -> int:
+    """
+    Unpack an archive into a directory repository.
+
+    Versions are written exactly as stored, so their metadata (including
+    timestamps) is preserved. Existing versions with the same number are
+    overwritten.
+
+    Args:
+        path: The archive to read.
+        repo: The repository to write to.
+
+    Returns:
+        The number of prompt versions written.
+    """
+    packed = PackedPromptRepo(path)
+    count = 0
+    try:
+        for name in packed.list_prompts():
+            with repo._lock(name):
+                for version in packed.list_versions(name):
+                    version_dir = repo._get_version_dir(name, version)
+                    os.makedirs(version_dir, exist_ok=True)
+                    _atomic_write(
+                        repo._get_prompt_file(name, version), packed._read_body(name, version)
+                    )
+                    count += 1
+
+                versions = repo._scan_versions(name)
+                repo._write_meta(
+                    repo._get_meta_file(name),
+                    {"name": name, "latest_version": versions[-1], "versions": versions},
+                )
+    finally:
+        packed.close()
+
+    repo.refresh()
+    return count
+
+
+class PackedPromptRepo:
+    """
+    A read-only prompt repository backed by a packed archive.
+
+    It offers the read API of ``PromptRepo``. Opening it reads the archive's
+    index in one query. The archive is opened as an immutable, memory-mapped
+    SQLite database, so prompt bodies are paged in from the file on demand.
+    """
+
+    def __init__(self, path: str, mmap_size: int = 256 * 1024 * 1024):
+        """
+        Open an archive.
+
+        Args:
+            path: Path to an archive written by ``export_packed``.
+            mmap_size: Maximum number of bytes of the archive to memory-map.
+
+        Raises:
+            FileNotFoundError: If the archive does not exist.
+            ValueError: If the file is not a supported archive.
+        """
+        self.path = os.path.abspath(path)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Archive '{path}' not found")
+
+        self._conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro&immutable=1", uri=True, check_same_thread=False
+        )
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+
+        try:
+            info = dict(self._conn.execute("SELECT key, value FROM info"))
+        except sqlite3.DatabaseError:
+            info = {}
+        if info.get("format") != str(PACKED_FORMAT):
+            self._conn.close()
+            raise ValueError(f"Unsupported archive format {info.get('format')!r}")
+        self.codec = info["codec"]
+        self._decompress = _decompressor(self.codec)
+
+        # name -> versions in semver order
+        self._versions: Dict[str, List[str]] = {}
+        for name, version in self._conn.execute(
+            "SELECT name, version FROM prompts ORDER BY name, seq"
+        ):
+            self._versions.setdefault(name, []).append(version)
+
+    def close(self) -> None:
+        """Close the archive."""
+        self._conn.close()
+
+    def __enter__(self) -> "PackedPromptRepo":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _read_body(self, prompt_name: str, version: str) -> str:
+        """Read and decompress the stored ``prompt.json`` of a version."""
+        row = self._conn.execute(
+            "SELECT body FROM prompts WHERE name = ? AND version = ?", (prompt_name, version)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Prompt '{prompt_name}' version '{version}' not found")
+        return self._decompress(row[0]).decode("utf-8")
+
+    def get_prompt(self, prompt_name: str, version: Optional[str] = None) -> Prompt:
+        """
+        Get a prompt from the archive.
+
+        Args:
+            prompt_name: Name of the prompt.
+            version: Version of the prompt (default: latest).
+
+        Returns:
+            The prompt.
+
+        Raises:
+            FileNotFoundError: If the prompt or version does not exist.
+        """
+        if version is None:
+            version = self.get_latest_version(prompt_name)
+
+        return Prompt.from_json(self._read_body(prompt_name, version))
+
+    def list_prompts(self) -> List[str]:
+        """
+        List all prompts in the archive.
+
+        Returns:
+            A list of prompt names.
+        """
+        return list(self._versions)
+
+    def list_versions(self, prompt_name: str) -> List[str]:
+        """
+        List all versions of a prompt.
+
+        Args:
+            prompt_name: Name of the prompt.
+
+        Returns:
+            A list of version strings.
+        """
+        return list(self._versions.get(prompt_name, []))
+
+    def get_latest_version(self, prompt_name: str) -> str:
+        """
+        Get the latest version of a prompt.
+
+        Args:
+            prompt_name: Name of the prompt.
+
+        Returns:
+            The latest version.
+
+        Raises:
+            FileNotFoundError: If the prompt does not exist or has no versions.
+        """
+        versions = self._versions.get(prompt_name)
+        if not versions:
+            raise FileNotFoundError(f"Prompt '{prompt_name}' has no versions")
+        return versions[-1]
+
+    # These only read through get_prompt and list_versions, so they work
+    # unchanged on an archive
+    compare_versions = PromptRepo.compare_versions
+    diff_versions = PromptRepo.diff_versions
+    history = PromptRepo.history
+
+    def save_prompt(self, *args: Any, **kwargs: Any) -> str:
+        """Archives are read-only."""
+        raise PermissionError("PackedPromptRepo is read-only")
+
+    def delete_prompt(self, *args: Any, **kwargs: Any) -> None:
+        """Archives are read-only."""
+        raise PermissionError("PackedPromptRepo is read-only")
+
+    def delete_version(self, *args: Any, **kwargs: Any) -> None:
+        """Archives are read-only."""
+        raise PermissionError("PackedPromptRepo is read-only")
@@ -0,0 +1,229 @@
+"""
+Shared prompt prefixes, for provider-side prompt caching.
+
+Providers such as OpenAI cache the longest prefix of a request that an earlier
+request already sent, which cuts latency and cost on long prompts. A cached
+prefix must be byte-identical and must reach the same cache, so prompts of a
+family should share their leading messages, carry the same cache key, and be
+sent close together, after one request has warmed the cache.
+"""
+
+import asyncio
+import hashlib
+from typing import Dict, Iterable, List, Optional, Sequence, Union, cast
+
+from evoluteprompt.core.prompt import Prompt
+from evoluteprompt.core.provider import LLMProvider
+from evoluteprompt.core.response import LLMResponse
+
+# Length of the hex keys returned by prefix_key
+_KEY_LENGTH = 32
+
+
+def prefix_hashes(prompt: Prompt) -> List[str]:
+    """
+    Hash every message prefix of a prompt.
+
+    Args:
+        prompt: The prompt.
+
+    Returns:
+        One hex digest per message; the i-th covers the first i + 1 messages.
+    """
+    running = hashlib.sha256()
+    digests = []
+    for message in prompt.messages:
+        for part in (message.role.value, message.name or "", message.content):
+            data = part.encode("utf-8")
+            running.update(len(data).to_bytes(8, "little"))
+            running.update(data)
+        digests.append(running.copy().hexdigest())
+    return digests
+
+
+def prefix_key(prompt: Prompt, length: Optional[int] = None) -> Optional[str]:
+    """
+    Compute a cache key for the leading messages of a prompt.
+
+    Args:
+        prompt: The prompt.
+        length: Number of leading messages. Defaults to all but the last
+            message, which usually holds the per-request input.
+
+    Returns:
+        A hex key, or None if the prefix is empty.
+    """
+    if length is None:
+        length = len(prompt.messages) - 1
+    length = min(length, len(prompt.messages))
+    if length <= 0:
+        return None
+    return prefix_hashes(prompt)[length - 1][:_KEY_LENGTH]
+
+
+def common_prefix_length(prompts: Iterable[Prompt]) -> int:
+    """
+    Count the leading messages that all prompts share exactly.
+
+    Args:
+        prompts: The prompts.
+
+    Returns:
+        The number of shared leading messages, or 0 if there are no prompts.
+    """
+    common: Optional[List[str]] = None
+    for prompt in prompts:
+        hashes = prefix_hashes(prompt)
+        if common is None:
+            common = hashes
+            continue
+        length = 0
+        for mine, theirs in zip(common, hashes):
+            if mine != theirs:
+                break
+            length += 1
+        common = common[:length]
+        if not common:
+            break
+    return len(common or [])
+
+
+class PrefixIndex:
+    """
+    Learns which message prefixes the prompts of a family share.
+
+    Add the prompts of a template family as they are built; ``shared_length``
+    and ``key`` then find the longest leading part of a prompt that other
+    prompts also start with.
+    """
+
+    def __init__(self, min_count: int = 2, max_entries: int = 100000):
+        """
+        Initialize the index.
+
+        Args:
+            min_count: How many prompts must start with a prefix for it to count
+                as shared.
+            max_entries: How many prefixes to track. When full, prefixes seen
+                only once are forgotten.
+        """
+        self.min_count = min_count
+        self.max_entries = max_entries
+        self._counts: Dict[str, int] = {}
+
+    def add(self, prompt: Prompt) -> None:
+        """
+        Record the prefixes of a prompt.
+
+        Args:
+            prompt: The prompt.
+        """
+        counts = self._counts
+        for digest in prefix_hashes(prompt):
+            counts[digest] = counts.get(digest, 0) + 1
+        if len(counts) > self.max_entries:
+            self._counts = {digest: n for digest, n in counts.items() if n > 1}
+
+    def shared_length(self, prompt: Prompt) -> int:
+        """
+        Find the longest prefix of a prompt that enough prompts share.
+
+        Args:
+            prompt: The prompt.
+
+        Returns:
+            The number of leading messages in the shared prefix.
+        """
+        length = 0
+        for index, digest in enumerate(prefix_hashes(prompt)):
+            if self._counts.get(digest, 0) < self.min_count:
+                break
+            length = index + 1
+        return length
+
+    def key(self, prompt: Prompt) -> Optional[str]:
+        """
+        Compute the cache key of a prompt's shared prefix.
+
+        Args:
+            prompt: The prompt.
+
+        Returns:
+            A hex key, or None if no prefix is shared.
+        """
+        return prefix_key(prompt, self.shared_length(prompt))
+
+
+async def generate_by_prefix(
+    provider: LLMProvider,
+    prompts: Sequence[Prompt],
+    concurrency: int = 8,
+    min_prefix_chars: int = 4096,
+    stream: bool = False,
+    return_exceptions: bool = False,
+) -> List[Union[LLMResponse, BaseException]]:
+    """
+    Send a batch of prompts so that those sharing a prefix hit a warm cache.
+
+    Prompts are grouped by ``prefix_key``. The first prompt of each group
+    whose prefix is long enough to be cached is sent on its own; the rest of
+    the group follows together as soon as it completes. Other prompts are sent
+    right away.
+
+    Args:
+        provider: The provider to send the prompts to.
+        prompts: The prompts.
+        concurrency: The maximum number of requests in flight.
+        min_prefix_chars: Prefixes shorter than this are not worth waiting
+            for. Providers only cache prompts of 1024 tokens or more.
+        stream: Whether to use ``generate_stream``.
+        return_exceptions: Whether to return exceptions in place of
+            responses, instead of raising the first one.
+
+    Returns:
+        The responses, in the order of the prompts.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    warmed: Dict[str, asyncio.Event] = {}
+    results: List[Union[LLMResponse, BaseException, None]] = [None] * len(prompts)
+
+    async def send(
+        index: int, wait_for: Optional[asyncio.Event], done: Optional[asyncio.Event]
+    ) -> None:
+        try:
+            if wait_for is not None:
+                await wait_for.wait()
+            async with semaphore:
+                generate = provider.generate_stream if stream else provider.generate
+                results[index] = await generate(prompts[index])
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results[index] = e
+        finally:
+            if done is not None:
+                done.set()
+
+    tasks = []
+    for index, prompt in enumerate(prompts):
+        key = prefix_key(prompt)
+        wait_for = done = None
+        if key is not None and _prefix_chars(prompt) >= min_prefix_chars:
+            if key in warmed:
+                wait_for = warmed[key]
+            else:
+                done = warmed[key] = asyncio.Event()
+        tasks.append(asyncio.ensure_future(send(index, wait_for, done)))
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    # Every slot is filled once all tasks have finished
+    return cast(List[Union[LLMResponse, BaseException]], results)
+
+
+def _prefix_chars(prompt: Prompt) -> int:
+    """Count the characters of all but the last message."""
+    return sum(len(message.content) for message in prompt.messages[:-1])
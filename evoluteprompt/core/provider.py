@@ -1,14 +1,77 @@
 """Base class for LLM providers."""
 
+import functools
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 from evoluteprompt.core.prompt import Prompt
 from evoluteprompt.core.response import LLMResponse
+from evoluteprompt.utils.instrumentation import traced
+
+if TYPE_CHECKING:
+    from evoluteprompt.core.stats import StatsAggregator
+
+# Provider methods that make an API call and are timed by instrumentation
+_TRACED_METHODS = ("generate", "generate_stream", "complete_async", "stream_async")
+
+# Set while a call is being recorded, so one provider method delegating to
+# another is counted once
+_recording: ContextVar[bool] = ContextVar("evoluteprompt_provider_recording", default=False)
+
+
+def _record_usage(fn: Callable) -> Callable:
+    """Report each call of a provider method to the provider's aggregator, if any."""
+
+    @functools.wraps(fn)
+    async def wrapper(self: "LLMProvider", prompt: Prompt, *args: Any, **kwargs: Any) -> Any:
+        aggregator = self.aggregator
+        if aggregator is None or _recording.get():
+            return await fn(self, prompt, *args, **kwargs)
+
+        token = _recording.set(True)
+        start = time.perf_counter()
+        try:
+            response = await fn(self, prompt, *args, **kwargs)
+        except Exception:
+            aggregator.record_response(
+                prompt,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                model=getattr(self, "model", None),
+                success=False,
+            )
+            raise
+        finally:
+            _recording.reset(token)
+        aggregator.record_response(
+            prompt,
+            response if isinstance(response, LLMResponse) else None,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            model=getattr(self, "model", None),
+        )
+        return response
+
+    return wrapper
 
 
 class LLMProvider(ABC):
-    """Base class for LLM providers."""
+    """Base class for LLM providers.
+
+    Set ``aggregator`` to a ``StatsAggregator`` to record the latency, token
+    usage and cost of every call by prompt version and model.
+    """
+
+    aggregator: Optional["StatsAggregator"] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Every provider implementation reports the time spent in API calls
+        for method in _TRACED_METHODS:
+            fn = cls.__dict__.get(method)
+            if fn is not None and not getattr(fn, "__isabstractmethod__", False):
+                traced_fn = traced(f"provider.{method}", provider=cls.__name__)
+                setattr(cls, method, traced_fn(_record_usage(fn)))
 
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the provider.
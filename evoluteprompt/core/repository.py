@@ -6,39 +6,167 @@ import json
 import os
 import re
 import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
-
-import semver
+from types import ModuleType
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Union
 
+from evoluteprompt.core.blobs import message_hash, shared_blob_cache
+from evoluteprompt.core.diff import PromptDiff, diff_prompts, versions_in_range
 from evoluteprompt.core.prompt import Prompt
 from evoluteprompt.core.types import PromptMetadata
 
+fcntl: Optional[ModuleType]
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MANIFEST_FORMAT = 1
+
+# Journal entries appended before the manifest is rewritten in full
+_JOURNAL_LIMIT = 256
+
+_VERSION_RE = re.compile(r"^\d+\.\d+\.\d+$")
+
+# Directories modified this recently may change again within the same mtime
+# tick, so their mtime is not trusted and they are re-listed on next access.
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+# Used instead of file locks where fcntl is unavailable; only guards
+# writers within one process.
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _atomic_write(path: str, data: str) -> None:
+    """
+    Replace a file's contents so readers see either the old or the new file.
+
+    The data is written to a temporary file in the same directory, flushed
+    to disk and renamed over ``path``; the directory is then synced so the
+    rename itself survives a crash.
+    """
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        # mkstemp creates the file as 0600; keep the usual permissions
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(temp_path, mode)
+
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    if os.name != "nt":
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on ``path`` across processes.
+
+    Falls back to an in-process lock where ``fcntl`` is not available.
+    """
+    if fcntl is None:
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(path, threading.Lock())
+        with lock:
+            yield
+        return
+
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
 
 class PromptRepo:
     """
     A repository for managing and versioning prompts.
+
+    Version lists are cached in a manifest at ``.promptflow/manifest.json``.
+    Each entry records the mtime of its prompt directory, so only directories
+    that changed since the manifest was written are listed again. Saves and
+    deletes append the entries they changed to ``.promptflow/manifest.log``;
+    the manifest is only rewritten once that journal grows long. Both files
+    are a cache checked against the directory tree, so a lost or torn journal
+    line only costs a re-listing. Opening a repository never writes, so
+    read-only checkouts can be used.
+
+    All files are replaced atomically, and saves hold a per-prompt lock while
+    allocating a version, so several processes can write to the same
+    repository without corrupting files or reusing versions.
     """
 
-    def __init__(self, repo_path: str):
+    def __init__(self, repo_path: str, compact: bool = False, dedupe_messages: bool = False):
         """
         Initialize a prompt repository.
 
         Args:
             repo_path: Path to the repository.
+            compact: Write JSON without indentation. Smaller and faster, but
+                less readable in diffs.
+            dedupe_messages: Store each distinct message once under
+                ``.promptflow/blobs`` and save versions with a list of message
+                hashes. Prompts saved either way can always be read.
         """
         self.repo_path = os.path.abspath(repo_path)
+        self.compact = compact
+        self.dedupe_messages = dedupe_messages
         self._ensure_repo_exists()
 
+        self._manifest_file = os.path.join(self.repo_path, ".promptflow", "manifest.json")
+        self._journal_file = os.path.join(self.repo_path, ".promptflow", "manifest.log")
+        self._root_mtime_ns: Optional[int] = None
+        # prompt name -> {"mtime_ns": int, "versions": [sorted versions]}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._journal_lines = 0
+        # Entries changed since the manifest was last written, None if removed
+        self._changed: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._root_changed = False
+        self._load_manifest()
+        self._refresh_entries()
+
     def _ensure_repo_exists(self) -> None:
         """Ensure the repository directory exists."""
-        if not os.path.exists(self.repo_path):
-            os.makedirs(self.repo_path)
+        # Other processes may be creating the same directory
+        if not os.path.isdir(self.repo_path):
+            os.makedirs(self.repo_path, exist_ok=True)
 
-        # Create a .promptflow directory for metadata
-        meta_dir = os.path.join(self.repo_path, ".promptflow")
-        if not os.path.exists(meta_dir):
-            os.makedirs(meta_dir)
+    def _get_lock_file(self, prompt_name: str) -> str:
+        """Get the lock file guarding writes to a prompt."""
+        return os.path.join(self.repo_path, ".promptflow", "locks", f"{prompt_name}.lock")
+
+    def _lock(self, prompt_name: str) -> ContextManager[None]:
+        """Lock a prompt for writing, creating the lock directory on first use."""
+        lock_file = self._get_lock_file(prompt_name)
+        os.makedirs(os.path.dirname(lock_file), exist_ok=True)
+        return _file_lock(lock_file)
 
     def _get_prompt_dir(self, prompt_name: str) -> str:
         """Get the directory for a prompt."""
@@ -56,10 +184,210 @@ class PromptRepo:
                 version),
             "prompt.json")
 
+    def _get_blob_file(self, blob_hash: str) -> str:
+        """Get the file storing a message blob."""
+        return os.path.join(
+            self.repo_path, ".promptflow", "blobs", blob_hash[:2], f"{blob_hash}.json"
+        )
+
+    def _store_blobs(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """Write any new message blobs and return the hashes of ``messages``."""
+        hashes = []
+        for message in messages:
+            blob_hash = message_hash(message)
+            blob_file = self._get_blob_file(blob_hash)
+            if not os.path.exists(blob_file):
+                os.makedirs(os.path.dirname(blob_file), exist_ok=True)
+                _atomic_write(blob_file, json.dumps(message))
+            shared_blob_cache.put(blob_hash, message)
+            hashes.append(blob_hash)
+        return hashes
+
+    def _load_blob(self, blob_hash: str) -> Dict[str, Any]:
+        """Read a message blob, through the shared cache."""
+        blob = shared_blob_cache.get(blob_hash)
+        if blob is None:
+            with open(self._get_blob_file(blob_hash), "r") as f:
+                blob = json.load(f)
+            shared_blob_cache.put(blob_hash, blob)
+        return blob
+
+    def _serialize(self, prompt: Prompt) -> str:
+        """Serialize a prompt for prompt.json."""
+        if not self.dedupe_messages:
+            return prompt.model_dump_json() if self.compact else prompt.to_json()
+
+        data = prompt.model_dump(mode="json")
+        data["message_refs"] = self._store_blobs(data.pop("messages"))
+        return json.dumps(data, indent=None if self.compact else 2)
+
     def _get_meta_file(self, prompt_name: str) -> str:
         """Get the metadata file for a prompt."""
         return os.path.join(self._get_prompt_dir(prompt_name), "meta.json")
 
+    def _write_meta(self, meta_file: str, meta: Dict[str, Any]) -> None:
+        """Atomically write a prompt's meta.json."""
+        _atomic_write(meta_file, json.dumps(meta, indent=None if self.compact else 2))
+
+    def _load_manifest(self) -> None:
+        """Load the manifest and replay its journal, skipping unreadable parts."""
+        try:
+            with open(self._manifest_file, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        if manifest.get("format") == MANIFEST_FORMAT:
+            self._root_mtime_ns = manifest.get("root_mtime_ns")
+            self._entries = manifest.get("prompts", {})
+
+        try:
+            with open(self._journal_file, "r") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+
+        self._journal_lines = len(lines)
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A write torn by a crash; the entry is re-listed when used
+                continue
+            if "root_mtime_ns" in record:
+                self._root_mtime_ns = record["root_mtime_ns"]
+            elif record.get("entry") is None:
+                self._entries.pop(record["prompt"], None)
+            else:
+                self._entries[record["prompt"]] = record["entry"]
+
+    def _write_manifest(self) -> None:
+        """Atomically replace the manifest file and clear the journal."""
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "root_mtime_ns": self._root_mtime_ns,
+            "prompts": self._entries,
+        }
+
+        _atomic_write(self._manifest_file, json.dumps(manifest, separators=(",", ":")))
+        with open(self._journal_file, "w"):
+            pass
+        self._journal_lines = 0
+
+    def _flush_manifest(self) -> None:
+        """
+        Persist the entries changed since the last flush, if any.
+
+        Changes are appended to the journal without an fsync: the manifest is
+        only a cache, and every entry is checked against its directory's
+        mtime before use. A repository that cannot be written to, e.g. a
+        read-only checkout, keeps its changes in memory.
+        """
+        if not self._changed and not self._root_changed:
+            return
+
+        records: List[Dict[str, Any]] = [
+            {"prompt": name, "entry": entry} for name, entry in self._changed.items()
+        ]
+        if self._root_changed:
+            records.append({"root_mtime_ns": self._root_mtime_ns})
+
+        try:
+            os.makedirs(os.path.dirname(self._manifest_file), exist_ok=True)
+            if self._journal_lines + len(records) > _JOURNAL_LIMIT:
+                self._write_manifest()
+            else:
+                with open(self._journal_file, "a") as f:
+                    f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+                self._journal_lines += len(records)
+        except OSError:
+            return
+
+        self._changed.clear()
+        self._root_changed = False
+
+    @staticmethod
+    def _mtime_ns(path: str) -> Optional[int]:
+        """Get the trusted mtime of a directory, or None if it does not exist."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        # -1 never matches, so a recently changed directory is listed again
+        return -1 if time.time_ns() - mtime < _RACY_WINDOW_NS else mtime
+
+    def _scan_versions(self, prompt_name: str) -> List[str]:
+        """List the version directories of a prompt, sorted by semver."""
+        import semver
+
+        prompt_dir = self._get_prompt_dir(prompt_name)
+        versions = [
+            item
+            for item in os.listdir(prompt_dir)
+            if _VERSION_RE.match(item) and os.path.isdir(os.path.join(prompt_dir, item))
+        ]
+        versions.sort(key=lambda v: semver.VersionInfo.parse(v))
+        return versions
+
+    def _get_entry(self, prompt_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the manifest entry of a prompt, re-listing it if its directory
+        changed since it was recorded.
+        """
+        mtime = self._mtime_ns(self._get_prompt_dir(prompt_name))
+        if mtime is None:
+            if self._entries.pop(prompt_name, None) is not None:
+                self._changed[prompt_name] = None
+            return None
+
+        entry = self._entries.get(prompt_name)
+        if entry is None or entry["mtime_ns"] != mtime or mtime == -1:
+            scanned = {"mtime_ns": mtime, "versions": self._scan_versions(prompt_name)}
+            if scanned != entry:
+                self._changed[prompt_name] = scanned
+            entry = self._entries[prompt_name] = scanned
+
+        return entry
+
+    def _refresh_names(self) -> None:
+        """Pick up prompt directories added or removed since the last scan."""
+        mtime = self._mtime_ns(self.repo_path)
+        if mtime == self._root_mtime_ns and mtime != -1:
+            return
+
+        names = {
+            item
+            for item in os.listdir(self.repo_path)
+            if not item.startswith(".") and os.path.isdir(os.path.join(self.repo_path, item))
+        }
+        for name in list(self._entries):
+            if name not in names:
+                del self._entries[name]
+                self._changed[name] = None
+        for name in names - self._entries.keys():
+            self._get_entry(name)
+
+        if mtime != self._root_mtime_ns:
+            self._root_mtime_ns = mtime
+            self._root_changed = True
+
+    def _refresh_entries(self) -> None:
+        """Re-list every directory whose mtime changed, in memory only."""
+        self._refresh_names()
+        for name in list(self._entries):
+            self._get_entry(name)
+
+    def refresh(self) -> None:
+        """
+        Bring the manifest up to date with the directory tree.
+
+        Only directories whose mtime changed are listed again. Call this after
+        the tree was changed by another process, e.g. after a ``git pull``.
+        """
+        self._refresh_entries()
+        self._flush_manifest()
+
     def create_prompt(self, prompt_name: str) -> Prompt:
         """
         Create a new prompt.
@@ -102,10 +430,20 @@ class PromptRepo:
         Returns:
             The version of the saved prompt.
         """
+        with self._lock(prompt_name):
+            return self._save_prompt_locked(prompt_name, prompt, version, message)
+
+    def _save_prompt_locked(
+        self,
+        prompt_name: str,
+        prompt: Prompt,
+        version: Optional[str],
+        message: Optional[str],
+    ) -> str:
+        """Save a prompt while holding its lock."""
         # Make sure the prompt directory exists
         prompt_dir = self._get_prompt_dir(prompt_name)
-        if not os.path.exists(prompt_dir):
-            os.makedirs(prompt_dir)
+        os.makedirs(prompt_dir, exist_ok=True)
 
         # Determine the version
         if version is None:
@@ -115,30 +453,34 @@ class PromptRepo:
         if prompt.metadata is None:
             prompt.metadata = PromptMetadata(
                 version=version,
+                name=prompt_name,
                 description=f"Prompt: {prompt_name}",
                 created_at=datetime.now().isoformat(),
                 updated_at=datetime.now().isoformat(),
             )
         else:
             prompt.metadata.version = version
+            prompt.metadata.name = prompt_name
             prompt.metadata.updated_at = datetime.now().isoformat()
 
         # Create the version directory
         version_dir = self._get_version_dir(prompt_name, version)
-        if not os.path.exists(version_dir):
-            os.makedirs(version_dir)
+        os.makedirs(version_dir, exist_ok=True)
 
         # Save the prompt file
         prompt_file = self._get_prompt_file(prompt_name, version)
-        with open(prompt_file, "w") as f:
-            f.write(prompt.to_json())
+        _atomic_write(prompt_file, self._serialize(prompt))
+
+        # Update the manifest
+        self._refresh_names()
+        entry = self._get_entry(prompt_name)
 
         # Save metadata
         meta_file = self._get_meta_file(prompt_name)
-        meta = {
+        meta: Dict[str, Any] = {
             "name": prompt_name,
             "latest_version": version,
-            "versions": self.list_versions(prompt_name),
+            "versions": list(entry["versions"]) if entry else [],
             "updated_at": datetime.now().isoformat(),
         }
 
@@ -152,9 +494,13 @@ class PromptRepo:
         if version not in meta["versions"]:
             meta["versions"].append(version)
 
-        with open(meta_file, "w") as f:
-            json.dump(meta, f, indent=2)
+        self._write_meta(meta_file, meta)
 
+        # Writing meta.json touched the directory after it was listed
+        if entry is not None:
+            entry["mtime_ns"] = self._mtime_ns(prompt_dir)
+            self._changed[prompt_name] = entry
+        self._flush_manifest()
         return version
 
     def get_prompt(
@@ -188,6 +534,11 @@ class PromptRepo:
         with open(prompt_file, "r") as f:
             prompt_data = json.load(f)
 
+        if "message_refs" in prompt_data:
+            prompt_data["messages"] = [
+                self._load_blob(blob_hash) for blob_hash in prompt_data.pop("message_refs")
+            ]
+
         return Prompt.from_dict(prompt_data)
 
     def list_prompts(self) -> List[str]:
@@ -197,27 +548,8 @@ class PromptRepo:
         Returns:
             A list of prompt names.
         """
-        prompts = []
-
-        # Iterate through all directories in the repository
-        for item in os.listdir(self.repo_path):
-            item_path = os.path.join(self.repo_path, item)
-
-            # Skip files and hidden directories
-            if os.path.isfile(item_path) or item.startswith("."):
-                continue
-
-            # Check if the directory contains any versions
-            versions_exist = False
-            for subitem in os.listdir(item_path):
-                if re.match(r"^\d+\.\d+\.\d+$", subitem):
-                    versions_exist = True
-                    break
-
-            if versions_exist:
-                prompts.append(item)
-
-        return prompts
+        self._refresh_names()
+        return [name for name, entry in self._entries.items() if entry["versions"]]
 
     def list_versions(self, prompt_name: str) -> List[str]:
         """
@@ -229,28 +561,8 @@ class PromptRepo:
         Returns:
             A list of version strings.
         """
-        versions = []
-
-        # Get the prompt directory
-        prompt_dir = self._get_prompt_dir(prompt_name)
-        if not os.path.exists(prompt_dir):
-            return versions
-
-        # Iterate through all directories in the prompt directory
-        for item in os.listdir(prompt_dir):
-            item_path = os.path.join(prompt_dir, item)
-
-            # Skip files and directories that don't match version format
-            if os.path.isfile(item_path) or not re.match(
-                    r"^\d+\.\d+\.\d+$", item):
-                continue
-
-            versions.append(item)
-
-        # Sort versions
-        versions.sort(key=lambda v: semver.VersionInfo.parse(v))
-
-        return versions
+        entry = self._get_entry(prompt_name)
+        return list(entry["versions"]) if entry else []
 
     def get_latest_version(self, prompt_name: str) -> str:
         """
@@ -265,12 +577,12 @@ class PromptRepo:
         Raises:
             FileNotFoundError: If the prompt does not exist or has no versions.
         """
-        versions = self.list_versions(prompt_name)
+        entry = self._get_entry(prompt_name)
 
-        if not versions:
+        if not entry or not entry["versions"]:
             raise FileNotFoundError(f"Prompt '{prompt_name}' has no versions")
 
-        return versions[-1]
+        return entry["versions"][-1]
 
     def _get_next_version(self, prompt_name: str) -> str:
         """
@@ -282,6 +594,8 @@ class PromptRepo:
         Returns:
             The next version.
         """
+        import semver
+
         try:
             latest = self.get_latest_version(prompt_name)
             version_info = semver.VersionInfo.parse(latest)
@@ -304,7 +618,14 @@ class PromptRepo:
         if not os.path.exists(prompt_dir):
             raise FileNotFoundError(f"Prompt '{prompt_name}' not found")
 
-        shutil.rmtree(prompt_dir)
+        with self._lock(prompt_name):
+            shutil.rmtree(prompt_dir)
+
+        self._entries.pop(prompt_name, None)
+        self._changed[prompt_name] = None
+        self._root_mtime_ns = self._mtime_ns(self.repo_path)
+        self._root_changed = True
+        self._flush_manifest()
 
     def delete_version(self, prompt_name: str, version: str) -> None:
         """
@@ -323,27 +644,30 @@ class PromptRepo:
             raise FileNotFoundError(
                 f"Prompt '{prompt_name}' version '{version}' not found")
 
-        shutil.rmtree(version_dir)
+        with self._lock(prompt_name):
+            shutil.rmtree(version_dir)
 
-        # Update metadata
-        meta_file = self._get_meta_file(prompt_name)
-        if os.path.exists(meta_file):
-            with open(meta_file, "r") as f:
-                meta = json.load(f)
+            # Update metadata
+            meta_file = self._get_meta_file(prompt_name)
+            if os.path.exists(meta_file):
+                with open(meta_file, "r") as f:
+                    meta = json.load(f)
 
-            if "versions" in meta and version in meta["versions"]:
-                meta["versions"].remove(version)
+                if "versions" in meta and version in meta["versions"]:
+                    meta["versions"].remove(version)
 
-            # If this was the latest version, update it
-            if meta.get("latest_version") == version:
-                versions = self.list_versions(prompt_name)
-                if versions:
-                    meta["latest_version"] = versions[-1]
-                else:
-                    meta.pop("latest_version", None)
+                # If this was the latest version, update it
+                if meta.get("latest_version") == version:
+                    versions = self.list_versions(prompt_name)
+                    if versions:
+                        meta["latest_version"] = versions[-1]
+                    else:
+                        meta.pop("latest_version", None)
 
-            with open(meta_file, "w") as f:
-                json.dump(meta, f, indent=2)
+                self._write_meta(meta_file, meta)
+
+            self._get_entry(prompt_name)
+            self._flush_manifest()
 
     def compare_versions(self, prompt_name: str,
                          version1: str, version2: str) -> Dict[str, Any]:
@@ -361,17 +685,63 @@ class PromptRepo:
         Raises:
             FileNotFoundError: If either version does not exist.
         """
-        prompt1 = self.get_prompt(prompt_name, version1)
-        prompt2 = self.get_prompt(prompt_name, version2)
+        return self.diff_versions(prompt_name, version1, version2).summary()
 
-        # Compare messages
-        messages1 = [m.model_dump() for m in prompt1.messages]
-        messages2 = [m.model_dump() for m in prompt2.messages]
+    def diff_versions(
+        self,
+        prompt_name: str,
+        version1: str,
+        version2: str,
+        granularity: str = "line",
+    ) -> PromptDiff:
+        """
+        Diff two versions of a prompt, message by message.
 
-        return {
-            "message_count_diff": len(messages2) - len(messages1),
-            "messages_added": len(messages2) > len(messages1),
-            "messages_removed": len(messages2) < len(messages1),
-            "metadata_diff": prompt2.metadata != prompt1.metadata,
-            "parameters_diff": prompt2.parameters != prompt1.parameters,
-        }
+        Only the two versions are loaded, however many lie between them.
+
+        Args:
+            prompt_name: Name of the prompt.
+            version1: The old version.
+            version2: The new version.
+            granularity: ``"line"`` or ``"word"`` for message text diffs.
+
+        Returns:
+            The diff.
+
+        Raises:
+            FileNotFoundError: If either version does not exist.
+        """
+        return diff_prompts(
+            self.get_prompt(prompt_name, version1),
+            self.get_prompt(prompt_name, version2),
+            granularity,
+        )
+
+    def history(
+        self,
+        prompt_name: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        granularity: str = "line",
+    ) -> Iterator[PromptDiff]:
+        """
+        Iterate over the changes between consecutive versions in a range.
+
+        Versions are loaded one at a time as the iterator advances, so at
+        most two are held in memory.
+
+        Args:
+            prompt_name: Name of the prompt.
+            start: The first version of the range (default: the first version).
+            end: The last version of the range (default: the latest version).
+            granularity: ``"line"`` or ``"word"`` for message text diffs.
+
+        Yields:
+            The diff from each version to the next.
+        """
+        previous = None
+        for version in versions_in_range(self.list_versions(prompt_name), start, end):
+            current = self.get_prompt(prompt_name, version)
+            if previous is not None:
+                yield diff_prompts(previous, current, granularity)
+            previous = current
@@ -0,0 +1,140 @@
+"""
+Immutable in-memory snapshots of the prompts a strategy can select.
+"""
+
+import asyncio
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterable, Mapping, Optional, Set
+
+from evoluteprompt.core.prompt import Prompt
+from evoluteprompt.core.types import PromptCategory
+
+if TYPE_CHECKING:
+    from evoluteprompt.core.database import DBPromptRepo
+
+
+class PromptDependencies:
+    """
+    The repository lookups a strategy may perform.
+
+    Each set corresponds to one ``DBPromptRepo`` lookup: active prompts by
+    name, latest prompts by name, fallbacks by name, and the top active
+    prompt per category.
+    """
+
+    def __init__(
+        self,
+        active: Iterable[str] = (),
+        latest: Iterable[str] = (),
+        fallback: Iterable[str] = (),
+        categories: Iterable[PromptCategory] = (),
+    ):
+        self.active: Set[str] = set(active)
+        self.latest: Set[str] = set(latest)
+        self.fallback: Set[str] = set(fallback)
+        self.categories: Set[PromptCategory] = set(categories)
+
+    def update(self, other: "PromptDependencies") -> "PromptDependencies":
+        """
+        Add another set of dependencies to this one.
+
+        Args:
+            other: The dependencies to add.
+
+        Returns:
+            This object, for chaining.
+        """
+        self.active |= other.active
+        self.latest |= other.latest
+        self.fallback |= other.fallback
+        self.categories |= other.categories
+        return self
+
+    def __bool__(self) -> bool:
+        return bool(self.active or self.latest or self.fallback or self.categories)
+
+
+class PromptSnapshot:
+    """
+    A read-only view of prefetched prompts.
+
+    Selection against a snapshot is pure dictionary lookups. The prompts are
+    shared between callers; ``CompiledStrategy`` and ``PromptSelector`` hand
+    out copies, so code reading a snapshot directly must not change them.
+    """
+
+    def __init__(
+        self,
+        active: Optional[Mapping[str, Prompt]] = None,
+        latest: Optional[Mapping[str, Prompt]] = None,
+        fallback: Optional[Mapping[str, Prompt]] = None,
+        categories: Optional[Mapping[PromptCategory, Optional[Prompt]]] = None,
+        requested: Optional[PromptDependencies] = None,
+        epoch: int = 0,
+    ):
+        """
+        Initialize a snapshot.
+
+        Args:
+            active: Active prompts by name.
+            latest: Latest prompts by name.
+            fallback: Fallback prompts by the name they are a fallback for.
+            categories: Top active prompt per category.
+            requested: The lookups the snapshot was loaded for.
+            epoch: The repository epoch the snapshot was loaded at.
+        """
+        self.active: Mapping[str, Prompt] = MappingProxyType(dict(active or {}))
+        self.latest: Mapping[str, Prompt] = MappingProxyType(dict(latest or {}))
+        self.fallback: Mapping[str, Prompt] = MappingProxyType(dict(fallback or {}))
+        self.categories: Mapping[PromptCategory, Optional[Prompt]] = MappingProxyType(
+            dict(categories or {})
+        )
+        self.requested = requested or PromptDependencies()
+        self.epoch = epoch
+
+    @classmethod
+    async def load(
+        cls,
+        repo: "DBPromptRepo",
+        dependencies: PromptDependencies,
+    ) -> "PromptSnapshot":
+        """
+        Fetch everything in ``dependencies`` from the repository.
+
+        Each kind of lookup is a single ``IN`` query, and the category lookups
+        run concurrently.
+
+        Args:
+            repo: The repository to read from.
+            dependencies: The lookups to prefetch.
+
+        Returns:
+            A new snapshot tagged with the repository's current epoch.
+        """
+        epoch = repo.epoch
+        categories = sorted(dependencies.categories)
+
+        active, latest, fallback, *category_prompts = await asyncio.gather(
+            repo.get_active_prompts(dependencies.active) if dependencies.active else _empty(),
+            repo.get_latest_prompts(dependencies.latest) if dependencies.latest else _empty(),
+            (
+                repo.get_fallback_prompts(dependencies.fallback)
+                if dependencies.fallback
+                else _empty()
+            ),
+            *(repo.get_active_prompt_in_category(category) for category in categories),
+        )
+
+        return cls(
+            active=active,
+            latest=latest,
+            fallback=fallback,
+            categories=dict(zip(categories, category_prompts)),
+            requested=PromptDependencies().update(dependencies),
+            epoch=epoch,
+        )
+
+
+async def _empty() -> dict:
+    """Placeholder for a lookup with nothing to fetch."""
+    return {}
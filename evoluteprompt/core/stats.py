@@ -0,0 +1,281 @@
+"""
+In-process aggregation of prompt usage statistics.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from evoluteprompt.core.database import DBPromptRepo
+from evoluteprompt.core.prompt import Prompt
+from evoluteprompt.core.response import LLMResponse
+from evoluteprompt.core.usage import ModelPrice, UsageRecord, UsageWindow
+
+
+class StatsAggregator:
+    """
+    Batches prompt usage counts in memory and flushes them periodically.
+
+    Recording a use is a dictionary update, so every request can be counted
+    without a database write. Each flush issues one atomic increment per
+    (prompt, version) that was used since the previous flush.
+
+    Uses recorded with ``record_usage`` or ``record_response`` also
+    accumulate latency histograms, token counts and cost per (prompt,
+    version, model); each flush appends them to the ``prompt_usage`` table,
+    where ``DBPromptRepo.usage_summary`` reads them back.
+    """
+
+    def __init__(
+        self,
+        repo: DBPromptRepo,
+        flush_interval_ms: int = 1000,
+        pricing: Optional[Dict[str, ModelPrice]] = None,
+    ):
+        """
+        Initialize the aggregator.
+
+        Args:
+            repo: The repository to flush counts to.
+            flush_interval_ms: How often the background task flushes.
+            pricing: Prices by model name, used to compute the cost of each
+                call. A dated model name such as ``"gpt-4o-2024-08-06"`` also
+                matches the price of ``"gpt-4o"``. Unpriced calls cost 0.
+        """
+        self.repo = repo
+        self.flush_interval_ms = flush_interval_ms
+        self.pricing = dict(pricing or {})
+        # (prompt_name, version) -> [successes, failures, last_used]
+        self._pending: Dict[Tuple[str, str], list] = {}
+        # (prompt_name, version, model) -> usage since the last flush
+        self._usage: Dict[Tuple[str, str, str], UsageWindow] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, prompt_name: str, version: str, success: bool = True) -> None:
+        """
+        Record one use of a prompt version.
+
+        Args:
+            prompt_name: The name of the prompt.
+            version: The version that was used.
+            success: Whether the prompt was used successfully.
+        """
+        entry = self._pending.get((prompt_name, version))
+        if entry is None:
+            entry = self._pending[(prompt_name, version)] = [0, 0, None]
+
+        entry[0 if success else 1] += 1
+        entry[2] = datetime.now()
+
+    def record_usage(
+        self,
+        prompt_name: str,
+        version: str,
+        model: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        success: bool = True,
+        cached_tokens: Optional[int] = None,
+    ) -> None:
+        """
+        Record one call of a prompt version with its latency, tokens and cost.
+
+        The call is also counted as a use, as by ``record``.
+
+        Args:
+            prompt_name: The name of the prompt.
+            version: The version that was used.
+            model: The model that was called.
+            latency_ms: How long the call took.
+            prompt_tokens: Tokens sent to the model.
+            completion_tokens: Tokens generated by the model.
+            success: Whether the call succeeded.
+            cached_tokens: Prompt tokens served from the provider's prefix cache.
+        """
+        self.record(prompt_name, version, success)
+
+        model = model or ""
+        window = self._usage.get((prompt_name, version, model))
+        if window is None:
+            window = self._usage[(prompt_name, version, model)] = UsageWindow()
+
+        prompt_tokens = prompt_tokens or 0
+        completion_tokens = completion_tokens or 0
+        cached_tokens = cached_tokens or 0
+        window.requests += 1
+        if not success:
+            window.failures += 1
+        window.prompt_tokens += prompt_tokens
+        window.cached_tokens += cached_tokens
+        window.completion_tokens += completion_tokens
+        if latency_ms is not None:
+            window.latency.record(latency_ms)
+
+        price = self._price(model)
+        if price is not None:
+            window.cost += price.cost(prompt_tokens, completion_tokens, cached_tokens)
+
+    def record_response(
+        self,
+        prompt: Prompt,
+        response: Optional[LLMResponse] = None,
+        latency_ms: Optional[float] = None,
+        model: Optional[str] = None,
+        success: bool = True,
+    ) -> bool:
+        """
+        Record a provider call for a prompt loaded from the repository.
+
+        Args:
+            prompt: The prompt that was sent. Its name and version come from
+                its metadata, as set by the repository.
+            response: The response, for its model and token counts, or None
+                if the call failed.
+            latency_ms: How long the call took. Defaults to the latency in
+                the response's stats.
+            model: The model, if the response does not say. Defaults to the
+                prompt's model parameter.
+            success: Whether the call succeeded.
+
+        Returns:
+            False if the prompt has no name or version, i.e. it was not
+            loaded from a repository, so nothing was recorded.
+        """
+        metadata = prompt.metadata
+        if metadata is None or metadata.name is None or metadata.version is None:
+            return False
+
+        stats = response.stats if response is not None else None
+        if latency_ms is None and stats is not None:
+            latency_ms = stats.latency_ms
+        if response is not None and response.model:
+            model = response.model
+        elif model is None and prompt.parameters is not None:
+            model = prompt.parameters.model
+
+        self.record_usage(
+            metadata.name,
+            metadata.version,
+            model=model,
+            latency_ms=latency_ms,
+            prompt_tokens=stats.prompt_tokens if stats is not None else None,
+            completion_tokens=stats.completion_tokens if stats is not None else None,
+            success=success,
+            cached_tokens=stats.cached_tokens if stats is not None else None,
+        )
+        return True
+
+    def _price(self, model: str) -> Optional[ModelPrice]:
+        """Find the price of a model, falling back to the longest priced prefix."""
+        price = self.pricing.get(model)
+        if price is None and model:
+            prefixes = [name for name in self.pricing if model.startswith(name + "-")]
+            if prefixes:
+                price = self.pricing[max(prefixes, key=len)]
+        return price
+
+    @property
+    def pending(self) -> int:
+        """Number of recorded uses not yet flushed."""
+        return sum(entry[0] + entry[1] for entry in self._pending.values())
+
+    async def flush(self) -> int:
+        """
+        Write all pending counts to the repository.
+
+        Counts that fail to write are kept and retried on the next flush.
+
+        Returns:
+            The number of uses written.
+        """
+        pending, self._pending = self._pending, {}
+        usage, self._usage = self._usage, {}
+        written = 0
+
+        if usage:
+            now = datetime.now()
+            records = [
+                UsageRecord(
+                    name=name,
+                    version=version,
+                    model=model,
+                    window_start=window.started_at,
+                    window_end=now,
+                    requests=window.requests,
+                    failures=window.failures,
+                    prompt_tokens=window.prompt_tokens,
+                    cached_tokens=window.cached_tokens,
+                    completion_tokens=window.completion_tokens,
+                    cost=window.cost,
+                    latency=window.latency.to_dict(),
+                )
+                for (name, version, model), window in usage.items()
+            ]
+            try:
+                await self.repo.add_usage(records)
+            except Exception:
+                for usage_key, window in usage.items():
+                    self._usage.setdefault(usage_key, UsageWindow()).merge(window)
+                for pending_key, counts in pending.items():
+                    self._merge(pending_key, counts)
+                raise
+
+        items = list(pending.items())
+        for i, ((prompt_name, version), (successes, failures, last_used)) in enumerate(items):
+            try:
+                await self.repo.increment_stats(
+                    prompt_name,
+                    version,
+                    successes=successes,
+                    failures=failures,
+                    last_used=last_used,
+                )
+            except Exception:
+                for pending_key, counts in items[i:]:
+                    self._merge(pending_key, counts)
+                raise
+            written += successes + failures
+
+        return written
+
+    def _merge(self, key: Tuple[str, str], counts: list) -> None:
+        """Put unflushed counts back into the pending batch."""
+        entry = self._pending.setdefault(key, [0, 0, None])
+        entry[0] += counts[0]
+        entry[1] += counts[1]
+        entry[2] = max(d for d in (entry[2], counts[2]) if d is not None)
+
+    def start(self) -> None:
+        """Start flushing in the background on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and flush whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+
+    async def _run(self) -> None:
+        """Flush loop run by the background task."""
+        while True:
+            await asyncio.sleep(self.flush_interval_ms / 1000)
+            try:
+                await self.flush()
+            except Exception:
+                # The counts were kept; try again on the next tick
+                pass
+
+    async def __aenter__(self) -> "StatsAggregator":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
@@ -2,12 +2,34 @@
 Strategy patterns for prompt selection and fallback management.
 """
 
+import asyncio
+import random
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-from evoluteprompt.core.database import DBPromptRepo
 from evoluteprompt.core.prompt import Prompt
+from evoluteprompt.core.snapshot import PromptDependencies, PromptSnapshot
 from evoluteprompt.core.types import PromptCategory
+from evoluteprompt.utils.instrumentation import traced
+from evoluteprompt.utils.sampling import AliasTable, stable_uniform
+
+if TYPE_CHECKING:
+    from evoluteprompt.core.database import DBPromptRepo
+
+
+def _combine(*dependencies: Optional[PromptDependencies]) -> Optional[PromptDependencies]:
+    """Merge child dependencies, or return None if any child cannot be compiled."""
+    combined = PromptDependencies()
+    for child in dependencies:
+        if child is None:
+            return None
+        combined.update(child)
+    return combined
+
+
+def _copy(prompt: Optional[Prompt]) -> Optional[Prompt]:
+    """Copy a prompt taken from a shared snapshot before handing it out."""
+    return prompt.model_copy(deep=True) if prompt is not None else None
 
 
 class PromptStrategy(ABC):
@@ -29,11 +51,45 @@ class PromptStrategy(ABC):
         """
         pass
 
+    def dependencies(self, prompt_name: str) -> Optional[PromptDependencies]:
+        """
+        Describe the repository lookups ``select_prompt`` may perform.
+
+        Strategies that return dependencies must also implement
+        ``select_from_snapshot``, which lets them be compiled.
+
+        Args:
+            prompt_name: The name of the prompt.
+
+        Returns:
+            The dependencies, or None if the strategy cannot be compiled.
+        """
+        return None
+
+    def select_from_snapshot(
+        self,
+        snapshot: PromptSnapshot,
+        prompt_name: str,
+        context: Dict[str, Any] = None,
+    ) -> Optional[Prompt]:
+        """
+        Select a prompt from prefetched data, without any I/O.
+
+        Args:
+            snapshot: A snapshot covering ``dependencies(prompt_name)``.
+            prompt_name: The name of the prompt.
+            context: Additional context for prompt selection.
+
+        Returns:
+            The selected prompt, or None if not found.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot be compiled")
+
 
 class ActivePromptStrategy(PromptStrategy):
     """Strategy that selects the active prompt."""
 
-    def __init__(self, repo: DBPromptRepo):
+    def __init__(self, repo: "DBPromptRepo"):
         """
         Initialize the strategy.
 
@@ -57,11 +113,24 @@ class ActivePromptStrategy(PromptStrategy):
         """
         return await self.repo.get_active_prompt(prompt_name)
 
+    def dependencies(self, prompt_name: str) -> Optional[PromptDependencies]:
+        """Depend on the active prompt for ``prompt_name``."""
+        return PromptDependencies(active=[prompt_name])
+
+    def select_from_snapshot(
+        self,
+        snapshot: PromptSnapshot,
+        prompt_name: str,
+        context: Dict[str, Any] = None,
+    ) -> Optional[Prompt]:
+        """Select the active prompt from the snapshot."""
+        return snapshot.active.get(prompt_name)
+
 
 class FallbackPromptStrategy(PromptStrategy):
     """Strategy that selects a prompt with fallback."""
 
-    def __init__(self, repo: DBPromptRepo, primary_strategy: PromptStrategy):
+    def __init__(self, repo: "DBPromptRepo", primary_strategy: PromptStrategy):
         """
         Initialize the strategy.
 
@@ -93,11 +162,31 @@ class FallbackPromptStrategy(PromptStrategy):
         # Fall back to the fallback prompt
         return await self.repo.get_fallback_prompt(prompt_name)
 
+    def dependencies(self, prompt_name: str) -> Optional[PromptDependencies]:
+        """Depend on the primary strategy's lookups plus the fallback."""
+        return _combine(
+            self.primary_strategy.dependencies(prompt_name),
+            PromptDependencies(fallback=[prompt_name]),
+        )
+
+    def select_from_snapshot(
+        self,
+        snapshot: PromptSnapshot,
+        prompt_name: str,
+        context: Dict[str, Any] = None,
+    ) -> Optional[Prompt]:
+        """Select from the primary strategy, then the fallback, from the snapshot."""
+        prompt = self.primary_strategy.select_from_snapshot(snapshot, prompt_name, context)
+        if prompt is not None:
+            return prompt
+
+        return snapshot.fallback.get(prompt_name)
+
 
 class LatestPromptStrategy(PromptStrategy):
     """Strategy that selects the latest prompt version."""
 
-    def __init__(self, repo: DBPromptRepo):
+    def __init__(self, repo: "DBPromptRepo"):
         """
         Initialize the strategy.
 
@@ -121,13 +210,26 @@ class LatestPromptStrategy(PromptStrategy):
         """
         return await self.repo.get_prompt(prompt_name)
 
+    def dependencies(self, prompt_name: str) -> Optional[PromptDependencies]:
+        """Depend on the latest version of ``prompt_name``."""
+        return PromptDependencies(latest=[prompt_name])
+
+    def select_from_snapshot(
+        self,
+        snapshot: PromptSnapshot,
+        prompt_name: str,
+        context: Dict[str, Any] = None,
+    ) -> Optional[Prompt]:
+        """Select the latest prompt version from the snapshot."""
+        return snapshot.latest.get(prompt_name)
+
 
 class ConditionalPromptStrategy(PromptStrategy):
     """Strategy that selects a prompt based on a condition."""
 
     def __init__(
         self,
-        repo: DBPromptRepo,
+        repo: "DBPromptRepo",
         condition_fn: Callable[[Dict[str, Any]], bool],
         if_true: PromptStrategy,
         if_false: PromptStrategy,
@@ -166,57 +268,160 @@ class ConditionalPromptStrategy(PromptStrategy):
         else:
             return await self.if_false.select_prompt(prompt_name, context)
 
+    def dependencies(self, prompt_name: str) -> Optional[PromptDependencies]:
+        """Depend on the lookups of both branches."""
+        return _combine(
+            self.if_true.dependencies(prompt_name),
+            self.if_false.dependencies(prompt_name),
+        )
+
+    def select_from_snapshot(
+        self,
+        snapshot: PromptSnapshot,
+        prompt_name: str,
+        context: Dict[str, Any] = None,
+    ) -> Optional[Prompt]:
+        """Evaluate the condition and select from the chosen branch."""
+        context = context or {}
+
+        branch = self.if_true if self.condition_fn(context) else self.if_false
+        return branch.select_from_snapshot(snapshot, prompt_name, context)
+
 
 class ABTestingPromptStrategy(PromptStrategy):
-    """Strategy that randomly selects between different prompts for A/B testing."""
+    """
+    Strategy that splits traffic between different prompts for A/B testing.
+
+    When ``sticky_key`` is set and present in the context, the variant is
+    chosen by hashing its value, so the same user always sees the same
+    variant. Without it, variants are drawn at random. Either way, selection
+    is a single lookup in a precomputed alias table.
+    """
 
     def __init__(self,
-                 repo: DBPromptRepo,
+                 repo: "DBPromptRepo",
                  prompt_variants: List[str],
-                 weights: Optional[List[float]] = None):
+                 weights: Optional[List[float]] = None,
+                 sticky_key: Optional[str] = None,
+                 salt: Optional[str] = None,
+                 rng: Optional[random.Random] = None):
         """
         Initialize the strategy.
 
         Args:
             repo: The prompt repository.
             prompt_variants: List of prompt names to test.
-            weights: Optional weights for the variants (must sum to 1.0).
+            weights: Optional relative weights for the variants. Defaults to an
+                even split.
+            sticky_key: Optional context key (e.g. ``"user_id"``) whose value
+                determines the variant.
+            salt: Namespace for the hash, so that separate experiments bucket
+                users independently. Defaults to the variant names.
+            rng: Random generator for non-sticky draws. Pass a seeded one for
+                reproducible results.
         """
-        import random
-
         self.repo = repo
         self.prompt_variants = prompt_variants
+        self.sticky_key = sticky_key
+        self.salt = salt if salt is not None else ",".join(prompt_variants)
+        self.random = rng or random.Random()
+        self.exposures: Dict[str, int] = {name: 0 for name in prompt_variants}
+        self.weights: Optional[List[float]] = None
+        self._table: Optional[AliasTable] = None
+        self.set_weights(weights)
+
+    def set_weights(self, weights: Optional[List[float]]) -> None:
+        """
+        Change the traffic split.
+
+        The new table is built before it is swapped in, so concurrent
+        selections see either the old or the new split. Sticky users keep
+        their variant unless the change moves their bucket.
+
+        Args:
+            weights: Relative weights for the variants, or None for an even
+                split.
+
+        Raises:
+            ValueError: If the number of weights does not match the variants.
+        """
+        if weights is not None and len(weights) != len(self.prompt_variants):
+            raise ValueError(
+                f"Expected {len(self.prompt_variants)} weights, got {len(weights)}"
+            )
+
+        table = None
+        if self.prompt_variants:
+            table = AliasTable(weights or [1.0] * len(self.prompt_variants))
+
         self.weights = weights
-        self.random = random
+        self._table = table
+
+    def choose_variant(self, context: Dict[str, Any] = None) -> Optional[str]:
+        """
+        Pick a variant name and record the exposure.
+
+        Args:
+            context: Additional context; only ``sticky_key`` is read.
+
+        Returns:
+            The name of the selected variant, or None if there are none.
+        """
+        table = self._table
+        if table is None:
+            return None
+
+        key = context.get(self.sticky_key) if context and self.sticky_key else None
+        if key is None:
+            index = table.sample(self.random)
+        else:
+            index = table.pick(stable_uniform(str(key), self.salt))
+
+        variant_name = self.prompt_variants[index]
+        self.exposures[variant_name] += 1
+        return variant_name
 
     async def select_prompt(
         self, prompt_name: str, context: Dict[str, Any] = None
     ) -> Optional[Prompt]:
         """
-        Randomly select a prompt variant for A/B testing.
+        Select a prompt variant for A/B testing.
 
         Args:
             prompt_name: The name of the prompt (ignored).
-            context: Additional context for prompt selection (not used).
+            context: Additional context for prompt selection.
 
         Returns:
-            A randomly selected prompt, or None if none are found.
+            The active prompt of the selected variant, or None if none are found.
         """
-        if not self.prompt_variants:
+        variant_name = self.choose_variant(context)
+        if variant_name is None:
             return None
 
-        # Randomly select a variant
-        variant_name = self.random.choices(
-            self.prompt_variants, weights=self.weights, k=1)[0]
-
         # Get the active prompt for the selected variant
         return await self.repo.get_active_prompt(variant_name)
 
+    def dependencies(self, prompt_name: str) -> Optional[PromptDependencies]:
+        """Depend on the active prompt of every variant."""
+        return PromptDependencies(active=self.prompt_variants)
+
+    def select_from_snapshot(
+        self,
+        snapshot: PromptSnapshot,
+        prompt_name: str,
+        context: Dict[str, Any] = None,
+    ) -> Optional[Prompt]:
+        """Select a variant from the snapshot."""
+        variant_name = self.choose_variant(context)
+        if variant_name is None:
+            return None
+        return snapshot.active.get(variant_name)
+
 
 class ContextAwarePromptStrategy(PromptStrategy):
     """Strategy that selects a prompt based on context."""
 
-    def __init__(self, repo: DBPromptRepo, context_key: str,
+    def __init__(self, repo: "DBPromptRepo", context_key: str,
                  prompt_mapping: Dict[Any, str]):
         """
         Initialize the strategy.
@@ -256,11 +461,30 @@ class ContextAwarePromptStrategy(PromptStrategy):
         # Otherwise, use the default prompt
         return await self.repo.get_active_prompt(prompt_name)
 
+    def dependencies(self, prompt_name: str) -> Optional[PromptDependencies]:
+        """Depend on the default prompt and every mapped prompt."""
+        return PromptDependencies(active=[prompt_name, *self.prompt_mapping.values()])
+
+    def select_from_snapshot(
+        self,
+        snapshot: PromptSnapshot,
+        prompt_name: str,
+        context: Dict[str, Any] = None,
+    ) -> Optional[Prompt]:
+        """Select the mapped or default prompt from the snapshot."""
+        context = context or {}
+
+        context_value = context.get(self.context_key)
+        if context_value in self.prompt_mapping:
+            return snapshot.active.get(self.prompt_mapping[context_value])
+
+        return snapshot.active.get(prompt_name)
+
 
 class CategoryPromptStrategy(PromptStrategy):
     """Strategy that selects a prompt based on category."""
 
-    def __init__(self, repo: DBPromptRepo, category: PromptCategory):
+    def __init__(self, repo: "DBPromptRepo", category: PromptCategory):
         """
         Initialize the strategy.
 
@@ -290,15 +514,147 @@ class CategoryPromptStrategy(PromptStrategy):
         if prompt_model is not None and prompt_model.metadata.category == self.category:
             return prompt_model
 
-        # If not found, get the first active prompt in this category
-        prompt_names = await self.repo.list_prompts(category=self.category)
+        # If not found, get the highest-priority active prompt in this category
+        return await self.repo.get_active_prompt_in_category(self.category)
 
-        for name in prompt_names:
-            prompt = await self.repo.get_active_prompt(name)
-            if prompt is not None:
-                return prompt
+    def dependencies(self, prompt_name: str) -> Optional[PromptDependencies]:
+        """Depend on the named prompt and the top prompt of the category."""
+        return PromptDependencies(active=[prompt_name], categories=[self.category])
 
-        return None
+    def select_from_snapshot(
+        self,
+        snapshot: PromptSnapshot,
+        prompt_name: str,
+        context: Dict[str, Any] = None,
+    ) -> Optional[Prompt]:
+        """Select the named or top category prompt from the snapshot."""
+        prompt = snapshot.active.get(prompt_name)
+        if prompt is not None and prompt.metadata and prompt.metadata.category == self.category:
+            return prompt
+
+        return snapshot.categories.get(self.category)
+
+
+class CompiledStrategy(PromptStrategy):
+    """
+    A strategy tree evaluated against a prefetched prompt snapshot.
+
+    Compiling walks the tree once and collects every lookup it could make for
+    the given prompt names. Those prompts are loaded into an immutable
+    snapshot with a handful of bulk queries. Selection is then in-memory
+    evaluation of the tree. The snapshot is reloaded when the repository's
+    epoch changes, i.e. after a write through the repository.
+    """
+
+    def __init__(
+        self,
+        repo: "DBPromptRepo",
+        strategy: PromptStrategy,
+        prompt_names: Iterable[str],
+    ):
+        """
+        Initialize the strategy.
+
+        Args:
+            repo: The prompt repository.
+            strategy: The strategy tree to compile.
+            prompt_names: The prompt names this strategy will be asked for.
+                Other names are passed through to ``strategy`` uncompiled.
+
+        Raises:
+            ValueError: If a strategy in the tree cannot be compiled.
+        """
+        self.repo = repo
+        self.strategy = strategy
+        self.prompt_names = frozenset(prompt_names)
+
+        dependencies = _combine(*(strategy.dependencies(name) for name in self.prompt_names))
+        if dependencies is None:
+            raise ValueError(
+                f"{type(strategy).__name__} contains a strategy that cannot be compiled"
+            )
+
+        self._dependencies = dependencies
+        self.snapshot: Optional[PromptSnapshot] = None
+        self._refresh_lock = asyncio.Lock()
+
+    @traced("selector.refresh")
+    async def refresh(self) -> PromptSnapshot:
+        """
+        Reload the snapshot from the repository.
+
+        Returns:
+            The new snapshot.
+        """
+        async with self._refresh_lock:
+            snapshot = self.snapshot
+            if snapshot is None or snapshot.epoch != self.repo.epoch:
+                snapshot = await PromptSnapshot.load(self.repo, self._dependencies)
+                self.snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the snapshot so the next async selection reloads it."""
+        self.snapshot = None
+
+    def select(self, prompt_name: str, context: Dict[str, Any] = None) -> Optional[Prompt]:
+        """
+        Select a prompt from the current snapshot, without any I/O.
+
+        The prompt is a copy, so callers may change it freely.
+
+        Args:
+            prompt_name: The name of the prompt. Must be one of the compiled names.
+            context: Additional context for prompt selection.
+
+        Returns:
+            The selected prompt, or None if not found.
+
+        Raises:
+            RuntimeError: If the snapshot has not been loaded yet.
+            KeyError: If ``prompt_name`` was not compiled.
+        """
+        if self.snapshot is None:
+            raise RuntimeError("Snapshot not loaded; await refresh() first")
+        if prompt_name not in self.prompt_names:
+            raise KeyError(prompt_name)
+
+        return _copy(self.strategy.select_from_snapshot(self.snapshot, prompt_name, context))
+
+    async def select_prompt(
+        self, prompt_name: str, context: Dict[str, Any] = None
+    ) -> Optional[Prompt]:
+        """
+        Select a prompt, reloading the snapshot first if it is stale.
+
+        Args:
+            prompt_name: The name of the prompt.
+            context: Additional context for prompt selection.
+
+        Returns:
+            The selected prompt, or None if not found.
+        """
+        if prompt_name not in self.prompt_names:
+            return await self.strategy.select_prompt(prompt_name, context)
+
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.epoch != self.repo.epoch:
+            snapshot = await self.refresh()
+
+        return _copy(self.strategy.select_from_snapshot(snapshot, prompt_name, context))
+
+    def dependencies(self, prompt_name: str) -> Optional[PromptDependencies]:
+        """Depend on the lookups of the wrapped strategy."""
+        return self.strategy.dependencies(prompt_name)
+
+    def select_from_snapshot(
+        self,
+        snapshot: PromptSnapshot,
+        prompt_name: str,
+        context: Dict[str, Any] = None,
+    ) -> Optional[Prompt]:
+        """Select from the wrapped strategy."""
+        return self.strategy.select_from_snapshot(snapshot, prompt_name, context)
 
 
 class PromptSelector:
@@ -308,7 +664,7 @@ class PromptSelector:
 
     def __init__(
             self,
-            repo: DBPromptRepo,
+            repo: "DBPromptRepo",
             default_strategy: PromptStrategy = None):
         """
         Initialize the prompt selector.
@@ -326,6 +682,7 @@ class PromptSelector:
             repo, self.active_strategy)
         self.latest_strategy = LatestPromptStrategy(repo)
 
+    @traced("selector.select_prompt", attribute="prompt_name")
     async def select_prompt(
         self,
         prompt_name: str,
@@ -346,8 +703,74 @@ class PromptSelector:
         strategy = strategy or self.default_strategy
         return await strategy.select_prompt(prompt_name, context)
 
+    @traced("selector.select_prompts")
+    async def select_prompts(
+        self,
+        requests: Iterable[
+            Tuple[str, Optional[PromptStrategy], Optional[Dict[str, Any]]]
+        ],
+    ) -> List[Optional[Prompt]]:
+        """
+        Select prompts for many requests at once.
+
+        The lookups of all requests are merged and fetched in one snapshot,
+        so requests that resolve to the same prompts share a single bulk
+        query instead of issuing one query each. Requests whose strategy
+        cannot be compiled are selected individually.
+
+        Args:
+            requests: ``(prompt_name, strategy, context)`` tuples. A strategy
+                of None uses the default strategy.
+
+        Returns:
+            The selected prompts, in the same order as ``requests``. Each is a
+            separate copy.
+        """
+        resolved: List[Tuple[str, PromptStrategy, Optional[Dict[str, Any]]]] = [
+            (prompt_name, strategy or self.default_strategy, context)
+            for prompt_name, strategy, context in requests
+        ]
+
+        # Dependencies only vary by strategy and name, not by context
+        dependencies: Dict[Tuple[int, str], Optional[PromptDependencies]] = {}
+        merged = PromptDependencies()
+        for prompt_name, strategy, _ in resolved:
+            key = (id(strategy), prompt_name)
+            if key not in dependencies:
+                needed = dependencies[key] = strategy.dependencies(prompt_name)
+                if needed is not None:
+                    merged.update(needed)
+
+        snapshot = await PromptSnapshot.load(self.repo, merged) if merged else PromptSnapshot()
+
+        # Requests for the same prompt get separate copies, so callers can
+        # change their result without affecting the others
+        results: List[Optional[Prompt]] = [None] * len(resolved)
+        uncompiled = []
+        for i, (prompt_name, strategy, context) in enumerate(resolved):
+            if dependencies[(id(strategy), prompt_name)] is None:
+                uncompiled.append(i)
+            else:
+                results[i] = _copy(
+                    strategy.select_from_snapshot(snapshot, prompt_name, context)
+                )
+
+        if uncompiled:
+            selected = await asyncio.gather(
+                *(resolved[i][1].select_prompt(resolved[i][0], resolved[i][2])
+                  for i in uncompiled)
+            )
+            for i, prompt in zip(uncompiled, selected):
+                results[i] = prompt
+
+        return results
+
     def create_ab_testing_strategy(
-        self, prompt_variants: List[str], weights: Optional[List[float]] = None
+        self,
+        prompt_variants: List[str],
+        weights: Optional[List[float]] = None,
+        sticky_key: Optional[str] = None,
+        salt: Optional[str] = None,
     ) -> ABTestingPromptStrategy:
         """
         Create an A/B testing strategy.
@@ -355,11 +778,15 @@ class PromptSelector:
         Args:
             prompt_variants: List of prompt names to test.
             weights: Optional weights for the variants.
+            sticky_key: Optional context key whose value determines the variant.
+            salt: Namespace for sticky assignment. Defaults to the variant names.
 
         Returns:
             An A/B testing strategy.
         """
-        return ABTestingPromptStrategy(self.repo, prompt_variants, weights)
+        return ABTestingPromptStrategy(
+            self.repo, prompt_variants, weights, sticky_key=sticky_key, salt=salt
+        )
 
     def create_context_aware_strategy(
         self, context_key: str, prompt_mapping: Dict[Any, str]
@@ -397,6 +824,26 @@ class PromptSelector:
         return ConditionalPromptStrategy(
             self.repo, condition_fn, if_true, if_false)
 
+    @traced("selector.compile_strategy")
+    async def compile_strategy(
+        self,
+        strategy: PromptStrategy,
+        prompt_names: Iterable[str],
+    ) -> CompiledStrategy:
+        """
+        Compile a strategy tree and load its snapshot.
+
+        Args:
+            strategy: The strategy to compile.
+            prompt_names: The prompt names the strategy will be asked for.
+
+        Returns:
+            A compiled strategy with its snapshot loaded.
+        """
+        compiled = CompiledStrategy(self.repo, strategy, prompt_names)
+        await compiled.refresh()
+        return compiled
+
     def create_category_strategy(
             self, category: PromptCategory) -> CategoryPromptStrategy:
         """
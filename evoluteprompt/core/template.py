@@ -2,14 +2,193 @@
 Template functionality for the EvolutePrompt library.
 """
 
-import re
-from typing import Any, Dict, List, Optional, Union
+import copy
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Set, Tuple, Union, cast
 
+from jinja2 import Environment, meta, nodes
 from jinja2 import Template as JinjaTemplate
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 from evoluteprompt.core.prompt import Prompt, PromptBuilder
 from evoluteprompt.core.types import MessageRole
+from evoluteprompt.utils.instrumentation import traced
+
+# Same settings as ``jinja2.Template(source)``
+_environment = Environment()
+
+# Top-level statements whose effects reach later parts of the template, which
+# therefore cannot be rendered on their own
+_STATEFUL_NODES = (
+    nodes.Assign,
+    nodes.AssignBlock,
+    nodes.Block,
+    nodes.Extends,
+    nodes.FromImport,
+    nodes.Import,
+    nodes.Macro,
+)
+
+
+class MissingVariableError(ValueError):
+    """Raised when a template is rendered without a variable it needs."""
+
+    def __init__(self, missing: List[str]):
+        self.missing = missing
+        super().__init__(f"Missing template variables: {', '.join(missing)}")
+
+
+class _Segment:
+    """A run of a template that is either constant or rendered on each call."""
+
+    __slots__ = ("text", "template", "names")
+
+    def __init__(self, text: Optional[str], template: JinjaTemplate, names: FrozenSet[str]):
+        self.text = text
+        self.template = template
+        self.names = names
+
+
+class CompiledTemplate:
+    """
+    A template parsed once, with the parts that only use defaults pre-rendered.
+
+    The template is split into top-level segments. Plain text, and segments
+    whose variables all have defaults, are rendered once at compile time;
+    rendering only evaluates the remaining segments, and the constant ones
+    whose defaults are overridden.
+    """
+
+    def __init__(self, source: str, defaults: Optional[Mapping[str, Any]] = None):
+        """
+        Compile a template.
+
+        Args:
+            source: The Jinja template.
+            defaults: Default variables. They are deep-copied, so changing
+                a default in place afterwards does not change the compiled
+                template.
+        """
+        self.source = source
+        # A private copy, so comparing it with the caller's defaults detects
+        # in-place changes that would otherwise leave stale folded text
+        self.defaults = copy.deepcopy(dict(defaults or {}))
+
+        ast = _environment.parse(source)
+        self.variables: FrozenSet[str] = frozenset(meta.find_undeclared_variables(ast))
+        optional = _optional_names(ast)
+        self.required: FrozenSet[str] = frozenset(
+            (self.variables & _unconditional_names(ast)) - optional - self.defaults.keys()
+        )
+
+        if any(isinstance(node, _STATEFUL_NODES) for node in ast.body):
+            self._segments = [_Segment(None, _environment.from_string(ast), self.variables)]
+        else:
+            self._segments = self._fold(ast)
+
+    def _fold(self, ast: nodes.Template) -> List[_Segment]:
+        """Group top-level nodes into constant and dynamic segments."""
+        pieces: List[Tuple[nodes.Node, FrozenSet[str]]] = []
+        for top in ast.body:
+            children = top.nodes if isinstance(top, nodes.Output) else [top]
+            for child in children:
+                if isinstance(top, nodes.Output):
+                    child = nodes.Output([child], lineno=child.lineno)
+                child_names = frozenset(meta.find_undeclared_variables(_subtemplate([child])))
+                pieces.append((child, child_names))
+
+        segments: List[_Segment] = []
+        group: List[nodes.Node] = []
+        group_names: Set[str] = set()
+        constant = True
+        end: Tuple[Optional[nodes.Node], FrozenSet[str]] = (None, frozenset())
+        for node, node_names in [*pieces, end]:
+            node_constant = node_names <= self.defaults.keys()
+            if group and (node is None or node_constant != constant):
+                template = _environment.from_string(_subtemplate(group))
+                text = template.render(self.defaults) if constant else None
+                segments.append(_Segment(text, template, frozenset(group_names)))
+                group, group_names = [], set()
+            if node is not None:
+                group.append(node)
+                group_names |= node_names
+                constant = node_constant
+        return segments
+
+    def render(self, variables: Optional[Mapping[str, Any]] = None) -> str:
+        """
+        Render the template.
+
+        Args:
+            variables: Variables that override or add to the defaults.
+
+        Returns:
+            The rendered template.
+
+        Raises:
+            MissingVariableError: If a required variable is not given.
+        """
+        variables = variables or {}
+        if self.required:
+            missing = self.required.difference(variables)
+            if missing:
+                raise MissingVariableError(sorted(missing))
+
+        merged: Optional[Dict[str, Any]] = None
+        parts = []
+        for segment in self._segments:
+            if segment.text is not None and segment.names.isdisjoint(variables):
+                parts.append(segment.text)
+                continue
+            if merged is None:
+                merged = {**self.defaults, **variables}
+            parts.append(segment.template.render(merged))
+        return "".join(parts)
+
+
+def _subtemplate(body: List[nodes.Node]) -> nodes.Template:
+    """Wrap top-level nodes into a template of their own."""
+    return cast(nodes.Template, nodes.Template(body, lineno=1).set_environment(_environment))
+
+
+def _optional_names(ast: nodes.Template) -> Set[str]:
+    """Find the variables guarded by ``is defined`` tests or ``default`` filters."""
+    optional = set()
+    for node in ast.find_all((nodes.Test, nodes.Filter)):
+        if isinstance(node, nodes.Test) and node.name not in ("defined", "undefined"):
+            continue
+        if isinstance(node, nodes.Filter) and node.name not in ("default", "d"):
+            continue
+        if isinstance(node.node, nodes.Name):
+            optional.add(node.node.name)
+    return optional
+
+
+def _unconditional_names(ast: nodes.Template) -> Set[str]:
+    """Find the variables read outside the branches of ``if`` and ``for`` blocks."""
+    names = set()
+    stack: List[nodes.Node] = [ast]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, nodes.Name) and node.ctx == "load":
+            names.add(node.name)
+        elif isinstance(node, (nodes.If, nodes.CondExpr)):
+            # Only the first test always runs
+            stack.append(node.test)
+            continue
+        elif isinstance(node, nodes.For):
+            stack.append(node.iter)
+            continue
+        stack.extend(node.iter_child_nodes())
+    return names
+
+
+def _compile(cache: Dict[str, CompiledTemplate], source: str,
+             defaults: Dict[str, Any]) -> CompiledTemplate:
+    """Get a compiled template, compiling it again if it or its defaults changed."""
+    compiled = cache.get(source)
+    if compiled is None or compiled.defaults != defaults:
+        compiled = cache[source] = CompiledTemplate(source, defaults)
+    return compiled
 
 
 class PromptTemplate(BaseModel):
@@ -20,6 +199,8 @@ class PromptTemplate(BaseModel):
     template: str
     variables: Dict[str, Any] = {}
 
+    _compiled: Dict[str, CompiledTemplate] = PrivateAttr(default_factory=dict)
+
     @classmethod
     def from_string(cls, template_str: str, variables: Dict[str, Any] = None):
         """
@@ -34,6 +215,25 @@ class PromptTemplate(BaseModel):
         """
         return cls(template=template_str, variables=variables or {})
 
+    @traced("template.compile")
+    def compile(self) -> CompiledTemplate:
+        """
+        Parse the template and pre-render the parts that only use defaults.
+
+        The result is cached, and compiled again when the template or the
+        default variables change.
+
+        Returns:
+            The compiled template.
+        """
+        return _compile(self._compiled, self.template, self.variables)
+
+    @property
+    def required_variables(self) -> List[str]:
+        """The variables that must be passed to ``render``."""
+        return sorted(self.compile().required)
+
+    @traced("template.render")
     def render(self, **kwargs) -> str:
         """
         Render the template with the given variables.
@@ -43,13 +243,14 @@ class PromptTemplate(BaseModel):
 
         Returns:
             The rendered template.
-        """
-        # Merge provided variables with default variables
-        variables = {**self.variables, **kwargs}
 
-        # Create a Jinja template and render it
-        jinja_template = JinjaTemplate(self.template)
-        return jinja_template.render(**variables)
+        Raises:
+            MissingVariableError: If a variable without a default is not given.
+                Variables only used behind ``is defined`` or ``default``, or
+                inside ``if`` and ``for`` blocks, are optional.
+        """
+        compiled: CompiledTemplate = self.compile()
+        return compiled.render(kwargs)
 
     def to_prompt(
         self,
@@ -103,6 +304,12 @@ class MultiMessageTemplate(BaseModel):
     assistant_templates: List[str] = []
     variables: Dict[str, Any] = {}
 
+    _compiled: Dict[str, CompiledTemplate] = PrivateAttr(default_factory=dict)
+
+    def _render(self, source: str, variables: Dict[str, Any]) -> str:
+        return _compile(self._compiled, source, self.variables).render(variables)
+
+    @traced("template.render_messages")
     def render(self, **kwargs) -> List[Dict[str, str]]:
         """
         Render all templates with the given variables.
@@ -112,17 +319,16 @@ class MultiMessageTemplate(BaseModel):
 
         Returns:
             A list of rendered messages.
-        """
-        # Merge provided variables with default variables
-        variables = {**self.variables, **kwargs}
 
+        Raises:
+            MissingVariableError: If a variable without a default is not given.
+        """
         messages = []
 
         # Add system message if provided
         if self.system_template:
-            system_template = JinjaTemplate(self.system_template)
             messages.append({"role": "system",
-                             "content": system_template.render(**variables)})
+                             "content": self._render(self.system_template, kwargs)})
 
         # Add user and assistant messages alternating
         max_len = max(len(self.user_templates), len(self.assistant_templates))
@@ -130,15 +336,14 @@ class MultiMessageTemplate(BaseModel):
         for i in range(max_len):
             # Add user message if available
             if i < len(self.user_templates):
-                user_template = JinjaTemplate(self.user_templates[i])
                 messages.append({"role": "user",
-                                 "content": user_template.render(**variables)})
+                                 "content": self._render(self.user_templates[i], kwargs)})
 
             # Add assistant message if available
             if i < len(self.assistant_templates):
-                assistant_template = JinjaTemplate(self.assistant_templates[i])
                 messages.append(
-                    {"role": "assistant", "content": assistant_template.render(**variables)}
+                    {"role": "assistant",
+                     "content": self._render(self.assistant_templates[i], kwargs)}
                 )
 
         return messages
@@ -48,6 +48,7 @@ class PromptMetadata(BaseModel):
     """Metadata for a prompt."""
 
     version: str
+    name: Optional[str] = None  # Set by the repository on save
     description: Optional[str] = None
     tags: List[str] = Field(default_factory=list)
     created_at: Optional[str] = None
@@ -67,6 +68,7 @@ class PromptStats(BaseModel):
     character_count: Optional[int] = None
     completion_tokens: Optional[int] = None
     prompt_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None  # Prompt tokens served from the provider's prefix cache
     total_tokens: Optional[int] = None
     latency_ms: Optional[float] = None
     success_count: int = 0
@@ -0,0 +1,163 @@
+"""
+Latency, token and cost accounting per prompt version and model.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+from evoluteprompt.utils.histogram import LatencyHistogram
+
+
+class ModelPrice(BaseModel):
+    """The price of a model, in any currency, per million tokens."""
+
+    input_per_million: float = 0.0
+    output_per_million: float = 0.0
+    cached_input_per_million: Optional[float] = None  # Defaults to the input price
+
+    def cost(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+        """
+        Compute the cost of a call.
+
+        Args:
+            prompt_tokens: Tokens sent to the model, including cached ones.
+            completion_tokens: Tokens generated by the model.
+            cached_tokens: Prompt tokens served from the provider's prefix cache.
+
+        Returns:
+            The cost.
+        """
+        cached_price = self.cached_input_per_million
+        if cached_price is None:
+            cached_price = self.input_per_million
+        return (
+            (prompt_tokens - cached_tokens) * self.input_per_million
+            + cached_tokens * cached_price
+            + completion_tokens * self.output_per_million
+        ) / 1_000_000
+
+
+class UsageWindow:
+    """Usage of one (prompt, version, model) accumulated between two flushes."""
+
+    __slots__ = (
+        "requests",
+        "failures",
+        "prompt_tokens",
+        "cached_tokens",
+        "completion_tokens",
+        "cost",
+        "latency",
+        "started_at",
+    )
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.latency = LatencyHistogram()
+        self.started_at = datetime.now()
+
+    def merge(self, other: "UsageWindow") -> None:
+        """
+        Add another window's usage to this one.
+
+        Args:
+            other: The window to add.
+        """
+        self.requests += other.requests
+        self.failures += other.failures
+        self.prompt_tokens += other.prompt_tokens
+        self.cached_tokens += other.cached_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cost += other.cost
+        self.latency.merge(other.latency)
+        self.started_at = min(self.started_at, other.started_at)
+
+
+class UsageRecord(BaseModel):
+    """A flushed usage window, as stored in the ``prompt_usage`` table."""
+
+    name: str
+    version: str
+    model: str = ""
+    window_start: datetime
+    window_end: datetime
+    requests: int = 0
+    failures: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    latency: Dict[str, Any] = Field(default_factory=dict)  # LatencyHistogram.to_dict()
+
+
+class UsageSummary(BaseModel):
+    """Usage of one prompt version and model over a period."""
+
+    name: str
+    version: str
+    model: str = ""
+    requests: int = 0
+    failures: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    latency_p50_ms: Optional[float] = None
+    latency_p95_ms: Optional[float] = None
+    latency_p99_ms: Optional[float] = None
+    latency_mean_ms: Optional[float] = None
+
+    @property
+    def cost_per_1k_requests(self) -> Optional[float]:
+        """Average cost of a thousand requests, or None if there were none."""
+        return self.cost / self.requests * 1000 if self.requests else None
+
+    @property
+    def failure_rate(self) -> Optional[float]:
+        """Share of requests that failed, or None if there were none."""
+        return self.failures / self.requests if self.requests else None
+
+    @property
+    def cached_token_rate(self) -> Optional[float]:
+        """Share of prompt tokens served from the prefix cache, or None if there were none."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else None
+
+    @classmethod
+    def from_window(
+        cls, name: str, version: str, model: str, window: UsageWindow
+    ) -> "UsageSummary":
+        """
+        Summarize accumulated usage.
+
+        Args:
+            name: The prompt name.
+            version: The prompt version.
+            model: The model.
+            window: The accumulated usage.
+
+        Returns:
+            The summary.
+        """
+        p50, p95, p99 = window.latency.percentiles((50, 95, 99)).values()
+        return cls(
+            name=name,
+            version=version,
+            model=model,
+            requests=window.requests,
+            failures=window.failures,
+            prompt_tokens=window.prompt_tokens,
+            cached_tokens=window.cached_tokens,
+            completion_tokens=window.completion_tokens,
+            cost=window.cost,
+            latency_p50_ms=p50,
+            latency_p95_ms=p95,
+            latency_p99_ms=p99,
+            latency_mean_ms=window.latency.mean,
+        )
@@ -0,0 +1,162 @@
+"""
+Cross-process invalidation driven by the prompt change feed.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from evoluteprompt.core.database import DBPromptRepo, PromptChange
+
+ChangeListener = Callable[[List[PromptChange]], Any]
+
+logger = logging.getLogger(__name__)
+
+# Larger jumps are sequence resets or reserved ranges, not in-flight writes
+_MAX_TRACKED_GAP = 1000
+
+
+class RevisionWatcher:
+    """
+    Polls the repository's change feed and invalidates local state.
+
+    When another process writes to the shared database, the watcher bumps the
+    repository's epoch, so every ``CompiledStrategy`` on that repository
+    reloads its snapshot on the next selection. Listeners can be subscribed
+    to drop any other caches.
+
+    On Postgres and MySQL, revisions are assigned when a write starts but
+    become visible when it commits, so a later revision can appear before an
+    earlier one. Revisions skipped over this way are remembered and looked
+    up again on each poll until they show up or ``gap_timeout_ms`` passes.
+    """
+
+    def __init__(self, repo: DBPromptRepo, interval_ms: int = 500, gap_timeout_ms: int = 5000):
+        """
+        Initialize the watcher.
+
+        Args:
+            repo: The repository to watch.
+            interval_ms: How often to poll for changes.
+            gap_timeout_ms: How long to wait for a skipped revision to be
+                committed. Revisions of rolled back writes never appear.
+        """
+        self.repo = repo
+        self.interval_ms = interval_ms
+        self.gap_timeout_ms = gap_timeout_ms
+        self.revision: Optional[int] = None
+        self._gaps: Dict[int, float] = {}
+        self._listeners: List[ChangeListener] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, listener: ChangeListener) -> None:
+        """
+        Call ``listener`` with each batch of changes.
+
+        An exception raised by a listener is logged and does not stop the
+        other listeners from being called.
+
+        Args:
+            listener: A function or coroutine function taking the list of
+                changes.
+        """
+        self._listeners.append(listener)
+
+    async def poll(self) -> List[PromptChange]:
+        """
+        Check for changes once and invalidate if there are any.
+
+        The first poll only records the current revision.
+
+        Returns:
+            The changes seen since the previous poll.
+        """
+        if self.revision is None:
+            self.revision = await self.repo.current_revision()
+            return []
+
+        changes = await self._recheck_gaps(self.revision)
+        while True:
+            page = await self.repo.changes_since(self.revision)
+            if not page:
+                break
+            self._track_gaps(self.revision, page)
+            changes.extend(page)
+            self.revision = page[-1].revision
+
+        if changes:
+            self.repo.epoch += 1
+            for listener in self._listeners:
+                try:
+                    result = listener(changes)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    logger.exception("Change listener %r failed", listener)
+
+        return changes
+
+    def _track_gaps(self, revision: int, page: List[PromptChange]) -> None:
+        """Remember the revisions skipped between ``revision`` and ``page``."""
+        expected = revision + 1
+        now = time.monotonic()
+        for change in page:
+            if change.revision - expected <= _MAX_TRACKED_GAP:
+                for missing in range(expected, change.revision):
+                    self._gaps[missing] = now
+            expected = change.revision + 1
+
+    async def _recheck_gaps(self, revision: int) -> List[PromptChange]:
+        """Look up skipped revisions up to ``revision``, returning the ones now committed."""
+        deadline = time.monotonic() - self.gap_timeout_ms / 1000
+        self._gaps = {missing: seen for missing, seen in self._gaps.items() if seen > deadline}
+        if not self._gaps:
+            return []
+
+        found: List[PromptChange] = []
+        start = min(self._gaps) - 1
+        while start < revision:
+            page = await self.repo.changes_since(start)
+            if not page:
+                break
+            found.extend(change for change in page if change.revision in self._gaps)
+            start = page[-1].revision
+
+        for change in found:
+            del self._gaps[change.revision]
+        return found
+
+    def start(self) -> None:
+        """Start polling in the background on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Poll loop run by the background task."""
+        while True:
+            try:
+                await self.poll()
+            except Exception:
+                # Keep the last revision and try again on the next tick
+                logger.warning("Polling the change feed failed", exc_info=True)
+            await asyncio.sleep(self.interval_ms / 1000)
+
+    async def __aenter__(self) -> "RevisionWatcher":
+        await self.poll()
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
@@ -0,0 +1,56 @@
+"""
+Offline evaluation of prompt versions on datasets.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+# Imported on first access
+_LAZY_IMPORTS = {
+    "Example": "evoluteprompt.evaluate.dataset",
+    "iter_examples": "evoluteprompt.evaluate.dataset",
+    "Contains": "evoluteprompt.evaluate.metrics",
+    "ExactMatch": "evoluteprompt.evaluate.metrics",
+    "FunctionMetric": "evoluteprompt.evaluate.metrics",
+    "Metric": "evoluteprompt.evaluate.metrics",
+    "VersionReport": "evoluteprompt.evaluate.metrics",
+    "EvaluationReport": "evoluteprompt.evaluate.runner",
+    "Evaluator": "evoluteprompt.evaluate.runner",
+}
+
+if TYPE_CHECKING:
+    from evoluteprompt.evaluate.dataset import Example, iter_examples
+    from evoluteprompt.evaluate.metrics import (
+        Contains,
+        ExactMatch,
+        FunctionMetric,
+        Metric,
+        VersionReport,
+    )
+    from evoluteprompt.evaluate.runner import EvaluationReport, Evaluator
+
+__all__ = [
+    "Example",
+    "iter_examples",
+    "Metric",
+    "ExactMatch",
+    "Contains",
+    "FunctionMetric",
+    "VersionReport",
+    "Evaluator",
+    "EvaluationReport",
+]
+
+
+def __getattr__(name: str) -> Any:
+    """Import a public name on first access."""
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
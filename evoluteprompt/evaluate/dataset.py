@@ -0,0 +1,80 @@
+"""
+Streamed evaluation datasets.
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+from pydantic import BaseModel
+
+
+class Example(BaseModel):
+    """One example of an evaluation dataset."""
+
+    id: str
+    variables: Dict[str, Any]
+    expected: Optional[str] = None
+
+
+def iter_examples(
+    path: Union[str, Path],
+    format: Optional[str] = None,
+    id_field: str = "id",
+    expected_field: Optional[str] = "expected",
+) -> Iterator[Example]:
+    """
+    Read the examples of a dataset one at a time.
+
+    Every field of a record becomes a template variable, including the id and
+    expected fields. Records without an id are numbered from 0 in file order,
+    so the file must not be reordered between a run and its resumption.
+
+    Args:
+        path: A JSONL file with one object per line, or a CSV file with a
+            header row.
+        format: ``"jsonl"`` or ``"csv"``. Defaults to the file extension.
+        id_field: The field holding each example's unique id.
+        expected_field: The field holding the expected output, if any.
+
+    Returns:
+        An iterator over the examples.
+
+    Raises:
+        ValueError: If the format is unknown or a JSONL line is not an object.
+    """
+    path = Path(path)
+    format = (format or path.suffix.lstrip(".")).lower()
+
+    if format in ("jsonl", "ndjson"):
+        records = _iter_jsonl(path)
+    elif format == "csv":
+        records = _iter_csv(path)
+    else:
+        raise ValueError(f"Unknown dataset format: {format!r}. Use 'jsonl' or 'csv'.")
+
+    for index, record in enumerate(records):
+        example_id = record.get(id_field)
+        expected = record.get(expected_field) if expected_field else None
+        yield Example(
+            id=str(index if example_id is None else example_id),
+            variables=record,
+            expected=None if expected is None else str(expected),
+        )
+
+
+def _iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{number}: expected a JSON object")
+            yield record
+
+
+def _iter_csv(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        yield from csv.DictReader(f)
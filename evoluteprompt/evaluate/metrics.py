@@ -0,0 +1,204 @@
+"""
+Scoring and incremental aggregation of evaluation results.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from evoluteprompt.core.response import LLMResponse
+from evoluteprompt.evaluate.dataset import Example
+from evoluteprompt.utils.histogram import LatencyHistogram
+
+
+class Metric(ABC):
+    """
+    Abstract base class for evaluation metrics.
+    """
+
+    def __init__(self, name: Optional[str] = None):
+        """
+        Initialize the metric.
+
+        Args:
+            name: The name reported for the metric. Defaults to the class name.
+        """
+        self.name = name or self.__class__.__name__
+
+    @abstractmethod
+    def score(self, example: Example, response: LLMResponse) -> Optional[float]:
+        """
+        Score a response.
+
+        Args:
+            example: The example the response was generated for.
+            response: The response.
+
+        Returns:
+            The score, or None if the metric does not apply to the example.
+        """
+        pass
+
+
+class ExactMatch(Metric):
+    """
+    Scores 1 when the response equals the expected output, and 0 otherwise.
+    """
+
+    def __init__(self, case_sensitive: bool = False, name: Optional[str] = None):
+        """
+        Initialize the metric.
+
+        Args:
+            case_sensitive: Whether to compare case.
+            name: The name reported for the metric.
+        """
+        super().__init__(name or "exact_match")
+        self.case_sensitive = case_sensitive
+
+    def score(self, example: Example, response: LLMResponse) -> Optional[float]:
+        if example.expected is None:
+            return None
+        text, expected = response.text.strip(), example.expected.strip()
+        if not self.case_sensitive:
+            text, expected = text.lower(), expected.lower()
+        return float(text == expected)
+
+
+class Contains(Metric):
+    """
+    Scores 1 when the response contains the expected output, and 0 otherwise.
+    """
+
+    def __init__(self, case_sensitive: bool = False, name: Optional[str] = None):
+        """
+        Initialize the metric.
+
+        Args:
+            case_sensitive: Whether to compare case.
+            name: The name reported for the metric.
+        """
+        super().__init__(name or "contains")
+        self.case_sensitive = case_sensitive
+
+    def score(self, example: Example, response: LLMResponse) -> Optional[float]:
+        if example.expected is None:
+            return None
+        text, expected = response.text, example.expected.strip()
+        if not self.case_sensitive:
+            text, expected = text.lower(), expected.lower()
+        return float(expected in text)
+
+
+class FunctionMetric(Metric):
+    """
+    A metric computed by a function of the example and the response.
+    """
+
+    def __init__(
+        self, fn: Callable[[Example, LLMResponse], Optional[float]], name: Optional[str] = None
+    ):
+        """
+        Initialize the metric.
+
+        Args:
+            fn: The scoring function.
+            name: The name reported for the metric. Defaults to the function name.
+        """
+        super().__init__(name or getattr(fn, "__name__", None))
+        self.fn = fn
+
+    def score(self, example: Example, response: LLMResponse) -> Optional[float]:
+        return self.fn(example, response)
+
+
+class VersionReport(BaseModel):
+    """The aggregated results of one prompt version."""
+
+    label: str
+    examples: int = 0
+    failures: int = 0
+    cached: int = 0
+    scores: Dict[str, Optional[float]] = Field(default_factory=dict)  # Mean per metric
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_p50_ms: Optional[float] = None
+    latency_p95_ms: Optional[float] = None
+    latency_p99_ms: Optional[float] = None
+
+
+class VersionMetrics:
+    """
+    Running totals for one prompt version, updated as results arrive.
+
+    Memory does not grow with the number of examples, so reports can be
+    written at any point of a long run.
+    """
+
+    def __init__(self, label: str, metric_names: List[str]):
+        """
+        Initialize the totals.
+
+        Args:
+            label: The prompt version's label.
+            metric_names: The names of the metrics to aggregate.
+        """
+        self.label = label
+        self.examples = 0
+        self.failures = 0
+        self.cached = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency = LatencyHistogram()
+        # metric name -> [sum of scores, number of scores]
+        self.totals: Dict[str, List[float]] = {name: [0.0, 0] for name in metric_names}
+
+    def add(self, result: Dict[str, Any]) -> None:
+        """
+        Add one result, as written to the results file.
+
+        Args:
+            result: The result.
+        """
+        self.examples += 1
+        if result.get("error") is not None:
+            self.failures += 1
+            return
+
+        if result.get("cached"):
+            self.cached += 1
+        elif result.get("latency_ms") is not None:
+            self.latency.record(result["latency_ms"])
+        self.prompt_tokens += result.get("prompt_tokens") or 0
+        self.completion_tokens += result.get("completion_tokens") or 0
+
+        for name, score in result.get("scores", {}).items():
+            if score is not None:
+                total = self.totals.setdefault(name, [0.0, 0])
+                total[0] += score
+                total[1] += 1
+
+    def report(self) -> VersionReport:
+        """
+        Summarize the results added so far.
+
+        Returns:
+            The report.
+        """
+        p50, p95, p99 = self.latency.percentiles((50, 95, 99)).values()
+        return VersionReport(
+            label=self.label,
+            examples=self.examples,
+            failures=self.failures,
+            cached=self.cached,
+            scores={
+                name: total / count if count else None
+                for name, (total, count) in self.totals.items()
+            },
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            latency_p50_ms=p50,
+            latency_p95_ms=p95,
+            latency_p99_ms=p99,
+        )
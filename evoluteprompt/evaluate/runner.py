@@ -0,0 +1,344 @@
+"""
+Offline evaluation of prompt versions on a dataset.
+"""
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, TextIO, Tuple, Union
+
+from jinja2 import Template as JinjaTemplate
+from pydantic import BaseModel, Field
+
+from evoluteprompt.core.prompt import Prompt
+from evoluteprompt.core.provider import LLMProvider
+from evoluteprompt.core.response import LLMResponse
+from evoluteprompt.evaluate.dataset import Example
+from evoluteprompt.evaluate.metrics import Metric, VersionMetrics, VersionReport
+from evoluteprompt.utils.cache import ResponseCache
+from evoluteprompt.utils.hashing import hash_prompt
+from evoluteprompt.utils.instrumentation import traced
+
+# Bumped when the checkpoint files change in an incompatible way
+CHECKPOINT_FORMAT = 1
+
+
+class EvaluationReport(BaseModel):
+    """The results of an evaluation run, per prompt version."""
+
+    completed: int = 0
+    versions: Dict[str, VersionReport] = Field(default_factory=dict)
+
+
+class _CompiledPrompt:
+    """A prompt version whose messages are Jinja templates, parsed once."""
+
+    def __init__(self, prompt: Prompt):
+        self.prompt = prompt
+        self.templates = [
+            JinjaTemplate(message.content) if "{" in message.content else None
+            for message in prompt.messages
+        ]
+
+    def render(self, variables: Dict[str, Any]) -> Prompt:
+        messages = [
+            message if template is None
+            else message.model_copy(update={"content": template.render(**variables)})
+            for message, template in zip(self.prompt.messages, self.templates)
+        ]
+        return self.prompt.model_copy(update={"messages": messages})
+
+
+class Evaluator:
+    """
+    Runs prompt versions over a dataset and scores the responses.
+
+    The messages of each prompt version are rendered as Jinja templates with
+    the variables of each example. Requests run concurrently up to a limit,
+    identical rendered prompts are sent once and, with a cache, not at all
+    if an earlier run already sent them.
+
+    With an output directory, every result is appended to ``results.jsonl``
+    and ``metrics.json`` is rewritten as results arrive. Running again with
+    the same directory skips the examples that already succeeded, so an
+    interrupted run resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        prompts: Union[Mapping[str, Prompt], Iterable[Prompt]],
+        metrics: Optional[List[Metric]] = None,
+        cache: Optional[ResponseCache] = None,
+        concurrency: int = 8,
+        output_dir: Optional[Union[str, Path]] = None,
+        checkpoint_every: int = 100,
+        store_text: bool = True,
+    ):
+        """
+        Initialize the evaluator.
+
+        Args:
+            provider: The provider to send requests to.
+            prompts: The prompt versions to compare, by label. Prompts given
+                as a list are labelled ``name@version`` from their metadata.
+            metrics: The metrics to score each response with.
+            cache: A cache of responses, shared between runs.
+            concurrency: The maximum number of requests in flight.
+            output_dir: The directory for results, metrics and checkpoints.
+            checkpoint_every: How many results to buffer between writes of
+                ``metrics.json``.
+            store_text: Whether to keep response texts in ``results.jsonl``.
+
+        Raises:
+            ValueError: If no prompt versions are given, or two share a label.
+        """
+        if not isinstance(prompts, Mapping):
+            labelled: Dict[str, Prompt] = {}
+            for index, prompt in enumerate(prompts):
+                label = _label(prompt, index)
+                if label in labelled:
+                    raise ValueError(f"Two prompt versions are labelled {label!r}")
+                labelled[label] = prompt
+            prompts = labelled
+        if not prompts:
+            raise ValueError("At least one prompt version is required")
+
+        self.provider = provider
+        self.prompts = {label: _CompiledPrompt(prompt) for label, prompt in prompts.items()}
+        self.metrics = list(metrics or [])
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.store_text = store_text
+
+        self._totals: Dict[str, VersionMetrics] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._results_file: Optional[TextIO] = None
+        self._unsaved = 0
+
+    @traced("evaluate.run")
+    async def run(self, examples: Iterable[Example], resume: bool = True) -> EvaluationReport:
+        """
+        Evaluate every prompt version on every example.
+
+        Examples are read lazily, so a dataset from ``iter_examples`` is
+        never held in memory.
+
+        Args:
+            examples: The examples.
+            resume: Whether to keep the results already in the output
+                directory and skip the examples they cover.
+
+        Returns:
+            The report over all results, including resumed ones.
+
+        Raises:
+            ValueError: If resuming a run that evaluated different prompts.
+        """
+        names = [metric.name for metric in self.metrics]
+        self._totals = {label: VersionMetrics(label, names) for label in self.prompts}
+        done = self._open_checkpoint(resume)
+
+        # A bounded queue keeps only a few examples ahead of the workers
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def produce() -> None:
+            for example in examples:
+                for label in self.prompts:
+                    if (example.id, label) not in done:
+                        await queue.put((example, label))
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(self._work(queue)) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._close_checkpoint()
+
+        return self.report()
+
+    def report(self) -> EvaluationReport:
+        """
+        Summarize the results so far.
+
+        Returns:
+            The report.
+        """
+        versions = {label: totals.report() for label, totals in self._totals.items()}
+        return EvaluationReport(
+            completed=sum(report.examples for report in versions.values()),
+            versions=versions,
+        )
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            example, label = job
+            self._add(await self._evaluate(example, label))
+
+    async def _evaluate(self, example: Example, label: str) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"id": example.id, "version": label}
+        try:
+            prompt = self.prompts[label].render(example.variables)
+            start = time.perf_counter()
+            response, cached = await self._complete(prompt)
+            result["latency_ms"] = None if cached else (time.perf_counter() - start) * 1000
+            result["cached"] = cached
+            if self.store_text:
+                result["text"] = response.text
+            if response.stats is not None:
+                result["prompt_tokens"] = response.stats.prompt_tokens
+                result["completion_tokens"] = response.stats.completion_tokens
+            result["scores"] = {
+                metric.name: metric.score(example, response) for metric in self.metrics
+            }
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    async def _complete(self, prompt: Prompt) -> Tuple[LLMResponse, bool]:
+        """Send a prompt unless it is cached or already in flight."""
+        if self.cache is not None:
+            response = self.cache.get(prompt)
+            if response is not None:
+                return response, True
+
+        key = hash_prompt(prompt)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self.provider.generate(prompt)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Only waiters need to see it
+            raise
+        finally:
+            del self._inflight[key]
+
+        future.set_result(response)
+        if self.cache is not None:
+            self.cache.set(prompt, response)
+        return response, False
+
+    def _add(self, result: Dict[str, Any]) -> None:
+        self._totals[result["version"]].add(result)
+        if self._results_file is None:
+            return
+
+        self._results_file.write(json.dumps(result) + "\n")
+        self._unsaved += 1
+        if self._unsaved >= self.checkpoint_every:
+            self._save()
+
+    def _open_checkpoint(self, resume: bool) -> Set[Tuple[str, str]]:
+        """Open the output files and load the results of earlier runs."""
+        if self.output_dir is None:
+            return set()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.output_dir / "manifest.json"
+        results_path = self.output_dir / "results.jsonl"
+        manifest: Dict[str, Any] = {
+            "format": CHECKPOINT_FORMAT,
+            "versions": {
+                label: hash_prompt(compiled.prompt) for label, compiled in self.prompts.items()
+            },
+        }
+
+        done: Set[Tuple[str, str]] = set()
+        if resume and manifest_path.exists() and results_path.exists():
+            with open(manifest_path, "r") as f:
+                previous = json.load(f)
+            if previous.get("format") != CHECKPOINT_FORMAT:
+                raise ValueError(f"Unsupported checkpoint format: {previous.get('format')}")
+            for label, digest in previous.get("versions", {}).items():
+                if label in manifest["versions"] and manifest["versions"][label] != digest:
+                    raise ValueError(
+                        f"Prompt version {label!r} changed since the checkpoint in "
+                        f"{self.output_dir} was written. Use another output directory."
+                    )
+            manifest["versions"] = {**previous.get("versions", {}), **manifest["versions"]}
+            done = self._load_results(results_path)
+        elif results_path.exists():
+            results_path.unlink()
+
+        _write_json(manifest_path, manifest)
+        self._results_file = open(results_path, "a", encoding="utf-8")
+        self._unsaved = 0
+        return done
+
+    def _load_results(self, path: Path) -> Set[Tuple[str, str]]:
+        """Replay a results file into the totals and return what succeeded."""
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        valid_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                # A write cut short by the interruption may still parse if only
+                # the newline is missing, so only complete lines count
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+                latest[(result["id"], result["version"])] = result
+
+        # Drop the partial line, so new results start on a line of their own
+        if valid_bytes < path.stat().st_size:
+            with open(path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+        done = set()
+        for key, result in latest.items():
+            # Failures are retried, and counted again only when they finish
+            if result.get("error") is None and result["version"] in self._totals:
+                self._totals[result["version"]].add(result)
+                done.add(key)
+        return done
+
+    def _save(self) -> None:
+        """Flush the results and rewrite the metrics."""
+        results_file, output_dir = self._results_file, self.output_dir
+        if results_file is None or output_dir is None:
+            return
+        results_file.flush()
+        os.fsync(results_file.fileno())
+        _write_json(output_dir / "metrics.json", self.report().model_dump())
+        self._unsaved = 0
+
+    def _close_checkpoint(self) -> None:
+        if self._results_file is not None:
+            self._save()
+            self._results_file.close()
+            self._results_file = None
+
+
+def _label(prompt: Prompt, index: int) -> str:
+    """Label a prompt version by its name and version, or its position."""
+    metadata = prompt.metadata
+    if metadata is not None and metadata.name:
+        return f"{metadata.name}@{metadata.version}"
+    return f"prompt-{index}"
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """Replace a JSON file atomically, so readers never see a partial write."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
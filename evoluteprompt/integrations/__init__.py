@@ -2,8 +2,40 @@
 Integration modules for various LLM providers.
 """
 
-from evoluteprompt.integrations.anthropic import AnthropicProvider
-from evoluteprompt.integrations.huggingface import HuggingFaceProvider
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-# Import provider integrations
-from evoluteprompt.integrations.openai import OpenAIProvider
+# Imported on first access, so only the providers in use load their client libraries
+_LAZY_IMPORTS = {
+    "OpenAIProvider": "evoluteprompt.integrations.openai",
+    "AnthropicProvider": "evoluteprompt.integrations.anthropic",
+    "HuggingFaceProvider": "evoluteprompt.integrations.huggingface",
+    "MockProvider": "evoluteprompt.integrations.mock",
+}
+
+if TYPE_CHECKING:
+    from evoluteprompt.integrations.anthropic import AnthropicProvider
+    from evoluteprompt.integrations.huggingface import HuggingFaceProvider
+    from evoluteprompt.integrations.mock import MockProvider
+    from evoluteprompt.integrations.openai import OpenAIProvider
+
+__all__ = [
+    "OpenAIProvider",
+    "AnthropicProvider",
+    "HuggingFaceProvider",
+    "MockProvider",
+]
+
+
+def __getattr__(name: str) -> Any:
+    """Import a public name on first access."""
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
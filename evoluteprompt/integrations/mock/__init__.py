@@ -0,0 +1,34 @@
+"""
+Mock provider and fake OpenAI server for tests and load tests.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+# Imported on first access, so the mock provider does not load aiohttp's server
+_LAZY_IMPORTS = {
+    "MockBehavior": "evoluteprompt.integrations.mock.behavior",
+    "MockProvider": "evoluteprompt.integrations.mock.provider",
+    "FakeOpenAIServer": "evoluteprompt.integrations.mock.server",
+}
+
+if TYPE_CHECKING:
+    from evoluteprompt.integrations.mock.behavior import MockBehavior
+    from evoluteprompt.integrations.mock.provider import MockProvider
+    from evoluteprompt.integrations.mock.server import FakeOpenAIServer
+
+__all__ = ["MockBehavior", "MockProvider", "FakeOpenAIServer"]
+
+
+def __getattr__(name: str) -> Any:
+    """Import a public name on first access."""
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
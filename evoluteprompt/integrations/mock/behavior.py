@@ -0,0 +1,237 @@
+"""
+Configurable behavior shared by the mock provider and the fake OpenAI server.
+"""
+
+import hashlib
+import math
+import random
+from typing import Dict, List, Literal, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+
+class MockBehavior(BaseModel):
+    """
+    How a mock model answers: what it says, how fast, and how often it fails.
+
+    Latencies are drawn from ``latency_distribution`` around ``latency_ms``:
+    ``constant`` always waits ``latency_ms``, ``uniform`` waits between
+    ``latency_ms - latency_spread_ms`` and ``latency_ms + latency_spread_ms``,
+    ``normal`` uses ``latency_spread_ms`` as the standard deviation,
+    ``exponential`` has a mean of ``latency_ms``, and ``lognormal`` has a
+    median of ``latency_ms`` and ``latency_sigma`` as the shape.
+    """
+
+    reply: str = "This is a mock completion."
+    echo: bool = False  # Answer with the last message instead of the reply
+
+    latency_ms: float = 0.0
+    latency_distribution: Literal["constant", "uniform", "normal", "exponential", "lognormal"] = (
+        "constant"
+    )
+    latency_spread_ms: float = 0.0
+    latency_sigma: float = 0.5
+
+    error_rate: float = 0.0
+    error_status: int = 500
+
+    # Streaming: delay before the first chunk, words per chunk and delay between chunks
+    time_to_first_chunk_ms: Optional[float] = None  # Defaults to the sampled latency
+    chunk_words: int = 1
+    chunk_interval_ms: float = 0.0
+
+    # Token usage reported per call; estimated from the text when not set
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+    # Prefix caching: message prefixes of at least prefix_cache_min_tokens that
+    # an earlier call sent are reported as cached tokens, and cut the latency
+    # by up to prefix_cache_speedup for a fully cached prompt
+    prefix_cache: bool = False
+    prefix_cache_min_tokens: int = 1024
+    prefix_cache_speedup: float = 0.5
+
+    seed: Optional[int] = None
+
+    def rng(self) -> random.Random:
+        """
+        Create the random generator for latencies and failures.
+
+        Returns:
+            A generator seeded with ``seed``.
+        """
+        return random.Random(self.seed)
+
+    def sample_latency_ms(self, rng: random.Random) -> float:
+        """
+        Draw the latency of one call.
+
+        Args:
+            rng: The random generator.
+
+        Returns:
+            The latency in milliseconds, never negative.
+        """
+        if self.latency_ms <= 0 and self.latency_spread_ms <= 0:
+            return 0.0
+        distribution = self.latency_distribution
+        if distribution == "uniform":
+            latency = rng.uniform(
+                self.latency_ms - self.latency_spread_ms, self.latency_ms + self.latency_spread_ms
+            )
+        elif distribution == "normal":
+            latency = rng.gauss(self.latency_ms, self.latency_spread_ms)
+        elif distribution == "exponential":
+            latency = rng.expovariate(1 / self.latency_ms) if self.latency_ms > 0 else 0.0
+        elif distribution == "lognormal":
+            latency = (
+                rng.lognormvariate(math.log(self.latency_ms), self.latency_sigma)
+                if self.latency_ms > 0
+                else 0.0
+            )
+        else:
+            latency = self.latency_ms
+        return max(0.0, latency)
+
+    def cached_delay_ms(self, delay_ms: float, prompt_tokens: int, cached_tokens: int) -> float:
+        """
+        Shorten a delay by the share of the prompt served from the prefix cache.
+
+        Args:
+            delay_ms: The sampled delay.
+            prompt_tokens: Tokens in the prompt.
+            cached_tokens: Tokens of the prompt found in the prefix cache.
+
+        Returns:
+            The delay in milliseconds.
+        """
+        if not cached_tokens or not prompt_tokens:
+            return delay_ms
+        return delay_ms * (1 - self.prefix_cache_speedup * cached_tokens / prompt_tokens)
+
+    def should_fail(self, rng: random.Random) -> bool:
+        """
+        Decide whether one call fails.
+
+        Args:
+            rng: The random generator.
+
+        Returns:
+            True with probability ``error_rate``.
+        """
+        return self.error_rate > 0 and rng.random() < self.error_rate
+
+    def answer(self, messages: List[str]) -> str:
+        """
+        Choose the text of a completion.
+
+        Args:
+            messages: The contents of the request's messages.
+
+        Returns:
+            The completion text.
+        """
+        if self.echo and messages:
+            return messages[-1]
+        return self.reply
+
+    def chunks(self, text: str) -> List[str]:
+        """
+        Split a completion into streaming chunks of ``chunk_words`` words.
+
+        Args:
+            text: The completion text.
+
+        Returns:
+            The chunks, which join back into the text.
+        """
+        words = text.split(" ")
+        size = max(1, self.chunk_words)
+        groups = [" ".join(words[i:i + size]) for i in range(0, len(words), size)]
+        return [group + " " for group in groups[:-1]] + groups[-1:]
+
+    def usage(self, messages: List[str], text: str) -> Tuple[int, int]:
+        """
+        Compute the token usage of a call.
+
+        Args:
+            messages: The contents of the request's messages.
+            text: The completion text.
+
+        Returns:
+            Prompt and completion token counts.
+        """
+        prompt_tokens = self.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = sum(_estimate_tokens(content) + 4 for content in messages)
+        completion_tokens = self.completion_tokens
+        if completion_tokens is None:
+            completion_tokens = _estimate_tokens(text)
+        return prompt_tokens, completion_tokens
+
+
+class PrefixCacheSimulator:
+    """
+    Remembers the message prefixes processed so far, like a provider's prompt cache.
+
+    As with a real cache, a prefix is only available once a request that
+    sent it has been processed, so concurrent requests all miss.
+    """
+
+    def __init__(self, min_tokens: int = 1024, max_entries: int = 100000):
+        """
+        Initialize the simulator.
+
+        Args:
+            min_tokens: The shortest prefix that is cached.
+            max_entries: How many prefixes to remember before starting over.
+        """
+        self.min_tokens = min_tokens
+        self.max_entries = max_entries
+        self._tokens: Dict[str, int] = {}
+
+    def lookup(self, messages: Sequence[Tuple[str, str]]) -> int:
+        """
+        Find the cached part of a request.
+
+        Args:
+            messages: The role and content of each message.
+
+        Returns:
+            The number of prompt tokens in the longest cached prefix.
+        """
+        cached = 0
+        for digest, tokens in _prefixes(messages):
+            if digest in self._tokens:
+                cached = tokens
+        return cached
+
+    def add(self, messages: Sequence[Tuple[str, str]]) -> None:
+        """
+        Cache the prefixes of a processed request.
+
+        Args:
+            messages: The role and content of each message.
+        """
+        if len(self._tokens) > self.max_entries:
+            self._tokens.clear()
+        for digest, tokens in _prefixes(messages):
+            if tokens >= self.min_tokens:
+                self._tokens[digest] = tokens
+
+
+def _prefixes(messages: Sequence[Tuple[str, str]]) -> List[Tuple[str, int]]:
+    """Hash each message prefix and estimate its tokens."""
+    running = hashlib.sha256()
+    tokens = 0
+    prefixes = []
+    for role, content in messages:
+        running.update(f"{len(role)}:{role}{len(content)}:{content}".encode("utf-8"))
+        tokens += _estimate_tokens(content) + 4
+        prefixes.append((running.hexdigest(), tokens))
+    return prefixes
+
+
+def _estimate_tokens(text: str) -> int:
+    """Estimate a token count as one token per four characters."""
+    return max(1, math.ceil(len(text) / 4)) if text else 0
@@ -0,0 +1,180 @@
+"""
+A mock LLM provider for tests and load tests.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Optional
+
+from evoluteprompt.core.prompt import Prompt
+from evoluteprompt.core.provider import LLMProvider
+from evoluteprompt.core.response import LLMResponse, StreamingResponse
+from evoluteprompt.core.types import PromptStats
+from evoluteprompt.integrations.mock.behavior import MockBehavior, PrefixCacheSimulator
+
+
+class MockProvider(LLMProvider):
+    """
+    Provider that answers in-process, without a network or an API key.
+
+    Latency, failures, streaming cadence and token usage follow a
+    ``MockBehavior``, so code built on providers can be load-tested with
+    realistic timings.
+    """
+
+    def __init__(
+            self,
+            behavior: Optional[MockBehavior] = None,
+            model: str = "mock-model",
+            **kwargs: Any):
+        """
+        Initialize the mock provider.
+
+        Args:
+            behavior: How the mock answers. Defaults to one built from kwargs.
+            model: Model name reported in responses.
+            **kwargs: Fields of a ``MockBehavior``, when none is given.
+        """
+        super().__init__(api_key=None)
+        self.behavior = behavior or MockBehavior(**kwargs)
+        self.model = model
+        self.calls = 0
+        self._rng = self.behavior.rng()
+        self._prefix_cache = PrefixCacheSimulator(self.behavior.prefix_cache_min_tokens)
+
+    def _model_for(self, prompt: Prompt) -> str:
+        if prompt.parameters is not None and prompt.parameters.model:
+            return prompt.parameters.model
+        return self.model
+
+    def _cached_tokens(self, prompt: Prompt, prompt_tokens: int) -> int:
+        """Look a prompt up in the simulated prefix cache, if enabled."""
+        if not self.behavior.prefix_cache:
+            return 0
+        cached = self._prefix_cache.lookup(
+            [(message.role.value, message.content) for message in prompt.messages]
+        )
+        return min(cached, prompt_tokens)
+
+    def _cache_prefixes(self, prompt: Prompt) -> None:
+        """Add a processed prompt to the simulated prefix cache, if enabled."""
+        if self.behavior.prefix_cache:
+            self._prefix_cache.add(
+                [(message.role.value, message.content) for message in prompt.messages]
+            )
+
+    async def _fail_or_wait(self, delay_ms: float) -> None:
+        """Wait for a call's latency, then raise if the call is chosen to fail."""
+        fail = self.behavior.should_fail(self._rng)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if fail:
+            raise ValueError(
+                f"Mock API error ({self.behavior.error_status}): injected failure"
+            )
+
+    async def generate(self, prompt: Prompt) -> LLMResponse:
+        """
+        Generate a response after a sampled latency.
+
+        Args:
+            prompt: The prompt to answer.
+
+        Returns:
+            The response.
+
+        Raises:
+            ValueError: If the call was chosen to fail.
+        """
+        self.calls += 1
+        start = time.perf_counter()
+        contents = [message.content for message in prompt.messages]
+        text = self.behavior.answer(contents)
+        prompt_tokens, completion_tokens = self.behavior.usage(contents, text)
+        cached_tokens = self._cached_tokens(prompt, prompt_tokens)
+        delay_ms = self.behavior.sample_latency_ms(self._rng)
+        await self._fail_or_wait(
+            self.behavior.cached_delay_ms(delay_ms, prompt_tokens, cached_tokens)
+        )
+        self._cache_prefixes(prompt)
+
+        return LLMResponse(
+            text=text,
+            model=self._model_for(prompt),
+            provider="mock",
+            stats=PromptStats(
+                prompt_tokens=prompt_tokens,
+                cached_tokens=cached_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+                latency_ms=(time.perf_counter() - start) * 1000,
+            ),
+        )
+
+    async def iter_chunks(self, prompt: Prompt) -> AsyncIterator[str]:
+        """
+        Stream the chunks of a response with the configured cadence.
+
+        Args:
+            prompt: The prompt to answer.
+
+        Returns:
+            An async iterator over the chunks.
+
+        Raises:
+            ValueError: If the call was chosen to fail, before the first chunk.
+        """
+        contents = [message.content for message in prompt.messages]
+        prompt_tokens, _ = self.behavior.usage(contents, "")
+        async for chunk in self._stream(prompt, prompt_tokens,
+                                        self._cached_tokens(prompt, prompt_tokens)):
+            yield chunk
+
+    async def _stream(
+        self, prompt: Prompt, prompt_tokens: int, cached_tokens: int
+    ) -> AsyncIterator[str]:
+        self.calls += 1
+        behavior = self.behavior
+        delay_ms = behavior.time_to_first_chunk_ms
+        if delay_ms is None:
+            delay_ms = behavior.sample_latency_ms(self._rng)
+        await self._fail_or_wait(behavior.cached_delay_ms(delay_ms, prompt_tokens, cached_tokens))
+        self._cache_prefixes(prompt)
+
+        text = behavior.answer([message.content for message in prompt.messages])
+        for index, chunk in enumerate(behavior.chunks(text)):
+            if index and behavior.chunk_interval_ms > 0:
+                await asyncio.sleep(behavior.chunk_interval_ms / 1000)
+            yield chunk
+
+    async def generate_stream(self, prompt: Prompt) -> LLMResponse:
+        """
+        Generate a response by streaming it chunk by chunk.
+
+        Args:
+            prompt: The prompt to answer.
+
+        Returns:
+            The response, with its chunks.
+
+        Raises:
+            ValueError: If the call was chosen to fail.
+        """
+        start = time.perf_counter()
+        contents = [message.content for message in prompt.messages]
+        text = self.behavior.answer(contents)
+        prompt_tokens, completion_tokens = self.behavior.usage(contents, text)
+        cached_tokens = self._cached_tokens(prompt, prompt_tokens)
+
+        stream_response = StreamingResponse(model=self._model_for(prompt), provider="mock")
+        async for chunk in self._stream(prompt, prompt_tokens, cached_tokens):
+            stream_response.add_chunk(chunk)
+        stream_response.done = True
+
+        stats = stream_response.stats
+        stats.prompt_tokens = prompt_tokens
+        stats.cached_tokens = cached_tokens
+        stats.completion_tokens = completion_tokens
+        stats.total_tokens = prompt_tokens + completion_tokens
+        stats.latency_ms = (time.perf_counter() - start) * 1000
+        return stream_response.to_response()
@@ -0,0 +1,247 @@
+"""
+A local fake of the OpenAI chat completions API.
+
+It answers ``POST /v1/chat/completions`` as one JSON document or, when the
+request sets ``"stream": true``, as server-sent events, with the latency,
+failures and chunk cadence of a ``MockBehavior``. Run it on its own with:
+
+    python -m evoluteprompt.integrations.mock.server --port 8000 --latency-ms 200
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from evoluteprompt.integrations.mock.behavior import MockBehavior, PrefixCacheSimulator
+
+
+class FakeOpenAIServer:
+    """
+    An in-process fake OpenAI server, for tests and load tests.
+
+    Point an ``OpenAIProvider`` at it with ``base_url=server.url``; no API key
+    is needed unless the server is given one to check.
+    """
+
+    def __init__(
+        self,
+        behavior: Optional[MockBehavior] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        api_key: Optional[str] = None,
+        **kwargs: Any,
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            behavior: How the server answers. Defaults to one built from kwargs.
+            host: Interface to listen on.
+            port: Port to listen on, or 0 for any free port.
+            api_key: If set, requests must send it as a bearer token.
+            **kwargs: Fields of a ``MockBehavior``, when none is given.
+        """
+        self.behavior = behavior or MockBehavior(**kwargs)
+        self.host = host
+        self.port = port
+        self.api_key = api_key
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = self.behavior.rng()
+        self._prefix_cache = PrefixCacheSimulator(self.behavior.prefix_cache_min_tokens)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the API, to use as a provider's ``base_url``."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    def _error(self, status: int, message: str, error_type: str) -> web.Response:
+        return web.json_response(
+            {"error": {"message": message, "type": error_type, "code": None}}, status=status
+        )
+
+    def _completion(self, model: str, text: str, usage: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a completion document."""
+        return {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    def _chunk(self, model: str, delta: Dict[str, Any], finish_reason: Optional[str] = None,
+               usage: Optional[Dict[str, Any]] = None) -> bytes:
+        """Encode one server-sent event of a streamed completion."""
+        chunk: Dict[str, Any] = {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [] if usage is not None else [
+                {"index": 0, "delta": delta, "finish_reason": finish_reason}
+            ],
+        }
+        if usage is not None:
+            chunk["usage"] = usage
+        return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+    async def _handle_completion(self, request: web.Request) -> web.StreamResponse:
+        """Answer a chat completion request."""
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await self._complete(request)
+        finally:
+            self.in_flight -= 1
+
+    async def _complete(self, request: web.Request) -> web.StreamResponse:
+        if self.api_key is not None:
+            if request.headers.get("Authorization") != f"Bearer {self.api_key}":
+                return self._error(401, "Incorrect API key provided.", "invalid_request_error")
+
+        try:
+            body = await request.json()
+            roles: List[str] = [str(m.get("role") or "") for m in body["messages"]]
+            messages: List[str] = [str(m.get("content") or "") for m in body["messages"]]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return self._error(400, "Invalid chat completion request.", "invalid_request_error")
+
+        behavior = self.behavior
+        model = body.get("model", "mock-model")
+        stream = bool(body.get("stream"))
+        text = behavior.answer(messages)
+        prompt_tokens, completion_tokens = behavior.usage(messages, text)
+        cached_tokens = 0
+        if behavior.prefix_cache:
+            cached_tokens = min(
+                prompt_tokens, self._prefix_cache.lookup(list(zip(roles, messages)))
+            )
+
+        delay_ms = behavior.time_to_first_chunk_ms if stream else None
+        if delay_ms is None:
+            delay_ms = behavior.sample_latency_ms(self._rng)
+        delay_ms = behavior.cached_delay_ms(delay_ms, prompt_tokens, cached_tokens)
+        fail = behavior.should_fail(self._rng)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if fail:
+            return self._error(behavior.error_status, "Injected failure.", "server_error")
+        if behavior.prefix_cache:
+            self._prefix_cache.add(list(zip(roles, messages)))
+
+        usage: Dict[str, Any] = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+        if not stream:
+            return web.json_response(self._completion(model, text, usage))
+
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+        await response.write(self._chunk(model, {"role": "assistant", "content": ""}))
+        for index, chunk in enumerate(behavior.chunks(text)):
+            if index and behavior.chunk_interval_ms > 0:
+                await asyncio.sleep(behavior.chunk_interval_ms / 1000)
+            await response.write(self._chunk(model, {"content": chunk}))
+        await response.write(self._chunk(model, {}, finish_reason="stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await response.write(self._chunk(model, {}, usage=usage))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _handle_models(self, request: web.Request) -> web.Response:
+        """List the single mock model."""
+        return web.json_response(
+            {"object": "list", "data": [{"id": "mock-model", "object": "model"}]}
+        )
+
+    async def start(self) -> None:
+        """Start serving on the running event loop."""
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._handle_completion)
+        app.router.add_get("/v1/models", self._handle_models)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Pick up the real port when any free port was requested
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeOpenAIServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+
+async def _serve(host: str, port: int, behavior: MockBehavior) -> None:
+    """Serve until interrupted."""
+    async with FakeOpenAIServer(behavior, host=host, port=port) as server:
+        print(f"Fake OpenAI API at {server.url}")
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    """Entry point."""
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--latency-distribution",
+        default="constant",
+        choices=["constant", "uniform", "normal", "exponential", "lognormal"],
+    )
+    parser.add_argument("--latency-spread-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--chunk-words", type=int, default=1)
+    parser.add_argument("--chunk-interval-ms", type=float, default=0.0)
+    parser.add_argument("--reply", default=MockBehavior().reply)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    behavior = MockBehavior(
+        reply=args.reply,
+        latency_ms=args.latency_ms,
+        latency_distribution=args.latency_distribution,
+        latency_spread_ms=args.latency_spread_ms,
+        error_rate=args.error_rate,
+        chunk_words=args.chunk_words,
+        chunk_interval_ms=args.chunk_interval_ms,
+        seed=args.seed,
+    )
+    try:
+        asyncio.run(_serve(args.host, args.port, behavior))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
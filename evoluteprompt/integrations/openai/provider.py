@@ -6,12 +6,15 @@ import os
 from typing import Any, AsyncGenerator, Dict, List, Optional, Union
 
 import aiohttp
-import tiktoken
 
+from evoluteprompt.core.prefix import prefix_key
 from evoluteprompt.core.prompt import Prompt
 from evoluteprompt.core.provider import LLMProvider
 from evoluteprompt.core.response import FunctionCall, LLMResponse, StreamingResponse
 from evoluteprompt.core.types import Message, MessageRole
+from evoluteprompt.utils.tokenizers import count_prompt_tokens, encoding_for_model
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
 
 
 class OpenAIProvider(LLMProvider):
@@ -21,27 +24,40 @@ class OpenAIProvider(LLMProvider):
             self,
             api_key: Optional[str] = None,
             model: str = "gpt-3.5-turbo",
+            base_url: Optional[str] = None,
+            prompt_cache_key: Union[str, bool, None] = None,
             **kwargs):
         """
         Initialize the OpenAI provider.
 
         Args:
             api_key: OpenAI API key. If not provided, will use OPENAI_API_KEY env var.
+                Optional when base_url points at another OpenAI-compatible server.
             model: Model to use. Default is gpt-3.5-turbo.
-            **kwargs: Additional parameters to pass to the OpenAI API.
+            base_url: Base URL of the API. If not provided, will use OPENAI_BASE_URL
+                env var, then the OpenAI API.
+            prompt_cache_key: Cache key sent with every request, to route prompts
+                that share a prefix to the same prompt cache. True derives the key
+                from all but the last message of each prompt.
+            **kwargs: Additional parameters to pass to the OpenAI API, such as
+                temperature. Parameters set on a prompt take precedence.
         """
-        # Get API key from environment variable if not provided
+        # Get API key and URL from environment variables if not provided
         if api_key is None:
             api_key = os.environ.get("OPENAI_API_KEY")
+        if base_url is None:
+            base_url = os.environ.get("OPENAI_BASE_URL", DEFAULT_BASE_URL)
 
-        if api_key is None:
+        if api_key is None and base_url.rstrip("/") == DEFAULT_BASE_URL:
             raise ValueError(
                 "OpenAI API key not provided. Either pass it as an argument or set OPENAI_API_KEY environment variable."
             )
 
-        super().__init__(api_key=api_key, **kwargs)
+        super().__init__(api_key=api_key)
         self.model = model
-        self.base_url = kwargs.get("base_url", "https://api.openai.com/v1")
+        self.base_url = base_url.rstrip("/")
+        self.prompt_cache_key = prompt_cache_key
+        self.default_params = kwargs
 
     def _convert_prompt_to_messages(
             self, prompt: Prompt) -> List[Dict[str, Any]]:
@@ -74,10 +90,10 @@ class OpenAIProvider(LLMProvider):
         Returns:
             Headers dictionary.
         """
-        return {
-            "Authorization": f"Bearer {
-                self.api_key}",
-            "Content-Type": "application/json"}
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
 
     def _build_request_body(self, prompt: Prompt) -> Dict[str, Any]:
         """
@@ -91,8 +107,8 @@ class OpenAIProvider(LLMProvider):
         """
         messages = self._convert_prompt_to_messages(prompt)
 
-        # Start with model and messages
-        body = {"model": self.model, "messages": messages}
+        # Start with model, messages and the provider's default parameters
+        body = {"model": self.model, **self.default_params, "messages": messages}
 
         # Add parameters from prompt if available
         if prompt.parameters:
@@ -103,6 +119,13 @@ class OpenAIProvider(LLMProvider):
         if "model" not in body:
             body["model"] = self.model
 
+        if self.prompt_cache_key is True:
+            cache_key = prefix_key(prompt)
+            if cache_key is not None:
+                body["prompt_cache_key"] = cache_key
+        elif self.prompt_cache_key:
+            body["prompt_cache_key"] = self.prompt_cache_key
+
         return body
 
     def _count_tokens(self, prompt: Prompt) -> int:
@@ -115,32 +138,7 @@ class OpenAIProvider(LLMProvider):
         Returns:
             Number of tokens.
         """
-        # Get the encoder for the model
-        try:
-            encoding = tiktoken.encoding_for_model(self.model)
-        except KeyError:
-            # Fallback to cl100k_base for new models not yet in tiktoken
-            encoding = tiktoken.get_encoding("cl100k_base")
-
-        # Count tokens for each message
-        token_count = 0
-
-        for message in prompt.messages:
-            # Add tokens for message format (role, content, etc.)
-            token_count += 4  # Approx overhead per message
-
-            # Add tokens for content
-            if message.content:
-                token_count += len(encoding.encode(message.content))
-
-            # Add tokens for name if present
-            if message.name:
-                token_count += len(encoding.encode(message.name))
-
-        # Add tokens for the overall message format
-        token_count += 3  # Approx overhead for the overall structure
-
-        return token_count
+        return count_prompt_tokens(prompt, encoding_for_model(self.model))
 
     def _parse_response(self, data: Dict[str, Any]) -> LLMResponse:
         """
@@ -174,13 +172,14 @@ class OpenAIProvider(LLMProvider):
             )
 
         # Extract content
-        content = message.get("content", "")
+        content = message.get("content") or ""
 
         # Extract usage data if available
         stats = None
         if "usage" in data:
             stats = {
                 "prompt_tokens": data["usage"].get("prompt_tokens"),
+                "cached_tokens": _cached_tokens(data["usage"]),
                 "completion_tokens": data["usage"].get("completion_tokens"),
                 "total_tokens": data["usage"].get("total_tokens"),
             }
@@ -207,6 +206,14 @@ class OpenAIProvider(LLMProvider):
             chunk: Chunk of data from the API.
             stream_response: StreamingResponse object to update.
         """
+        # The last chunk carries the usage of the whole stream, when requested
+        usage = chunk.get("usage")
+        if usage:
+            stream_response.stats.prompt_tokens = usage.get("prompt_tokens")
+            stream_response.stats.cached_tokens = _cached_tokens(usage)
+            stream_response.stats.completion_tokens = usage.get("completion_tokens")
+            stream_response.stats.total_tokens = usage.get("total_tokens")
+
         if "choices" not in chunk or not chunk["choices"]:
             return
 
@@ -223,6 +230,30 @@ class OpenAIProvider(LLMProvider):
         elif "text" in choice and choice["text"]:
             stream_response.add_chunk(choice["text"])
 
+    async def generate(self, prompt: Prompt) -> LLMResponse:
+        """
+        Generate a response from the LLM.
+
+        Args:
+            prompt: The prompt to send to the LLM.
+
+        Returns:
+            The response from the LLM.
+        """
+        return await self.complete_async(prompt)
+
+    async def generate_stream(self, prompt: Prompt) -> LLMResponse:
+        """
+        Generate a streaming response from the LLM.
+
+        Args:
+            prompt: The prompt to send to the LLM.
+
+        Returns:
+            The streamed response from the LLM.
+        """
+        return await self.stream_async(prompt)
+
     async def complete_async(self, prompt: Prompt) -> LLMResponse:
         """
         Complete a prompt asynchronously.
@@ -238,9 +269,6 @@ class OpenAIProvider(LLMProvider):
         headers = self._get_headers()
         body = self._build_request_body(prompt)
 
-        # Calculate token count
-        token_count = self._count_tokens(prompt)
-
         # Make the request
         async with aiohttp.ClientSession() as session:
             async with session.post(url, headers=headers, json=body) as resp:
@@ -255,10 +283,11 @@ class OpenAIProvider(LLMProvider):
         # Parse the response
         response = self._parse_response(data)
 
-        # Update stats
-        if response.stats is None:
-            response.stats = {}
-        response.stats["token_count"] = token_count
+        # Use the API's token count when it reports one, to skip tokenizing locally
+        prompt_tokens = response.stats.prompt_tokens if response.stats else None
+        response.update_stats(
+            token_count=prompt_tokens if prompt_tokens is not None else self._count_tokens(prompt)
+        )
 
         return response
 
@@ -277,18 +306,13 @@ class OpenAIProvider(LLMProvider):
         headers = self._get_headers()
         body = self._build_request_body(prompt)
 
-        # Set streaming parameter
+        # Set streaming parameter, and ask for the usage in the last chunk
         body["stream"] = True
-
-        # Calculate token count
-        token_count = self._count_tokens(prompt)
+        body["stream_options"] = {"include_usage": True}
 
         # Initialize streaming response
         stream_response = StreamingResponse(
-            model=self.model, provider="openai")
-
-        # Update stats
-        stream_response.stats.token_count = token_count
+            model=body["model"], provider="openai")
 
         # Make the request
         async with aiohttp.ClientSession() as session:
@@ -327,5 +351,16 @@ class OpenAIProvider(LLMProvider):
         # Mark streaming as done
         stream_response.done = True
 
+        prompt_tokens = stream_response.stats.prompt_tokens
+        stream_response.stats.token_count = (
+            prompt_tokens if prompt_tokens is not None else self._count_tokens(prompt)
+        )
+
         # Convert to LLMResponse
         return stream_response.to_response()
+
+
+def _cached_tokens(usage: Dict[str, Any]) -> Optional[int]:
+    """Read the prompt tokens served from the prompt cache out of a usage object."""
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens")
@@ -2,15 +2,30 @@
 Prompt filters for safety, alignment, and other constraints.
 """
 
-from evoluteprompt.prompt_filters.base import PromptFilter
-from evoluteprompt.prompt_filters.pipeline import FilterPipeline
-from evoluteprompt.prompt_filters.safety import (
-    ContentPolicyFilter,
-    KeywordFilter,
-    MaxTokenFilter,
-    ProfanityFilter,
-    RegexFilter,
-)
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+# Imported on first access
+_LAZY_IMPORTS = {
+    "PromptFilter": "evoluteprompt.prompt_filters.base",
+    "KeywordFilter": "evoluteprompt.prompt_filters.safety",
+    "RegexFilter": "evoluteprompt.prompt_filters.safety",
+    "ProfanityFilter": "evoluteprompt.prompt_filters.safety",
+    "MaxTokenFilter": "evoluteprompt.prompt_filters.safety",
+    "ContentPolicyFilter": "evoluteprompt.prompt_filters.safety",
+    "FilterPipeline": "evoluteprompt.prompt_filters.pipeline",
+}
+
+if TYPE_CHECKING:
+    from evoluteprompt.prompt_filters.base import PromptFilter
+    from evoluteprompt.prompt_filters.pipeline import FilterPipeline
+    from evoluteprompt.prompt_filters.safety import (
+        ContentPolicyFilter,
+        KeywordFilter,
+        MaxTokenFilter,
+        ProfanityFilter,
+        RegexFilter,
+    )
 
 __all__ = [
     "PromptFilter",
@@ -21,3 +36,17 @@ __all__ = [
     "ContentPolicyFilter",
     "FilterPipeline",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import a public name on first access."""
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -6,6 +6,7 @@ from typing import Any, Dict, List, Optional
 
 from evoluteprompt.core.prompt import Prompt
 from evoluteprompt.prompt_filters.base import FilterResult, PromptFilter
+from evoluteprompt.utils.instrumentation import counter, traced
 
 
 class FilterPipeline(PromptFilter):
@@ -27,6 +28,7 @@ class FilterPipeline(PromptFilter):
         super().__init__(name=name or "FilterPipeline")
         self.filters = filters
 
+    @traced("filters.check")
     def check(self, prompt: Prompt) -> FilterResult:
         """
         Check if a prompt passes all filters in the pipeline.
@@ -46,6 +48,7 @@ class FilterPipeline(PromptFilter):
             results[filter_obj.name] = result
 
             if not result.passed:
+                counter("filters.rejected", filter=filter_obj.name)
                 return FilterResult(
                     passed=False,
                     reason=f"Filter '{filter_obj.name}' failed: {result.reason}",
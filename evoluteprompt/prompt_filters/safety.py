@@ -5,8 +5,6 @@ Safety filters for prompts.
 import re
 from typing import Any, Dict, List, Optional, Pattern, Set, Union
 
-import tiktoken
-
 try:
     import better_profanity
 
@@ -16,6 +14,7 @@ except ImportError:
 
 from evoluteprompt.core.prompt import Prompt
 from evoluteprompt.prompt_filters.base import FilterResult, PromptFilter
+from evoluteprompt.utils.tokenizers import count_prompt_tokens, get_encoding
 
 
 class KeywordFilter(PromptFilter):
@@ -215,7 +214,12 @@ class MaxTokenFilter(PromptFilter):
         """
         super().__init__(name=name)
         self.max_tokens = max_tokens
-        self.encoding = tiktoken.get_encoding(encoding_name)
+        self.encoding_name = encoding_name
+
+    @property
+    def encoding(self) -> Any:
+        """The tokenizer encoding, loaded on first use and shared process-wide."""
+        return get_encoding(self.encoding_name)
 
     def check(self, prompt: Prompt) -> FilterResult:
         """
@@ -227,23 +231,7 @@ class MaxTokenFilter(PromptFilter):
         Returns:
             A FilterResult indicating whether the prompt passed.
         """
-        # Count tokens for each message
-        token_count = 0
-
-        for message in prompt.messages:
-            # Add tokens for message format (role, content, etc.)
-            token_count += 4  # Approx overhead per message
-
-            # Add tokens for content
-            if message.content:
-                token_count += len(self.encoding.encode(message.content))
-
-            # Add tokens for name if present
-            if message.name:
-                token_count += len(self.encoding.encode(message.name))
-
-        # Add tokens for the overall message format
-        token_count += 3  # Approx overhead for the overall structure
+        token_count = count_prompt_tokens(prompt, self.encoding)
 
         if token_count > self.max_tokens:
             return FilterResult(
@@ -2,7 +2,46 @@
 Utility functions and classes for the PromptFlow library.
 """
 
-from evoluteprompt.utils.cache import FileCache, InMemoryCache, ResponseCache
-from evoluteprompt.utils.hashing import hash_prompt
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ["ResponseCache", "InMemoryCache", "FileCache", "hash_prompt"]
+# Imported on first access
+_LAZY_IMPORTS = {
+    "ResponseCache": "evoluteprompt.utils.cache",
+    "InMemoryCache": "evoluteprompt.utils.cache",
+    "FileCache": "evoluteprompt.utils.cache",
+    "hash_prompt": "evoluteprompt.utils.hashing",
+    "LatencyHistogram": "evoluteprompt.utils.histogram",
+    "AliasTable": "evoluteprompt.utils.sampling",
+    "stable_uniform": "evoluteprompt.utils.sampling",
+}
+
+if TYPE_CHECKING:
+    from evoluteprompt.utils.cache import FileCache, InMemoryCache, ResponseCache
+    from evoluteprompt.utils.hashing import hash_prompt
+    from evoluteprompt.utils.histogram import LatencyHistogram
+    from evoluteprompt.utils.sampling import AliasTable, stable_uniform
+
+__all__ = [
+    "ResponseCache",
+    "InMemoryCache",
+    "FileCache",
+    "hash_prompt",
+    "LatencyHistogram",
+    "AliasTable",
+    "stable_uniform",
+]
+
+
+def __getattr__(name: str) -> Any:
+    """Import a public name on first access."""
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
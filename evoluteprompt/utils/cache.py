@@ -2,16 +2,18 @@
 Caching functionality for PromptFlow.
 """
 
+import functools
 import json
 import os
 import pickle
 import time
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Callable, Dict, Optional, Union
 
 from evoluteprompt.core.prompt import Prompt
 from evoluteprompt.core.response import LLMResponse
+from evoluteprompt.utils import instrumentation
 from evoluteprompt.utils.hashing import hash_prompt
 
 
@@ -47,11 +49,34 @@ def hash_prompt(prompt: Prompt, include_parameters: bool = True) -> str:
     return hash_str
 
 
+def _instrumented_get(get: Callable, cache_name: str) -> Callable:
+    """Wrap a cache's ``get`` to time lookups and count hits and misses."""
+
+    @functools.wraps(get)
+    def wrapper(self: "ResponseCache", prompt: Prompt) -> Optional[LLMResponse]:
+        if not instrumentation.is_enabled():
+            return get(self, prompt)
+        with instrumentation.span("cache.get", cache=cache_name):
+            response = get(self, prompt)
+        instrumentation.counter(
+            "cache.hit" if response is not None else "cache.miss", cache=cache_name
+        )
+        return response
+
+    return wrapper
+
+
 class ResponseCache(ABC):
     """
     Abstract base class for response caches.
     """
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Every cache implementation reports its lookups
+        if "get" in cls.__dict__:
+            cls.get = _instrumented_get(cls.__dict__["get"], cls.__name__)
+
     @abstractmethod
     def get(self, prompt: Prompt) -> Optional[LLMResponse]:
         """
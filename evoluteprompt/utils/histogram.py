@@ -0,0 +1,167 @@
+"""
+Compact latency histograms with bounded relative error.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Each power of two is split into 2**(_SUB_BITS - 1) buckets, so a bucket's
+# width is under 1% of its values
+_SUB_BITS = 8
+
+
+def _bucket(value: int) -> int:
+    """Index of the bucket holding a non-negative integer value."""
+    if value < (1 << _SUB_BITS):
+        return value
+    shift = value.bit_length() - _SUB_BITS
+    return (shift << (_SUB_BITS - 1)) + (value >> shift)
+
+
+def _bucket_range(index: int) -> Tuple[int, int]:
+    """Lowest and highest value of a bucket."""
+    if index < (1 << _SUB_BITS):
+        return index, index
+    shift = (index >> (_SUB_BITS - 1)) - 1
+    mantissa = index - (shift << (_SUB_BITS - 1))
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    An HDR-style histogram of latencies.
+
+    Values are kept in microseconds in log-linear buckets: exact below 256 us
+    and within 1% above, with one bucket per distinct range that was seen.
+    Recording is O(1), and histograms from different processes or time
+    windows merge by adding bucket counts.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0  # Sum of recorded values, in microseconds
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def record(self, latency_ms: float, count: int = 1) -> None:
+        """
+        Record a latency.
+
+        Args:
+            latency_ms: The latency in milliseconds. Negative values count as 0.
+            count: Number of times to record it.
+        """
+        value = max(0, int(round(latency_ms * 1000)))
+        index = _bucket(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """
+        Add another histogram's values to this one.
+
+        Args:
+            other: The histogram to add.
+
+        Returns:
+            This histogram.
+        """
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        Estimate a percentile.
+
+        Args:
+            percentile: The percentile, from 0 to 100.
+
+        Returns:
+            The latency in milliseconds, or None if nothing was recorded.
+        """
+        lowest, highest = self.min, self.max
+        if not self.count or lowest is None or highest is None:
+            return None
+
+        rank = max(1, -(-self.count * percentile // 100))  # ceil
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = _bucket_range(index)
+                # Report the middle of the bucket, clamped to what was seen
+                value = min(max((low + high) / 2, lowest), highest)
+                return value / 1000
+        return highest / 1000
+
+    def percentiles(
+        self, percentiles: Iterable[float] = (50, 95, 99)
+    ) -> Dict[float, Optional[float]]:
+        """
+        Estimate several percentiles.
+
+        Args:
+            percentiles: The percentiles, from 0 to 100.
+
+        Returns:
+            A mapping from percentile to latency in milliseconds.
+        """
+        return {p: self.percentile(p) for p in percentiles}
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean latency in milliseconds, or None if nothing was recorded."""
+        return self.total / self.count / 1000 if self.count else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the histogram compactly for JSON storage.
+
+        Returns:
+            A dictionary accepted by ``from_dict``.
+        """
+        indexes = sorted(self.counts)
+        return {
+            "b": indexes,
+            "c": [self.counts[i] for i in indexes],
+            "n": self.count,
+            "t": self.total,
+            "lo": self.min,
+            "hi": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """
+        Deserialize a histogram.
+
+        Args:
+            data: A dictionary from ``to_dict``.
+
+        Returns:
+            The histogram.
+        """
+        histogram = cls()
+        histogram.counts = dict(zip(data.get("b", []), data.get("c", [])))
+        histogram.count = data.get("n", 0)
+        histogram.total = data.get("t", 0)
+        histogram.min = data.get("lo")
+        histogram.max = data.get("hi")
+        return histogram
+
+    def __len__(self) -> int:
+        return self.count
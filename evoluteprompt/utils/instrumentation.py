@@ -0,0 +1,483 @@
+"""
+Lightweight timing spans and counters for the library's hot paths.
+
+Instrumentation is off until an exporter is added. While it is off, a traced
+function costs one extra call and a flag check, and ``span`` returns a shared
+no-op object.
+
+Example:
+    exporter = InMemoryExporter()
+    add_exporter(exporter)
+    ...
+    for span in exporter.spans:
+        print(span.name, span.duration_ms)
+"""
+
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Exporters in use; instrumentation is enabled when this is not empty
+_exporters: Tuple["Exporter", ...] = ()
+_exporters_lock = threading.Lock()
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("evoluteprompt_span", default=None)
+
+
+class Span:
+    """A timed operation."""
+
+    __slots__ = (
+        "name",
+        "attributes",
+        "parent",
+        "start_time_ns",
+        "duration_ns",
+        "error",
+        "_start",
+        "_token",
+        "_exporters",
+    )
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        """
+        Initialize a span. Use ``span()`` rather than creating spans directly.
+
+        Args:
+            name: Dotted name of the operation.
+            attributes: Attributes of the operation.
+        """
+        self.name = name
+        self.attributes = attributes
+        self.parent: Optional[Span] = None
+        self.start_time_ns = 0  # Wall clock, for exporters that need timestamps
+        self.duration_ns = 0
+        self.error: Optional[str] = None  # Exception type name if the operation failed
+
+    @property
+    def end_time_ns(self) -> int:
+        """Wall clock time at the end of the span."""
+        return self.start_time_ns + self.duration_ns
+
+    @property
+    def duration_ms(self) -> float:
+        """Duration in milliseconds."""
+        return self.duration_ns / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Set an attribute.
+
+        Args:
+            key: Attribute name.
+            value: A string, number or boolean.
+        """
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self)
+        self._exporters = _exporters
+        for exporter in self._exporters:
+            exporter.on_start(self)
+        self.start_time_ns = time.time_ns()
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.duration_ns = time.perf_counter_ns() - self._start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _current_span.reset(self._token)
+        for exporter in self._exporters:
+            exporter.on_end(self)
+
+    def __repr__(self) -> str:
+        return f"Span({self.name!r}, {self.duration_ms:.3f} ms, {self.attributes!r})"
+
+
+class _NoopSpan:
+    """Stands in for a span while instrumentation is off."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Exporter:
+    """
+    Receives spans and counter increments.
+
+    Subclasses override the hooks they need. Hooks run inline on the
+    instrumented call, so they should be quick.
+    """
+
+    def on_start(self, span: Span) -> None:
+        """Called when a span starts."""
+
+    def on_end(self, span: Span) -> None:
+        """Called when a span ends."""
+
+    def add(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        """Called when a counter is incremented."""
+
+
+def is_enabled() -> bool:
+    """
+    Check whether any exporter is installed.
+
+    Returns:
+        True if spans and counters are being recorded.
+    """
+    return bool(_exporters)
+
+
+def add_exporter(exporter: Exporter) -> Exporter:
+    """
+    Start sending spans and counters to an exporter.
+
+    Args:
+        exporter: The exporter to add.
+
+    Returns:
+        The exporter.
+    """
+    global _exporters
+    with _exporters_lock:
+        if exporter not in _exporters:
+            _exporters = _exporters + (exporter,)
+    return exporter
+
+
+def remove_exporter(exporter: Exporter) -> None:
+    """
+    Stop sending spans and counters to an exporter.
+
+    Args:
+        exporter: The exporter to remove.
+    """
+    global _exporters
+    with _exporters_lock:
+        _exporters = tuple(e for e in _exporters if e is not exporter)
+
+
+@contextmanager
+def exporting(exporter: Exporter) -> Iterator[Exporter]:
+    """
+    Send spans and counters to an exporter within a block.
+
+    Args:
+        exporter: The exporter to use.
+
+    Yields:
+        The exporter.
+    """
+    add_exporter(exporter)
+    try:
+        yield exporter
+    finally:
+        remove_exporter(exporter)
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """
+    Time a block of code.
+
+    Args:
+        name: Dotted name of the operation, such as ``"repo.get_prompt"``.
+        **attributes: Attributes of the operation.
+
+    Returns:
+        A context manager yielding the span (or a no-op stand-in while
+        instrumentation is off), on which more attributes can be set.
+    """
+    if not _exporters:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def counter(name: str, value: float = 1, **attributes: Any) -> None:
+    """
+    Increment a counter.
+
+    Args:
+        name: Dotted name of the counter, such as ``"cache.hit"``.
+        value: Amount to add.
+        **attributes: Attributes of the increment.
+    """
+    if not _exporters:
+        return
+    for exporter in _exporters:
+        exporter.add(name, value, attributes)
+
+
+def traced(name: str, attribute: Optional[str] = None, **attributes: Any) -> Callable:
+    """
+    Record a span for every call of a function or coroutine function.
+
+    Args:
+        name: Dotted name of the span.
+        attribute: Name of a parameter whose argument is recorded as an
+            attribute, such as ``"prompt_name"``.
+        **attributes: Fixed attributes of every span.
+
+    Returns:
+        A decorator.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        # Position and name of the recorded parameter
+        param: Optional[Tuple[int, str]] = None
+        if attribute is not None:
+            param = (list(inspect.signature(fn).parameters).index(attribute), attribute)
+
+        def span_attributes(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+            result = dict(attributes)
+            if param is not None:
+                index, key = param
+                value = args[index] if index < len(args) else kwargs.get(key)
+                if value is not None:
+                    result[key] = value
+            return result
+
+        if inspect.iscoroutinefunction(fn):
+
+            async def traced_call(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+                with Span(name, span_attributes(args, kwargs)):
+                    return await fn(*args, **kwargs)
+
+            # Not a coroutine function itself, so the disabled path returns
+            # the wrapped coroutine without adding a frame
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not _exporters:
+                    return fn(*args, **kwargs)
+                return traced_call(args, kwargs)
+
+            return inspect.markcoroutinefunction(wrapper)
+
+        @functools.wraps(fn)
+        def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _exporters:
+                return fn(*args, **kwargs)
+            with Span(name, span_attributes(args, kwargs)):
+                return fn(*args, **kwargs)
+
+        return sync_wrapper
+
+    return decorator
+
+
+def _attribute_key(attributes: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    """A hashable, order-independent key for a set of attributes."""
+    return tuple(sorted(attributes.items()))
+
+
+class InMemoryExporter(Exporter):
+    """Keeps every finished span and counter total in memory, for tests."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], float] = {}
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def add(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        key = (name, _attribute_key(attributes))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def find(self, name: str) -> List[Span]:
+        """
+        Get the finished spans with a name.
+
+        Args:
+            name: The span name.
+
+        Returns:
+            The spans, in the order they finished.
+        """
+        return [span for span in self.spans if span.name == name]
+
+    def counter_value(self, name: str, **attributes: Any) -> float:
+        """
+        Sum a counter over every attribute set that includes ``attributes``.
+
+        Args:
+            name: The counter name.
+            **attributes: Attributes to match.
+
+        Returns:
+            The total.
+        """
+        wanted = set(attributes.items())
+        return sum(
+            value
+            for (counter_name, key), value in self.counters.items()
+            if counter_name == name and wanted <= set(key)
+        )
+
+    def clear(self) -> None:
+        """Forget every span and counter."""
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+
+def _metric_name(name: str) -> str:
+    """Turn a dotted name into a Prometheus metric name."""
+    return "evoluteprompt_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _labels(key: Tuple[Tuple[str, Any], ...]) -> str:
+    """Format attributes as Prometheus labels."""
+    if not key:
+        return ""
+    parts = []
+    for label, value in key:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{_metric_name(label)[len("evoluteprompt_"):]}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class PrometheusExporter(Exporter):
+    """
+    Aggregates spans and counters for a Prometheus scrape.
+
+    Span durations are exported as one summary, ``evoluteprompt_span_seconds``,
+    labelled by span name and attributes. Each counter becomes
+    ``evoluteprompt_<name>_total``.
+    """
+
+    def __init__(self) -> None:
+        # (span name, attributes) -> [count, total seconds, errors]
+        self._spans: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], List[float]] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], float] = {}
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        key = (span.name, _attribute_key(span.attributes))
+        with self._lock:
+            stats = self._spans.get(key)
+            if stats is None:
+                stats = self._spans[key] = [0, 0.0, 0]
+            stats[0] += 1
+            stats[1] += span.duration_ns / 1e9
+            if span.error is not None:
+                stats[2] += 1
+
+    def add(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        key = (name, _attribute_key(attributes))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            The metrics, ready to serve on a ``/metrics`` endpoint.
+        """
+        with self._lock:
+            spans = sorted(self._spans.items())
+            counters = sorted(self._counters.items())
+
+        lines = []
+        if spans:
+            lines.append("# HELP evoluteprompt_span_seconds Duration of instrumented operations.")
+            lines.append("# TYPE evoluteprompt_span_seconds summary")
+            for (name, key), (count, total, _) in spans:
+                labels = _labels((("span", name),) + key)
+                lines.append(f"evoluteprompt_span_seconds_count{labels} {count}")
+                lines.append(f"evoluteprompt_span_seconds_sum{labels} {total!r}")
+            lines.append("# HELP evoluteprompt_span_errors_total Failed instrumented operations.")
+            lines.append("# TYPE evoluteprompt_span_errors_total counter")
+            for (name, key), (_, _, errors) in spans:
+                labels = _labels((("span", name),) + key)
+                lines.append(f"evoluteprompt_span_errors_total{labels} {errors}")
+
+        declared = set()
+        for (name, key), value in counters:
+            metric = _metric_name(name) + "_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(key)} {value!r}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+class OpenTelemetryExporter(Exporter):
+    """
+    Forwards spans and counters to OpenTelemetry.
+
+    Spans nest under each other and under whatever OpenTelemetry span is
+    current when the outermost one starts.
+    """
+
+    def __init__(self, tracer: Any = None, meter: Any = None):
+        """
+        Initialize the exporter.
+
+        Args:
+            tracer: The tracer to create spans with. Defaults to the global
+                tracer provider's tracer for ``evoluteprompt``.
+            meter: The meter to create counters with. Defaults to the global
+                meter provider's meter for ``evoluteprompt``.
+
+        Raises:
+            ImportError: If the OpenTelemetry API is not installed.
+        """
+        try:
+            from opentelemetry import metrics, trace
+        except ImportError:
+            raise ImportError(
+                "The 'opentelemetry-api' package is required for OpenTelemetryExporter. "
+                "Install it with 'pip install opentelemetry-api'."
+            )
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("evoluteprompt")
+        self.meter = meter or metrics.get_meter("evoluteprompt")
+        self._spans: Dict[int, Any] = {}
+        self._counters: Dict[str, Any] = {}
+
+    def on_start(self, span: Span) -> None:
+        parent = self._spans.get(id(span.parent)) if span.parent is not None else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        self._spans[id(span)] = self.tracer.start_span(
+            span.name, context=context, attributes=span.attributes, start_time=time.time_ns()
+        )
+
+    def on_end(self, span: Span) -> None:
+        otel_span = self._spans.pop(id(span), None)
+        if otel_span is None:
+            return
+        otel_span.set_attributes(span.attributes)
+        if span.error is not None:
+            from opentelemetry.trace import Status, StatusCode
+
+            otel_span.set_status(Status(StatusCode.ERROR, span.error))
+        otel_span.end(end_time=span.end_time_ns)
+
+    def add(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        otel_counter = self._counters.get(name)
+        if otel_counter is None:
+            otel_counter = self._counters[name] = self.meter.create_counter(name)
+        otel_counter.add(value, attributes)
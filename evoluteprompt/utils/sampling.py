@@ -0,0 +1,99 @@
+"""
+Utilities for weighted and deterministic sampling.
+"""
+
+import hashlib
+import random
+from typing import List, Optional, Sequence
+
+
+class AliasTable:
+    """
+    Walker's alias table for O(1) weighted sampling.
+
+    Building the table is O(n); each sample afterwards costs one uniform
+    number, one multiplication and one comparison, regardless of the number
+    of outcomes.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        """
+        Build the table.
+
+        Args:
+            weights: Non-negative weights, one per outcome. They do not need to
+                sum to 1.0.
+
+        Raises:
+            ValueError: If the weights are empty, negative or all zero.
+        """
+        if not weights:
+            raise ValueError("At least one weight is required")
+        if any(w < 0 for w in weights):
+            raise ValueError("Weights must not be negative")
+
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("At least one weight must be positive")
+
+        n = len(weights)
+        scaled = [w * n / total for w in weights]
+        self.prob: List[float] = [1.0] * n
+        self.alias: List[int] = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        # Whatever is left has probability 1 up to rounding error
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def pick(self, u: float) -> int:
+        """
+        Map a uniform number to an outcome.
+
+        Args:
+            u: A number in [0, 1).
+
+        Returns:
+            The index of the selected outcome.
+        """
+        n = len(self.prob)
+        scaled = u * n
+        # Guard against u * n rounding up to n
+        i = min(int(scaled), n - 1)
+        return i if scaled - i < self.prob[i] else self.alias[i]
+
+    def sample(self, rng: Optional[random.Random] = None) -> int:
+        """
+        Draw a random outcome.
+
+        Args:
+            rng: The random generator to use, defaults to the ``random`` module.
+
+        Returns:
+            The index of the selected outcome.
+        """
+        return self.pick((rng or random).random())
+
+
+def stable_uniform(key: str, salt: str = "") -> float:
+    """
+    Hash a key to a number in [0, 1) that is stable across processes.
+
+    Args:
+        key: The key to hash, e.g. a user ID.
+        salt: Namespace so that different experiments bucket independently.
+
+    Returns:
+        A uniformly distributed number in [0, 1).
+    """
+    digest = hashlib.blake2b(f"{salt}:{key}".encode(), digest_size=8).digest()
+    # Keep 53 bits so the result is exactly representable and below 1.0
+    return (int.from_bytes(digest, "big") >> 11) / 2**53
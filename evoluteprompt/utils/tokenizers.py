@@ -0,0 +1,156 @@
+"""
+A process-wide registry of tokenizer encodings.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from evoluteprompt.core.prompt import Prompt
+from evoluteprompt.core.types import Message
+from evoluteprompt.utils.instrumentation import span
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Approximate tokens for the formatting of each message and of the whole request
+MESSAGE_OVERHEAD_TOKENS = 4
+PROMPT_OVERHEAD_TOKENS = 3
+
+_lock = threading.Lock()
+_encodings: Dict[str, Any] = {}
+_model_encodings: Dict[str, str] = {}
+_load_times_ms: Dict[str, float] = {}
+
+
+def get_encoding(encoding_name: str = DEFAULT_ENCODING) -> Any:
+    """
+    Get a tiktoken encoding, loading it on first use.
+
+    Each encoding is loaded once per process and shared by every caller.
+
+    Args:
+        encoding_name: Name of the encoding, such as ``"cl100k_base"``.
+
+    Returns:
+        The ``tiktoken.Encoding``.
+    """
+    encoding = _encodings.get(encoding_name)
+    if encoding is not None:
+        return encoding
+
+    with _lock:
+        encoding = _encodings.get(encoding_name)
+        if encoding is None:
+            import tiktoken
+
+            with span("tokenizer.load", encoding=encoding_name):
+                start = time.perf_counter()
+                encoding = tiktoken.get_encoding(encoding_name)
+                _load_times_ms[encoding_name] = (time.perf_counter() - start) * 1000
+            _encodings[encoding_name] = encoding
+    return encoding
+
+
+def encoding_for_model(model: str) -> Any:
+    """
+    Get the encoding used by a model.
+
+    Models that tiktoken does not know yet fall back to ``cl100k_base``.
+
+    Args:
+        model: The model name.
+
+    Returns:
+        The ``tiktoken.Encoding``.
+    """
+    encoding_name = _model_encodings.get(model)
+    if encoding_name is None:
+        from tiktoken.model import encoding_name_for_model
+
+        try:
+            encoding_name = encoding_name_for_model(model)
+        except KeyError:
+            encoding_name = DEFAULT_ENCODING
+        _model_encodings[model] = encoding_name
+    return get_encoding(encoding_name)
+
+
+def warm_up(
+    encoding_names: Iterable[str] = (DEFAULT_ENCODING,), models: Iterable[str] = ()
+) -> None:
+    """
+    Load encodings ahead of time.
+
+    Call this in a pre-fork server before the workers are forked, so they
+    share the loaded encodings copy-on-write instead of each loading its own.
+
+    Args:
+        encoding_names: Encodings to load.
+        models: Models whose encodings to load.
+    """
+    for encoding_name in encoding_names:
+        get_encoding(encoding_name)
+    for model in models:
+        encoding_for_model(model)
+
+
+def load_stats() -> Dict[str, float]:
+    """
+    Get the load time of each loaded encoding.
+
+    Returns:
+        A mapping from encoding name to load time in milliseconds.
+    """
+    return dict(_load_times_ms)
+
+
+def clear() -> None:
+    """Forget every loaded encoding."""
+    with _lock:
+        _encodings.clear()
+        _model_encodings.clear()
+        _load_times_ms.clear()
+
+
+def count_message_tokens(message: Message, encoding: Optional[Any] = None) -> int:
+    """
+    Estimate the number of tokens one message uses in a chat request.
+
+    Args:
+        message: The message to count tokens for.
+        encoding: The encoding to use (default: ``cl100k_base``).
+
+    Returns:
+        Number of tokens, including the message's formatting overhead.
+    """
+    if encoding is None:
+        encoding = get_encoding()
+
+    token_count = MESSAGE_OVERHEAD_TOKENS
+
+    if message.content:
+        token_count += len(encoding.encode(message.content))
+    if message.name:
+        token_count += len(encoding.encode(message.name))
+
+    return token_count
+
+
+def count_prompt_tokens(prompt: Prompt, encoding: Optional[Any] = None) -> int:
+    """
+    Estimate the number of tokens a prompt uses in a chat request.
+
+    Args:
+        prompt: The prompt to count tokens for.
+        encoding: The encoding to use (default: ``cl100k_base``).
+
+    Returns:
+        Number of tokens.
+    """
+    if encoding is None:
+        encoding = get_encoding()
+
+    token_count = sum(count_message_tokens(message, encoding) for message in prompt.messages)
+
+    # Add tokens for the overall message format
+    return token_count + PROMPT_OVERHEAD_TOKENS
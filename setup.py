@@ -24,7 +24,8 @@ core_deps = [
 
 # Database dependencies
 db_deps = [
-    "tortoise-orm>=0.19.0",
+    # Schema generation relies on tortoise-orm internals; tested with 0.24
+    "tortoise-orm>=0.24.2,<0.25",
     "aiosqlite>=0.17.0",
 ]
 
@@ -39,6 +40,11 @@ ui_deps = [
     "streamlit>=1.22.0",
 ]
 
+# Faster, smaller packed archives
+zstd_deps = [
+    "zstandard>=0.21.0",
+]
+
 setup(
     name="evoluteprompt",
     version=version,
@@ -57,7 +63,8 @@ setup(
     extras_require={
         "api": api_deps,
         "ui": ui_deps,
-        "all": api_deps + ui_deps,
+        "zstd": zstd_deps,
+        "all": api_deps + ui_deps + zstd_deps,
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,59 @@
+"""
+Tests for comparing benchmark results.
+"""
+
+from benchmarks.runner import compare_results
+
+
+def document(**results):
+    """Build a results document from name=ops_per_sec pairs; None means failed."""
+    return {
+        "results": {
+            name: {"error": "RuntimeError: boom"} if ops is None else {"ops_per_sec": ops}
+            for name, ops in results.items()
+        }
+    }
+
+
+def test_compare_results_flags_regressions():
+    """Test throughput drops, failures and missing benchmarks."""
+    baseline = document(fast=1000.0, slow=1000.0, broken=1000.0, removed=1000.0)
+    current = document(fast=1200.0, slow=850.0, broken=None, added=500.0)
+
+    rows = {row["name"]: row for row in compare_results(baseline, current, threshold=0.1)}
+
+    assert sorted(rows) == ["added", "broken", "fast", "removed", "slow"]
+    assert rows["fast"]["change"] == 1200.0 / 1000.0 - 1
+    assert not rows["fast"]["regression"]
+    assert rows["slow"]["change"] == 850.0 / 1000.0 - 1
+    assert rows["slow"]["regression"]
+
+    # A benchmark that failed in the current run is a regression
+    assert rows["broken"] == {
+        "name": "broken", "baseline": 1000.0, "current": None, "change": None,
+        "regression": True,
+    }
+
+    # Benchmarks present in only one run are reported without a change
+    for name in ("added", "removed"):
+        assert rows[name]["change"] is None
+        assert not rows[name]["regression"]
+
+
+def test_compare_results_threshold():
+    """Test that drops within the threshold are tolerated."""
+    baseline = document(render=1000.0)
+    current = document(render=920.0)
+
+    assert not compare_results(baseline, current, threshold=0.1)[0]["regression"]
+    assert compare_results(baseline, current, threshold=0.05)[0]["regression"]
+
+
+def test_compare_results_baseline_failure():
+    """Test that a benchmark fixed since a failed baseline is not a regression."""
+    rows = compare_results(document(render=None), document(render=1000.0))
+
+    assert rows == [
+        {"name": "render", "baseline": None, "current": 1000.0, "change": None,
+         "regression": False},
+    ]
@@ -0,0 +1,15 @@
+"""
+Shared test helpers.
+"""
+
+from evoluteprompt.core.prompt import PromptBuilder
+
+
+def make_prompt(text, category=None, is_active=True, priority=0):
+    """Build a single-message prompt with selection metadata."""
+    return (
+        PromptBuilder()
+        .add_user(text)
+        .set_metadata(category=category, is_active=is_active, priority=priority)
+        .build()
+    )
@@ -0,0 +1,159 @@
+"""
+Tests for the bandit prompt strategy.
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from evoluteprompt.core.bandit import BanditPromptStrategy
+from evoluteprompt.core.database import DBPromptRepo, PromptModel
+from evoluteprompt.core.stats import StatsAggregator
+from evoluteprompt.core.types import PromptStats
+from tests.conftest import make_prompt
+
+
+async def play(strategy, rounds, success_rates, rng, stats=None):
+    """Simulate traffic and return how often each variant was served."""
+    served = {}
+    for _ in range(rounds):
+        prompt = await strategy.select_prompt("ignored")
+        name = prompt.metadata.name
+        served[name] = served.get(name, 0) + 1
+        strategy.record(prompt, rng.random() < success_rates[name], stats and stats[name])
+    return served
+
+
+@pytest.mark.parametrize("algorithm", ["thompson", "ucb1"])
+def test_bandit_shifts_traffic_to_best_variant(algorithm):
+    """Test that most traffic ends up on the variant with the best success rate."""
+
+    async def scenario():
+        async with DBPromptRepo("sqlite://:memory:") as repo:
+            await repo.save_prompt("good", make_prompt("good"))
+            await repo.save_prompt("bad", make_prompt("bad"))
+
+            strategy = BanditPromptStrategy(
+                repo, ["good", "bad"], algorithm=algorithm, rng=random.Random(1)
+            )
+            return await play(strategy, 400, {"good": 0.9, "bad": 0.3}, random.Random(2))
+
+    served = asyncio.run(scenario())
+
+    assert served["good"] > 3 * served.get("bad", 0)
+
+
+def test_bandit_prefers_cheaper_version():
+    """Test that latency and token cost count against the reward."""
+
+    async def scenario():
+        async with DBPromptRepo("sqlite://:memory:") as repo:
+            await repo.save_prompt("summary", make_prompt("long"), version="0.1.0")
+            await repo.save_prompt("summary", make_prompt("short"), version="0.2.0")
+
+            strategy = BanditPromptStrategy(
+                repo,
+                [("summary", "0.1.0"), ("summary", "0.2.0")],
+                latency_weight=0.4,
+                cost_weight=0.4,
+                rng=random.Random(3),
+            )
+            costs = {
+                "long": PromptStats(latency_ms=900, total_tokens=900),
+                "short": PromptStats(latency_ms=100, total_tokens=100),
+            }
+            served = {"long": 0, "short": 0}
+            for _ in range(300):
+                prompt = await strategy.select_prompt("summary")
+                text = prompt.messages[0].content
+                served[text] += 1
+                strategy.record(prompt, True, costs[text])
+            return served
+
+    served = asyncio.run(scenario())
+
+    assert served["short"] > 3 * served["long"]
+
+
+def test_bandit_flushes_counts_and_loads_priors():
+    """Test that outcomes reach the repository and seed a new strategy."""
+
+    async def scenario():
+        async with DBPromptRepo("sqlite://:memory:") as repo:
+            await repo.save_prompt("a", make_prompt("a"))
+
+            async with StatsAggregator(repo, flush_interval_ms=10) as aggregator:
+                strategy = BanditPromptStrategy(repo, ["a"], aggregator=aggregator)
+                prompt = await strategy.select_prompt("ignored")
+                for success in (True, True, False):
+                    strategy.record(prompt, success)
+
+            restarted = BanditPromptStrategy(repo, ["a"])
+            await restarted.load_priors()
+            return restarted.stats[0]
+
+    stats = asyncio.run(scenario())
+
+    assert stats.pulls == 3
+    assert stats.reward == 2
+
+
+def test_bandit_selection_reuses_active_prompts():
+    """Test that selections query the repository only after a write."""
+
+    async def scenario():
+        async with DBPromptRepo("sqlite://:memory:") as repo:
+            await repo.save_prompt("a", make_prompt("a"))
+            await repo.save_prompt("b", make_prompt("b"))
+
+            queries = []
+            get_active_prompts = repo.get_active_prompts
+
+            async def counting(names):
+                queries.append(list(names))
+                return await get_active_prompts(names)
+
+            repo.get_active_prompts = counting
+            repo.get_active_prompt = None  # Selection must not query one prompt at a time
+
+            strategy = BanditPromptStrategy(repo, ["a", "b"], rng=random.Random(0))
+            for _ in range(100):
+                await strategy.select_prompt("ignored")
+            before_write = len(queries)
+
+            version = await repo.save_prompt("a", make_prompt("a, revised"))
+            await repo.set_active("a", version)
+            prompts = {(await strategy.select_prompt("ignored")).messages[0].content
+                       for _ in range(50)}
+            return before_write, len(queries), prompts
+
+    before_write, after_write, prompts = asyncio.run(scenario())
+
+    assert before_write == 1
+    assert after_write == 2
+    assert "a, revised" in prompts and "a" not in prompts
+
+
+def test_bandit_records_rows_saved_without_name():
+    """Test that prompts from rows without a name in their metadata can be recorded."""
+
+    async def scenario():
+        async with DBPromptRepo("sqlite://:memory:") as repo:
+            db = await repo.init()
+            await PromptModel.create(
+                name="legacy", version="0.1.0", messages=[{"role": "user", "content": "Hi"}],
+                metadata_json={"version": "0.1.0", "is_active": True}, parameters_json={},
+                stats_json={}, is_active=True, using_db=db,
+            )
+
+            strategy = BanditPromptStrategy(repo, ["legacy"], rng=random.Random(0))
+            strategy.record(await strategy.select_prompt("ignored"), True)
+            return strategy
+
+    strategy = asyncio.run(scenario())
+
+    assert strategy.stats[0].pulls == 1
+
+    with pytest.raises(KeyError):
+        strategy.record(make_prompt("unsaved"), True)
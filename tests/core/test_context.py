@@ -0,0 +1,110 @@
+"""
+Tests for fitting conversations into a context budget.
+"""
+
+import asyncio
+
+import pytest
+
+from evoluteprompt.core.context import (
+    SUMMARY_NAME,
+    ContextBudget,
+    ContextBudgetError,
+    ProviderSummarizer,
+)
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.core.types import MessageRole
+from evoluteprompt.integrations.mock import MockProvider
+
+
+def words(text):
+    return len(text.split())
+
+
+def conversation(turns=5):
+    builder = PromptBuilder().add_system("Be brief.")
+    for i in range(turns):
+        builder.add_user(f"question {i} " * 5).add_assistant(f"answer {i} " * 5)
+    return builder.build()
+
+
+def test_truncate_drops_oldest_turns():
+    """Test that old turns are dropped and the system message is kept."""
+    prompt = conversation()
+    budget = ContextBudget(max_tokens=70, token_counter=words)
+    assert budget.count_prompt(prompt) == 3 + 6 + 5 * 2 * 14
+
+    fitted = budget.truncate(prompt)
+    assert budget.count_prompt(fitted) <= 70
+    assert fitted.messages[0].content == "Be brief."
+    assert fitted.messages[-1].content == prompt.messages[-1].content
+    assert [m.role for m in fitted.messages[1:]] == [MessageRole.USER, MessageRole.ASSISTANT] * 2
+
+    # A prompt that already fits is returned as is
+    assert budget.truncate(fitted) is fitted
+
+
+def test_fit_summarizes_dropped_turns():
+    """Test that dropped turns are replaced by a summary, sync or async."""
+    seen = []
+
+    def summarize(messages):
+        seen.append(messages)
+        return "earlier: " + str(len(messages))
+
+    async def summarize_async(messages):
+        return summarize(messages)
+
+    for summarizer in (summarize, summarize_async):
+        seen.clear()
+        budget = ContextBudget(
+            max_tokens=80, token_counter=words, summarizer=summarizer, summary_tokens=10
+        )
+        fitted = asyncio.run(budget.fit(conversation()))
+
+        summary = fitted.messages[1]
+        assert summary.role == MessageRole.SYSTEM and summary.name == SUMMARY_NAME
+        assert summary.content == f"earlier: {len(seen[0])}"
+        assert budget.count_prompt(fitted) <= 80
+
+        # Fitting a longer conversation folds the old summary into the new one
+        longer = fitted.model_copy(deep=True)
+        for i in range(5, 8):
+            longer.add_user(f"question {i} " * 5).add_assistant(f"answer {i} " * 5)
+        asyncio.run(budget.fit(longer))
+        assert seen[1][0].name == SUMMARY_NAME
+
+
+def test_window_counts_each_message_once():
+    """Test that a growing conversation only tokenizes new messages."""
+    calls = []
+
+    def counter(text):
+        calls.append(text)
+        return words(text)
+
+    budget = ContextBudget(max_tokens=50, token_counter=counter)
+    window = budget.window().add_system("Be brief.")
+    for i in range(20):
+        window.add_user(f"question {i} " * 5).add_assistant(f"answer {i} " * 5)
+        window.truncate()
+        assert window.total_tokens == budget.count_prompt(window.to_prompt()) <= 50
+
+    assert len(calls) == 1 + 20 * 2
+    assert window.dropped_messages > 0
+
+
+def test_budget_error_and_provider_summarizer():
+    """Test the error when the latest turn alone is too long, and provider summaries."""
+    budget = ContextBudget(max_tokens=20, token_counter=words)
+    with pytest.raises(ContextBudgetError):
+        budget.truncate(conversation(turns=1))
+
+    provider = MockProvider(reply="They asked five questions.")
+    budget = ContextBudget(
+        max_tokens=80, token_counter=words,
+        summarizer=ProviderSummarizer(provider), summary_tokens=10,
+    )
+    fitted = asyncio.run(budget.fit(conversation()))
+    assert fitted.messages[1].content == "They asked five questions."
+    assert provider.calls == 1
@@ -0,0 +1,110 @@
+"""
+Tests for the prompt diff engine.
+"""
+
+import asyncio
+import random
+
+from evoluteprompt.core.database import DBPromptRepo
+from evoluteprompt.core.diff import diff_prompts, diff_text, myers_diff
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.core.repository import PromptRepo
+
+
+def lcs_length(a, b):
+    """Length of the longest common subsequence, by dynamic programming."""
+    table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            table[i + 1][j + 1] = table[i][j] + 1 if x == y else max(table[i][j + 1],
+                                                                     table[i + 1][j])
+    return table[len(a)][len(b)]
+
+
+def test_myers_diff_is_minimal():
+    """Test that the edit script is valid and as short as possible."""
+    rng = random.Random(0)
+    for _ in range(500):
+        a = [rng.choice("abc") for _ in range(rng.randint(0, 15))]
+        b = [rng.choice("abc") for _ in range(rng.randint(0, 15))]
+        ops = myers_diff(a, b)
+
+        assert [a[i] for tag, i, _ in ops if tag != "insert"] == a
+        assert [b[j] for tag, _, j in ops if tag != "delete"] == b
+        assert all(a[i] == b[j] for tag, i, j in ops if tag == "equal")
+        assert sum(tag == "equal" for tag, _, _ in ops) == lcs_length(a, b)
+
+
+def test_diff_text_by_word():
+    """Test grouping of word-level changes."""
+    ops = diff_text("Answer in one short sentence.", "Answer in two short sentences.", "word")
+
+    assert [(op.tag, op.text) for op in ops] == [
+        ("equal", "Answer in "),
+        ("delete", "one"),
+        ("insert", "two"),
+        ("equal", " short "),
+        ("delete", "sentence."),
+        ("insert", "sentences."),
+    ]
+
+
+def test_diff_prompts_aligns_messages():
+    """Test that unchanged messages are matched and edits are paired."""
+    old = (
+        PromptBuilder()
+        .add_system("You are helpful.\nBe concise.")
+        .add_user("Hi")
+        .add_assistant("Hello!")
+        .build()
+    )
+    new = (
+        PromptBuilder()
+        .add_system("You are helpful.\nBe thorough.")
+        .add_user("Hi")
+        .set_parameters(temperature=0.2)
+        .build()
+    )
+
+    diff = diff_prompts(old, new)
+
+    assert [m.status for m in diff.messages] == ["changed", "equal", "removed"]
+    assert [(op.tag, op.text) for op in diff.messages[0].ops] == [
+        ("equal", "You are helpful.\n"),
+        ("delete", "Be concise."),
+        ("insert", "Be thorough."),
+    ]
+    assert diff.parameters_changes["temperature"] == (None, 0.2)
+    assert diff.summary()["message_count_diff"] == -1
+
+
+def save_versions(save):
+    """Save ten versions that each change the user message."""
+    for i in range(10):
+        save(PromptBuilder().add_system("Shared system prompt").add_user(f"Step {i}").build())
+
+
+def test_ranged_history_from_both_repositories(tmp_path):
+    """Test diffs over a version range from the file and database repositories."""
+    repo = PromptRepo(tmp_path)
+    save_versions(lambda prompt: repo.save_prompt("flow", prompt))
+
+    async def from_db():
+        async with DBPromptRepo("sqlite://:memory:") as db_repo:
+            for i in range(10):
+                await db_repo.save_prompt("flow", repo.get_prompt("flow", f"0.1.{i}"))
+            diff = await db_repo.diff_versions("flow", "0.1.3", "0.1.8")
+            steps = [step async for step in db_repo.history("flow", "0.1.3", "0.1.8")]
+            return diff, steps
+
+    file_diff = repo.diff_versions("flow", "0.1.3", "0.1.8")
+    file_steps = list(repo.history("flow", "0.1.3", "0.1.8"))
+    db_diff, db_steps = asyncio.run(from_db())
+
+    assert [m.status for m in file_diff.messages] == ["equal", "changed"]
+    assert file_diff.messages[1].ops[-1].text == "Step 8"
+    assert [(s.old_version, s.new_version) for s in file_steps][0] == ("0.1.3", "0.1.4")
+    assert len(file_steps) == 5
+    assert db_diff.messages == file_diff.messages
+    assert [s.messages for s in db_steps] == [s.messages for s in file_steps]
+    assert repo.compare_versions("flow", "0.1.0", "0.1.1")["messages_changed"] == 1
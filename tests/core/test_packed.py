@@ -0,0 +1,78 @@
+"""
+Tests for packed prompt archives.
+"""
+
+import os
+
+import pytest
+
+from evoluteprompt.core.packed import PackedPromptRepo, export_packed, import_packed
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.core.repository import PromptRepo
+
+
+def make_repo(path):
+    """Create a repository with a few prompts and versions."""
+    repo = PromptRepo(path)
+    for i in range(12):
+        repo.save_prompt("greeting", PromptBuilder().add_user(f"hello {i}").build())
+    repo.save_prompt("farewell", PromptBuilder().add_system("Be brief.").add_user("bye").build())
+    return repo
+
+
+def test_packed_repo_reads_like_prompt_repo(tmp_path):
+    """Test that an archive answers the same queries as its source."""
+    source = make_repo(os.path.join(tmp_path, "source"))
+    archive = os.path.join(tmp_path, "prompts.pack")
+
+    assert export_packed(source, archive, codec="zlib") == 13
+
+    with PackedPromptRepo(archive) as packed:
+        assert sorted(packed.list_prompts()) == sorted(source.list_prompts())
+        assert packed.list_versions("greeting") == source.list_versions("greeting")
+        assert packed.get_latest_version("greeting") == "0.1.11"
+        assert packed.get_prompt("greeting") == source.get_prompt("greeting")
+        assert packed.get_prompt("farewell", "0.1.0") == source.get_prompt("farewell", "0.1.0")
+        assert packed.compare_versions("greeting", "0.1.0", "0.1.1")["message_count_diff"] == 0
+
+        with pytest.raises(FileNotFoundError):
+            packed.get_prompt("greeting", "9.9.9")
+        with pytest.raises(PermissionError):
+            packed.save_prompt("greeting", PromptBuilder().add_user("x").build())
+
+
+def test_zstd_round_trip(tmp_path):
+    """Test that a zstd archive reads back every version unchanged."""
+    pytest.importorskip("zstandard")
+    source = make_repo(os.path.join(tmp_path, "source"))
+    archive = os.path.join(tmp_path, "prompts.pack")
+    export_packed(source, archive, codec="zstd")
+
+    with PackedPromptRepo(archive) as packed:
+        assert packed.codec == "zstd"
+        for version in source.list_versions("greeting"):
+            assert packed.get_prompt("greeting", version) == source.get_prompt("greeting", version)
+
+
+def test_import_round_trip(tmp_path):
+    """Test that importing an archive restores every version unchanged."""
+    source = make_repo(os.path.join(tmp_path, "source"))
+    archive = os.path.join(tmp_path, "prompts.pack")
+    export_packed(source, archive)
+
+    target = PromptRepo(os.path.join(tmp_path, "target"))
+    assert import_packed(archive, target) == 13
+
+    assert target.list_versions("greeting") == source.list_versions("greeting")
+    for version in source.list_versions("greeting"):
+        assert target.get_prompt("greeting", version) == source.get_prompt("greeting", version)
+
+
+def test_rejects_other_files(tmp_path):
+    """Test that a file that is not an archive is rejected."""
+    path = os.path.join(tmp_path, "not-an-archive")
+    with open(path, "w") as f:
+        f.write("hello")
+
+    with pytest.raises(ValueError):
+        PackedPromptRepo(path)
@@ -0,0 +1,85 @@
+"""
+Tests for shared prompt prefixes and prefix-aware scheduling.
+"""
+
+import asyncio
+
+from evoluteprompt.core.prefix import (
+    PrefixIndex,
+    common_prefix_length,
+    generate_by_prefix,
+    prefix_key,
+)
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.integrations.mock import FakeOpenAIServer, MockProvider
+from evoluteprompt.integrations.openai import OpenAIProvider
+
+SYSTEM = "You are a support assistant. " * 200
+EXAMPLES = [("How do I reset my password?", "Use the reset link."), ("Hi", "Hello!")]
+
+
+def family_prompt(question, system=SYSTEM):
+    builder = PromptBuilder().add_system(system)
+    for user, assistant in EXAMPLES:
+        builder.add_user(user).add_assistant(assistant)
+    return builder.add_user(question).build()
+
+
+def test_prefix_keys_and_index():
+    """Test keys of shared prefixes and learning them from a template family."""
+    first, second = family_prompt("Where is my order?"), family_prompt("Cancel my plan")
+    other = family_prompt("Where is my order?", system="You are terse.")
+
+    assert prefix_key(first) == prefix_key(second) != prefix_key(other)
+    assert prefix_key(PromptBuilder().add_user("hi").build()) is None
+    assert common_prefix_length([first, second]) == 5
+    assert common_prefix_length([first, second, other]) == 0
+
+    index = PrefixIndex()
+    for prompt in (first, second, other):
+        index.add(prompt)
+    assert index.shared_length(first) == 5
+    assert index.key(first) == prefix_key(first)
+    assert index.shared_length(other) == 0
+
+
+def test_generate_by_prefix_warms_the_cache():
+    """Test that prompts sharing a prefix wait for one request to warm the cache."""
+    prompts = [family_prompt(f"Question {i}") for i in range(8)]
+    prompts.append(PromptBuilder().add_user("unrelated").build())
+
+    def run(scheduled):
+        provider = MockProvider(prefix_cache=True, latency_ms=5)
+        if scheduled:
+            return asyncio.run(generate_by_prefix(provider, prompts, concurrency=8))
+
+        async def naive():
+            return await asyncio.gather(*(provider.generate(p) for p in prompts))
+        return asyncio.run(naive())
+
+    naive = run(scheduled=False)
+    scheduled = run(scheduled=True)
+
+    assert sum(r.stats.cached_tokens for r in naive) == 0
+    assert [r.stats.cached_tokens > 0 for r in scheduled] == [False] + [True] * 7 + [False]
+    assert scheduled[3].text == naive[3].text
+
+
+def test_openai_provider_cache_key_and_cached_tokens():
+    """Test the prompt cache key hint and cached tokens reported by the API."""
+    provider = OpenAIProvider(base_url="http://localhost/v1", prompt_cache_key=True)
+    prompt = family_prompt("Where is my order?")
+    assert provider._build_request_body(prompt)["prompt_cache_key"] == prefix_key(prompt)
+
+    async def scenario():
+        async with FakeOpenAIServer(prefix_cache=True) as server:
+            provider = OpenAIProvider(base_url=server.url, prompt_cache_key="support")
+            await provider.generate(prompt)
+            completed = await provider.generate(family_prompt("Cancel my plan"))
+            streamed = await provider.generate_stream(family_prompt("Close my account"))
+            return completed, streamed
+
+    completed, streamed = asyncio.run(scenario())
+
+    assert 0 < completed.stats.cached_tokens < completed.stats.prompt_tokens
+    assert streamed.stats.cached_tokens == completed.stats.cached_tokens
@@ -0,0 +1,185 @@
+"""
+Tests for the filesystem prompt repository.
+"""
+
+import json
+import multiprocessing
+import os
+import shutil
+
+import pytest
+
+from evoluteprompt.core.blobs import shared_blob_cache
+from evoluteprompt.core.packed import PackedPromptRepo, export_packed
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.core.repository import PromptRepo
+from tests.conftest import make_prompt
+
+
+
+
+def test_manifest_tracks_saves_and_deletes(tmp_path):
+    """Test that the manifest is kept in step with the directory tree."""
+    repo = PromptRepo(tmp_path)
+    for i in range(11):
+        repo.save_prompt("greeting", make_prompt(f"v{i}"))
+    repo.save_prompt("farewell", make_prompt("bye"))
+    repo.delete_version("greeting", "0.1.10")
+    repo.delete_prompt("farewell")
+
+    with open(os.path.join(tmp_path, ".promptflow", "manifest.log")) as f:
+        journal = [json.loads(line) for line in f]
+    reopened = PromptRepo(tmp_path)
+
+    assert repo.get_latest_version("greeting") == "0.1.9"
+    assert repo.get_prompt("greeting").messages[0].content == "v9"
+    assert repo.list_prompts() == ["greeting"]
+    assert {"prompt": "farewell", "entry": None} in journal
+    assert list(reopened._entries) == ["greeting"]
+    assert reopened._entries["greeting"]["versions"][-1] == "0.1.9"
+
+
+def test_manifest_journal_is_compacted(tmp_path, monkeypatch):
+    """Test that the journal is folded into the manifest once it grows long."""
+    monkeypatch.setattr("evoluteprompt.core.repository._JOURNAL_LIMIT", 8)
+    repo = PromptRepo(tmp_path)
+    for i in range(10):
+        repo.save_prompt(f"p{i}", make_prompt("hi"))
+
+    with open(os.path.join(tmp_path, ".promptflow", "manifest.json")) as f:
+        manifest = json.load(f)
+    with open(os.path.join(tmp_path, ".promptflow", "manifest.log")) as f:
+        journal = f.readlines()
+
+    assert len(journal) < 8
+    assert len(manifest["prompts"]) + len(journal) >= 10
+    assert sorted(PromptRepo(tmp_path).list_prompts()) == [f"p{i}" for i in range(10)]
+
+
+def test_reads_do_not_write(tmp_path, monkeypatch):
+    """Test that opening and reading a repository leaves its files alone."""
+    monkeypatch.setattr("evoluteprompt.core.repository._RACY_WINDOW_NS", 0)
+    PromptRepo(tmp_path).save_prompt("greeting", make_prompt("v1"))
+    meta_dir = os.path.join(tmp_path, ".promptflow")
+    before = {name: os.stat(os.path.join(meta_dir, name)).st_mtime_ns
+              for name in os.listdir(meta_dir)}
+
+    repo = PromptRepo(tmp_path)
+    repo.list_prompts()
+    repo.get_prompt("greeting")
+    repo.refresh()
+
+    assert {name: os.stat(os.path.join(meta_dir, name)).st_mtime_ns
+            for name in os.listdir(meta_dir)} == before
+
+    # A fresh checkout without metadata is not written to either
+    checkout = os.path.join(tmp_path, "checkout")
+    shutil.copytree(os.path.join(tmp_path, "greeting"), os.path.join(checkout, "greeting"))
+    assert PromptRepo(checkout).list_versions("greeting") == ["0.1.0"]
+    assert os.listdir(checkout) == ["greeting"]
+
+
+def test_manifest_picks_up_external_changes(tmp_path):
+    """Test that changes made behind the repository's back are noticed."""
+    PromptRepo(tmp_path).save_prompt("greeting", make_prompt("v1"))
+
+    # Another checkout adds a prompt and a version, e.g. via git pull
+    writer = PromptRepo(tmp_path)
+    writer.save_prompt("greeting", make_prompt("v2"))
+    writer.save_prompt("farewell", make_prompt("bye"))
+    os.remove(os.path.join(tmp_path, ".promptflow", "manifest.log"))
+
+    repo = PromptRepo(tmp_path)
+    shutil.copytree(
+        os.path.join(tmp_path, "greeting", "0.1.1"),
+        os.path.join(tmp_path, "greeting", "0.2.0"),
+    )
+
+    assert sorted(repo.list_prompts()) == ["farewell", "greeting"]
+    assert repo.list_versions("greeting") == ["0.1.0", "0.1.1", "0.2.0"]
+    assert repo.get_latest_version("greeting") == "0.2.0"
+
+
+def test_unchanged_directories_are_not_listed(tmp_path, monkeypatch):
+    """Test that a reopened repository answers from the manifest."""
+    monkeypatch.setattr("evoluteprompt.core.repository._RACY_WINDOW_NS", 0)
+    for name in ("a", "b", "c"):
+        PromptRepo(tmp_path).save_prompt(name, make_prompt(name))
+
+    scanned = []
+    monkeypatch.setattr(PromptRepo, "_scan_versions", lambda self, name: scanned.append(name))
+    repo = PromptRepo(tmp_path)
+
+    assert sorted(repo.list_prompts()) == ["a", "b", "c"]
+    assert repo.get_latest_version("b") == "0.1.0"
+    assert scanned == []
+
+
+def _save_many(repo_path, worker, count):
+    """Save prompts from a separate process."""
+    repo = PromptRepo(repo_path)
+    for i in range(count):
+        repo.save_prompt("shared", make_prompt(f"{worker}-{i}"))
+
+
+def test_concurrent_writers_get_distinct_versions(tmp_path):
+    """Test that processes saving the same prompt never reuse a version."""
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_save_many, args=(tmp_path, worker, 10)) for worker in range(4)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+    repo = PromptRepo(tmp_path)
+    versions = repo.list_versions("shared")
+    contents = {repo.get_prompt("shared", v).messages[0].content for v in versions}
+
+    assert [process.exitcode for process in workers] == [0, 0, 0, 0]
+    assert len(versions) == 40
+    assert len(contents) == 40
+
+
+def test_failed_write_keeps_previous_file(tmp_path, monkeypatch):
+    """Test that an interrupted save leaves the existing file intact."""
+    repo = PromptRepo(tmp_path, compact=True)
+    repo.save_prompt("greeting", make_prompt("v1"), version="1.0.0")
+
+    def crash(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        repo.save_prompt("greeting", make_prompt("v2"), version="1.0.0")
+    monkeypatch.undo()
+
+    prompt_file = os.path.join(tmp_path, "greeting", "1.0.0", "prompt.json")
+    with open(prompt_file) as f:
+        data = f.read()
+
+    assert "\n" not in data
+    assert repo.get_prompt("greeting", "1.0.0").messages[0].content == "v1"
+    assert os.listdir(os.path.dirname(prompt_file)) == ["prompt.json"]
+
+
+def test_dedupe_messages(tmp_path):
+    """Test that shared messages are written once and load back unchanged."""
+    repo = PromptRepo(tmp_path, dedupe_messages=True)
+    system = "You are a meticulous assistant. " * 50
+    for i in range(5):
+        repo.save_prompt("qa", PromptBuilder().add_system(system).add_user(f"Q{i}").build())
+
+    blob_dir = os.path.join(tmp_path, ".promptflow", "blobs")
+    blobs = [name for _, _, files in os.walk(blob_dir) for name in files]
+    shared_blob_cache.clear()
+
+    assert len(blobs) == 6
+    assert system not in open(os.path.join(tmp_path, "qa", "0.1.3", "prompt.json")).read()
+    assert PromptRepo(tmp_path).get_prompt("qa", "0.1.3").messages[1].content == "Q3"
+
+    archive = os.path.join(tmp_path, "qa.pack")
+    export_packed(repo, archive, codec="zlib")
+    with PackedPromptRepo(archive) as packed:
+        assert packed.get_prompt("qa").messages[0].content == system
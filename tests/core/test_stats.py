@@ -0,0 +1,159 @@
+"""
+Tests for the StatsAggregator class.
+"""
+
+import asyncio
+
+import pytest
+
+from evoluteprompt.core.database import DBPromptRepo, PromptModel
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.core.provider import LLMProvider
+from evoluteprompt.core.response import LLMResponse
+from evoluteprompt.core.stats import StatsAggregator
+from evoluteprompt.core.usage import ModelPrice
+
+
+class RecordingRepo:
+    """A stand-in repository that records increments."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def increment_stats(self, prompt_name, version, successes=0, failures=0,
+                              last_used=None):
+        self.calls.append((prompt_name, version, successes, failures))
+
+
+def test_record_batches_increments():
+    """Test that many recorded uses flush as one write per version."""
+    repo = RecordingRepo()
+    aggregator = StatsAggregator(repo)
+
+    for i in range(1000):
+        aggregator.record("greeting", "0.1.0", success=i % 10 != 0)
+    aggregator.record("greeting", "0.1.1")
+
+    assert aggregator.pending == 1001
+
+    written = asyncio.run(aggregator.flush())
+
+    assert written == 1001
+    assert aggregator.pending == 0
+    assert sorted(repo.calls) == [
+        ("greeting", "0.1.0", 900, 100),
+        ("greeting", "0.1.1", 1, 0),
+    ]
+
+
+def test_background_flush_to_database():
+    """Test flushing to a real repository from the background task."""
+
+    async def scenario():
+        async with DBPromptRepo("sqlite://:memory:") as repo:
+            await repo.save_prompt("greeting", PromptBuilder().add_user("Hi").build())
+
+            async with StatsAggregator(repo, flush_interval_ms=10) as aggregator:
+                for _ in range(25):
+                    aggregator.record("greeting", "0.1.0")
+                await asyncio.sleep(0.05)
+                assert aggregator.pending == 0
+
+                aggregator.record("greeting", "0.1.0", success=False)
+
+            # Leaving the context flushes the remainder
+            return await repo.get_prompt("greeting")
+
+    prompt = asyncio.run(scenario())
+
+    assert prompt.stats.success_count == 25
+    assert prompt.stats.failure_count == 1
+
+
+def test_usage_summary_by_version():
+    """Test latency percentiles, tokens and cost per version after a flush."""
+
+    class EchoProvider(LLMProvider):
+        """A provider that reports fixed token counts."""
+
+        model = "gpt-4o-mini"
+
+        async def generate(self, prompt):
+            if prompt.messages[-1].content == "fail":
+                raise RuntimeError("boom")
+            response = LLMResponse(text="hi", model="gpt-4o-mini-2024-07-18")
+            return response.update_stats(prompt_tokens=100, completion_tokens=20)
+
+        async def generate_stream(self, prompt):
+            return await self.generate(prompt)
+
+    async def scenario():
+        async with DBPromptRepo("sqlite://:memory:") as repo:
+            await repo.save_prompt("greeting", PromptBuilder().add_user("Hi").build())
+            await repo.save_prompt("greeting", PromptBuilder().add_user("fail").build())
+            v1 = await repo.get_prompt("greeting", "0.1.0")
+            v2 = await repo.get_prompt("greeting", "0.1.1")
+
+            pricing = {"gpt-4o-mini": ModelPrice(input_per_million=0.15, output_per_million=0.6)}
+            aggregator = StatsAggregator(repo, pricing=pricing)
+            for latency in range(1, 101):
+                aggregator.record_usage("greeting", "0.1.0", "gpt-4o-mini", latency_ms=latency,
+                                        prompt_tokens=100, completion_tokens=20)
+
+            provider = EchoProvider()
+            provider.aggregator = aggregator
+            await provider.generate(v1)
+            with pytest.raises(RuntimeError):
+                await provider.generate(v2)
+
+            await aggregator.flush()
+            return await repo.usage_summary("greeting"), await repo.get_prompt("greeting", "0.1.1")
+
+    summaries, v2 = asyncio.run(scenario())
+    by_key = {(s.version, s.model): s for s in summaries}
+
+    recorded = by_key[("0.1.0", "gpt-4o-mini")]
+    assert recorded.requests == 100
+    assert recorded.latency_p50_ms == pytest.approx(50, rel=0.01)
+    assert recorded.latency_p99_ms == pytest.approx(99, rel=0.01)
+    assert recorded.cost_per_1k_requests == pytest.approx(0.027)
+
+    # Dated model names use the price of their base model
+    called = by_key[("0.1.0", "gpt-4o-mini-2024-07-18")]
+    assert called.requests == 1
+    assert called.cost == pytest.approx(0.000027)
+
+    failed = by_key[("0.1.1", "gpt-4o-mini")]
+    assert failed.failure_rate == 1.0
+    assert failed.cost == 0
+    assert v2.stats.failure_count == 1
+
+
+def test_record_response_for_rows_without_name():
+    """Test that prompts from rows without a name in their metadata are recorded."""
+
+    async def scenario():
+        async with DBPromptRepo("sqlite://:memory:") as repo:
+            db = await repo.init()
+            await PromptModel.create(
+                name="legacy", version="0.1.0", messages=[{"role": "user", "content": "Hi"}],
+                metadata_json={"version": "0.1.0"}, parameters_json={}, stats_json={},
+                using_db=db,
+            )
+            prompt = await repo.get_prompt("legacy")
+
+            aggregator = StatsAggregator(repo)
+            recorded = aggregator.record_response(
+                prompt, LLMResponse(text="hi", model="gpt-4o-mini"), latency_ms=12
+            )
+            unsaved = aggregator.record_response(PromptBuilder().add_user("Hi").build())
+            await aggregator.flush()
+            return recorded, unsaved, await repo.usage_summary("legacy")
+
+    recorded, unsaved, summaries = asyncio.run(scenario())
+
+    assert recorded is True
+    assert unsaved is False
+    assert [(s.version, s.model, s.requests) for s in summaries] == [
+        ("0.1.0", "gpt-4o-mini", 1)
+    ]
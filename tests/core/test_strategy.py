@@ -0,0 +1,291 @@
+"""
+Tests for prompt selection strategies.
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from evoluteprompt.core.database import DBPromptRepo
+from evoluteprompt.core.strategy import (
+    ABTestingPromptStrategy,
+    ActivePromptStrategy,
+    CategoryPromptStrategy,
+    CompiledStrategy,
+    ConditionalPromptStrategy,
+    ContextAwarePromptStrategy,
+    FallbackPromptStrategy,
+    PromptSelector,
+    PromptStrategy,
+)
+from evoluteprompt.core.types import PromptCategory
+from tests.conftest import make_prompt
+
+
+def run(scenario):
+    """Run a scenario against a fresh in-memory repository."""
+
+    async def wrapper():
+        async with DBPromptRepo("sqlite://:memory:") as repo:
+            return await scenario(repo)
+
+    return asyncio.run(wrapper())
+
+
+def test_category_strategy_picks_highest_priority():
+    """Test that the category fallback returns the highest-priority active prompt."""
+
+    async def scenario(repo):
+        await repo.save_prompt("qa-low", make_prompt("low", PromptCategory.QA, priority=1))
+        await repo.save_prompt("qa-high", make_prompt("high", PromptCategory.QA, priority=5))
+        await repo.save_prompt(
+            "qa-off", make_prompt("off", PromptCategory.QA, is_active=False, priority=9)
+        )
+        await repo.save_prompt("chat", make_prompt("chat", PromptCategory.CHAT, priority=7))
+
+        strategy = CategoryPromptStrategy(repo, PromptCategory.QA)
+        return (
+            await strategy.select_prompt("qa-low"),
+            await strategy.select_prompt("missing"),
+            await strategy.select_prompt("chat"),
+            await CategoryPromptStrategy(repo, PromptCategory.SEARCH).select_prompt("x"),
+        )
+
+    by_name, by_category, wrong_category, empty = run(scenario)
+
+    assert by_name.messages[0].content == "low"
+    assert by_category.messages[0].content == "high"
+    assert wrong_category.messages[0].content == "high"
+    assert empty is None
+
+
+def test_category_lookup_uses_index():
+    """Test that the category lookup is served by the composite index."""
+
+    async def scenario(repo):
+        db = await repo.init()
+        rows = await db.execute_query_dict(
+            "EXPLAIN QUERY PLAN SELECT * FROM prompts "
+            "WHERE category = 'qa' AND is_active = 1 ORDER BY priority DESC, id DESC LIMIT 1"
+        )
+        return " ".join(row["detail"] for row in rows)
+
+    plan = run(scenario)
+
+    assert "idx_prompts_categor" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+class CountingRepo(DBPromptRepo):
+    """A repository that counts the queries issued through it."""
+
+    queries = 0
+
+    async def get_active_prompt(self, prompt_name):
+        self.queries += 1
+        return await super().get_active_prompt(prompt_name)
+
+    async def get_active_prompts(self, prompt_names):
+        self.queries += 1
+        return await super().get_active_prompts(prompt_names)
+
+    async def get_fallback_prompt(self, prompt_name):
+        self.queries += 1
+        return await super().get_fallback_prompt(prompt_name)
+
+    async def get_fallback_prompts(self, prompt_names):
+        self.queries += 1
+        return await super().get_fallback_prompts(prompt_names)
+
+
+def test_compiled_strategy_selects_without_io():
+    """Test that a compiled strategy tree selects from its snapshot."""
+
+    async def scenario():
+        async with CountingRepo("sqlite://:memory:") as repo:
+            await repo.save_prompt("greeting", make_prompt("hello"))
+            await repo.save_prompt("greeting-fr", make_prompt("bonjour"))
+            await repo.save_prompt("backup", make_prompt("hi", is_active=False))
+            await repo.set_fallback("backup", "0.1.0", "farewell")
+
+            active = ActivePromptStrategy(repo)
+            tree = ConditionalPromptStrategy(
+                repo,
+                lambda context: context.get("localized", False),
+                ContextAwarePromptStrategy(repo, "lang", {"fr": "greeting-fr"}),
+                FallbackPromptStrategy(repo, active),
+            )
+
+            compiled = await PromptSelector(repo).compile_strategy(
+                tree, ["greeting", "farewell"]
+            )
+            repo.queries = 0
+
+            results = [
+                await compiled.select_prompt("greeting", {"localized": True, "lang": "fr"}),
+                await compiled.select_prompt("greeting", {"localized": True, "lang": "de"}),
+                compiled.select("farewell", {}),
+                compiled.select("greeting", {}),
+            ]
+            return results, repo.queries
+
+    (fr, default, fallback, plain), queries = asyncio.run(scenario())
+
+    assert queries == 0
+    assert fr.messages[0].content == "bonjour"
+    assert default.messages[0].content == "hello"
+    assert fallback.messages[0].content == "hi"
+    assert plain.messages[0].content == "hello"
+
+
+def test_compiled_strategy_refreshes_on_write():
+    """Test that writes through the repository invalidate the snapshot."""
+
+    async def scenario(repo):
+        await repo.save_prompt("greeting", make_prompt("v1"))
+        await repo.save_prompt("greeting", make_prompt("v2", is_active=False))
+
+        compiled = CompiledStrategy(repo, ActivePromptStrategy(repo), ["greeting"])
+        before = await compiled.select_prompt("greeting")
+
+        await repo.set_active("greeting", "0.1.1")
+        after = await compiled.select_prompt("greeting")
+        return before, after
+
+    before, after = run(scenario)
+
+    assert before.messages[0].content == "v1"
+    assert after.messages[0].content == "v2"
+
+
+def test_compiled_strategy_returns_copies():
+    """Test that changing a selected prompt does not change the snapshot."""
+
+    async def scenario(repo):
+        await repo.save_prompt("greeting", make_prompt("hello"))
+
+        compiled = CompiledStrategy(repo, ActivePromptStrategy(repo), ["greeting"])
+        first = await compiled.select_prompt("greeting")
+        first.messages[0].content = "changed"
+        first.add_user("extra")
+        return first, await compiled.select_prompt("greeting"), compiled.select("greeting")
+
+    first, second, third = run(scenario)
+
+    assert first.messages[0].content == "changed"
+    assert [m.content for m in second.messages] == ["hello"]
+    assert [m.content for m in third.messages] == ["hello"]
+    assert second is not third
+
+
+def test_uncompilable_strategy_is_rejected():
+    """Test that custom strategies without snapshot support cannot be compiled."""
+
+    class CustomStrategy(PromptStrategy):
+        async def select_prompt(self, prompt_name, context=None):
+            return None
+
+    repo = DBPromptRepo("sqlite://:memory:")
+    tree = FallbackPromptStrategy(repo, CustomStrategy())
+
+    with pytest.raises(ValueError):
+        CompiledStrategy(repo, tree, ["greeting"])
+
+
+def test_ab_testing_is_sticky():
+    """Test that A/B assignment is stable per user and follows the weights."""
+
+    async def scenario(repo):
+        await repo.save_prompt("variant-a", make_prompt("a"))
+        await repo.save_prompt("variant-b", make_prompt("b"))
+
+        strategy = PromptSelector(repo).create_ab_testing_strategy(
+            ["variant-a", "variant-b"], weights=[0.2, 0.8], sticky_key="user_id"
+        )
+        first = [strategy.choose_variant({"user_id": i}) for i in range(2000)]
+        second = [strategy.choose_variant({"user_id": i}) for i in range(2000)]
+        prompt = await strategy.select_prompt("ignored", {"user_id": 7})
+
+        strategy.set_weights([0.0, 1.0])
+        shifted = {strategy.choose_variant({"user_id": i}) for i in range(100)}
+        return strategy, first, second, prompt, shifted
+
+    strategy, first, second, prompt, shifted = run(scenario)
+
+    assert first == second
+    assert first.count("variant-a") / 2000 == pytest.approx(0.2, abs=0.03)
+    assert prompt.messages[0].content == first[7][-1]
+    assert shifted == {"variant-b"}
+    assert strategy.exposures["variant-a"] + strategy.exposures["variant-b"] == 4101
+
+    with pytest.raises(ValueError):
+        strategy.set_weights([1.0])
+
+
+def test_ab_testing_salt_and_seeded_draws():
+    """Test that salts bucket independently and seeded draws repeat."""
+    repo = DBPromptRepo("sqlite://:memory:")
+    variants = ["variant-a", "variant-b"]
+
+    first = ABTestingPromptStrategy(repo, variants, sticky_key="user_id", salt="exp-1")
+    second = ABTestingPromptStrategy(repo, variants, sticky_key="user_id", salt="exp-2")
+    users = [{"user_id": i} for i in range(200)]
+    assert [first.choose_variant(u) for u in users] != [second.choose_variant(u) for u in users]
+
+    draws = []
+    for _ in range(2):
+        strategy = ABTestingPromptStrategy(repo, variants, rng=random.Random(3))
+        draws.append([strategy.choose_variant() for _ in range(50)])
+    assert draws[0] == draws[1]
+    assert set(draws[0]) == set(variants)
+
+
+def test_select_prompts_batches_queries():
+    """Test that a batch of selections shares one bulk query."""
+
+    class CustomStrategy(PromptStrategy):
+        async def select_prompt(self, prompt_name, context=None):
+            return "custom"
+
+    async def scenario():
+        async with CountingRepo("sqlite://:memory:") as repo:
+            for name in ("a", "b", "c"):
+                await repo.save_prompt(name, make_prompt(name))
+
+            selector = PromptSelector(repo)
+            requests = [("abc"[i % 3], None, None) for i in range(300)]
+            requests.append(("missing", None, None))
+            requests.append(("a", CustomStrategy(), None))
+
+            repo.queries = 0
+            results = await selector.select_prompts(requests)
+            return results, repo.queries
+
+    results, queries = asyncio.run(scenario())
+
+    assert queries == 1
+    assert [p.messages[0].content for p in results[:300]] == ["abc"[i % 3] for i in range(300)]
+    assert results[300] is None
+    assert results[301] == "custom"
+
+
+def test_select_prompts_returns_copies():
+    """Test that changing one batch result leaves the others unchanged."""
+
+    async def scenario(repo):
+        await repo.save_prompt("a", make_prompt("a"))
+
+        selector = PromptSelector(repo)
+        first, second = await selector.select_prompts([("a", None, None), ("a", None, None)])
+        first.messages[0].content = "changed"
+        first.metadata.tags.append("mutated")
+        (later,) = await selector.select_prompts([("a", None, None)])
+        return first, second, later
+
+    first, second, later = run(scenario)
+
+    assert first is not second
+    for prompt in (second, later):
+        assert prompt.messages[0].content == "a"
+        assert prompt.metadata.tags == []
@@ -6,8 +6,13 @@ import os
 import tempfile
 
 import pytest
+from jinja2 import Template as JinjaTemplate
 
-from evoluteprompt.core.template import MultiMessageTemplate, PromptTemplate
+from evoluteprompt.core.template import (
+    MissingVariableError,
+    MultiMessageTemplate,
+    PromptTemplate,
+)
 from evoluteprompt.core.types import MessageRole
 
 
@@ -155,3 +160,60 @@ def test_prompt_template_without_user_message():
     # Using the default require_user_message=True with a SYSTEM message fails
     with pytest.raises(ValueError, match="Prompt must contain at least " "one user message"):
         template.to_prompt(role=MessageRole.SYSTEM)
+
+
+def test_prompt_template_missing_variables():
+    """Test that missing variables are reported before rendering."""
+    template = PromptTemplate.from_string(
+        "{{ greeting }}, {{ name }}!{% if title is defined %} ({{ title }}){% endif %}"
+        "{{ suffix | default('') }}",
+        variables={"greeting": "Hello"},
+    )
+    assert template.required_variables == ["name"]
+    assert template.render(name="Ada") == "Hello, Ada!"
+
+    with pytest.raises(MissingVariableError) as error:
+        template.render(title="Dr")
+    assert error.value.missing == ["name"]
+
+    # Names used only inside if and for blocks are optional
+    template = PromptTemplate.from_string(
+        "{% if verbose %}{{ details }}{% endif %}"
+        "{% for item in items %}{{ prefix }}{{ item }}{% endfor %}Hello {{ name }}"
+    )
+    assert template.required_variables == ["items", "name", "verbose"]
+    assert template.render(verbose=False, items=[], name="Ada") == "Hello Ada"
+
+    multi = MultiMessageTemplate(user_templates=["What is {{ topic }}?"])
+    with pytest.raises(MissingVariableError):
+        multi.render()
+
+
+def test_prompt_template_constant_folding():
+    """Test that folded templates render like plain Jinja templates."""
+    source = (
+        "You work for {{ company }}.\n"
+        "{% for rule in rules %}- {{ rule }}\n{% endfor %}"
+        "Context: {{ context }}\nQuestion: {{ question }}\n"
+    )
+    defaults = {"company": "Acme", "rules": ["Be brief.", "Be kind."], "context": "Docs."}
+    template = PromptTemplate.from_string(source, variables=defaults)
+
+    compiled = template.compile()
+    assert compiled.required == {"question"}
+    assert template.compile() is compiled
+
+    for kwargs in ({"question": "Why?"}, {"question": "Why?", "company": "Initech"}):
+        assert template.render(**kwargs) == JinjaTemplate(source).render({**defaults, **kwargs})
+
+    # Changing a default compiles the template again
+    template.variables = {**defaults, "company": "Initech"}
+    assert template.render(question="Why?").startswith("You work for Initech.")
+
+    # So does changing one in place
+    template.variables["rules"].append("Be fast.")
+    assert "- Be fast.\n" in template.render(question="Why?")
+
+    # Templates that set variables are rendered whole
+    template = PromptTemplate.from_string("{% set n = 2 %}{{ n * x }}", variables={"x": 3})
+    assert template.render() == "6"
@@ -0,0 +1,115 @@
+"""
+Tests for cross-process invalidation.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+
+from evoluteprompt.core.database import DBPromptRepo, PromptChange
+from evoluteprompt.core.strategy import ActivePromptStrategy, CompiledStrategy
+from evoluteprompt.core.watcher import RevisionWatcher
+from tests.conftest import make_prompt
+
+
+def test_watcher_picks_up_writes_from_other_repositories(tmp_path):
+    """Test that a write through one repository refreshes another's snapshot."""
+    db_url = f"sqlite://{os.path.join(tmp_path, 'prompts.sqlite3')}"
+
+    async def scenario():
+        async with DBPromptRepo(db_url) as writer, DBPromptRepo(db_url) as reader:
+            await writer.save_prompt("greeting", make_prompt("v1"))
+            await writer.save_prompt("greeting", make_prompt("v2", is_active=False))
+
+            compiled = CompiledStrategy(reader, ActivePromptStrategy(reader), ["greeting"])
+            seen = []
+
+            async with RevisionWatcher(reader, interval_ms=10) as watcher:
+                watcher.subscribe(seen.extend)
+                before = await compiled.select_prompt("greeting")
+
+                await writer.set_active("greeting", "0.1.1")
+                for _ in range(100):
+                    if seen:
+                        break
+                    await asyncio.sleep(0.01)
+
+                after = await compiled.select_prompt("greeting")
+            return before, after, seen
+
+    before, after, seen = asyncio.run(scenario())
+
+    assert before.messages[0].content == "v1"
+    assert after.messages[0].content == "v2"
+    assert [(c.name, c.action) for c in seen] == [("greeting", "activate")]
+
+
+class FakeFeed:
+    """A change feed whose rows become visible in a chosen order."""
+
+    def __init__(self):
+        self.epoch = 0
+        self.rows = []
+
+    def commit(self, revision):
+        self.rows.append(
+            PromptChange(revision=revision, name=f"p{revision}", action="save",
+                         created_at=datetime.now())
+        )
+
+    async def current_revision(self):
+        return max((row.revision for row in self.rows), default=0)
+
+    async def changes_since(self, revision, limit=1000):
+        return sorted((row for row in self.rows if row.revision > revision),
+                      key=lambda row: row.revision)[:limit]
+
+
+def test_watcher_sees_out_of_order_commits():
+    """Test that a revision committed after a later one is still reported."""
+
+    async def scenario():
+        feed = FakeFeed()
+        watcher = RevisionWatcher(feed)
+        await watcher.poll()
+
+        feed.commit(2)  # revision 1 is still in flight
+        first = await watcher.poll()
+        feed.commit(1)
+        second = await watcher.poll()
+        third = await watcher.poll()
+        return first, second, third, feed.epoch
+
+    first, second, third, epoch = asyncio.run(scenario())
+
+    assert [c.revision for c in first] == [2]
+    assert [c.revision for c in second] == [1]
+    assert third == []
+    assert epoch == 2
+
+
+def test_failing_listener_does_not_stop_others(caplog):
+    """Test that every listener is called even if one raises."""
+
+    async def scenario():
+        feed = FakeFeed()
+        watcher = RevisionWatcher(feed)
+        seen = []
+
+        def broken(changes):
+            raise RuntimeError("boom")
+
+        async def collect(changes):
+            seen.extend(changes)
+
+        watcher.subscribe(broken)
+        watcher.subscribe(collect)
+        await watcher.poll()
+        feed.commit(1)
+        await watcher.poll()
+        return seen
+
+    seen = asyncio.run(scenario())
+
+    assert [c.revision for c in seen] == [1]
+    assert "Change listener" in caplog.text
@@ -0,0 +1,144 @@
+"""
+Tests for the offline evaluation runner.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.core.provider import LLMProvider
+from evoluteprompt.core.response import LLMResponse
+from evoluteprompt.evaluate import Contains, ExactMatch, Evaluator, iter_examples
+from evoluteprompt.utils import InMemoryCache
+
+
+class EchoProvider(LLMProvider):
+    """A provider that answers with the last message, after a short delay."""
+
+    def __init__(self, fail_on=()):
+        super().__init__()
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_on = set(fail_on)
+
+    async def generate(self, prompt):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            text = prompt.messages[-1].content
+            if text in self.fail_on:
+                raise RuntimeError("unavailable")
+            return LLMResponse(text=text).update_stats(prompt_tokens=5, completion_tokens=1)
+        finally:
+            self.in_flight -= 1
+
+    async def generate_stream(self, prompt):
+        return await self.generate(prompt)
+
+
+PROMPTS = {
+    "plain": PromptBuilder().add_user("{{ question }}").build(),
+    "shout": PromptBuilder().add_user("{{ question | upper }}").build(),
+}
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "qa.jsonl"
+    with open(path, "w") as f:
+        for i in range(40):
+            # Every question appears twice
+            f.write(json.dumps({"id": f"q{i}", "question": f"q{i % 20}",
+                                "expected": f"q{i % 20}"}) + "\n")
+    return path
+
+
+def test_iter_examples_csv(tmp_path):
+    """Test reading a CSV dataset, numbering rows without an id."""
+    path = tmp_path / "qa.csv"
+    path.write_text("question,expected\nWho?,Ada\nWhen?,1843\n")
+
+    examples = list(iter_examples(path))
+
+    assert [e.id for e in examples] == ["0", "1"]
+    assert examples[1].variables == {"question": "When?", "expected": "1843"}
+    assert examples[1].expected == "1843"
+
+
+def test_concurrency_dedupe_and_metrics(dataset):
+    """Test bounded concurrency, deduplicated requests and scores per version."""
+    provider = EchoProvider()
+    evaluator = Evaluator(provider, PROMPTS, metrics=[ExactMatch(case_sensitive=True), Contains()],
+                          cache=InMemoryCache(), concurrency=4)
+
+    report = asyncio.run(evaluator.run(iter_examples(dataset)))
+
+    assert provider.calls == 40  # 20 distinct questions for each of two versions
+    assert provider.max_in_flight <= 4
+    assert report.completed == 80
+    plain, shout = report.versions["plain"], report.versions["shout"]
+    assert plain.cached == 20
+    assert plain.scores == {"exact_match": 1.0, "contains": 1.0}
+    assert shout.scores == {"exact_match": 0.0, "contains": 1.0}
+    assert plain.prompt_tokens == 200
+    assert plain.latency_p50_ms is not None
+
+
+def test_resume_retries_failures_only(dataset, tmp_path):
+    """Test that a resumed run skips finished examples and survives a torn write."""
+    output = tmp_path / "run"
+    first = EchoProvider(fail_on={"q3", "Q3"})
+    report = asyncio.run(Evaluator(first, PROMPTS, output_dir=output, checkpoint_every=7)
+                         .run(iter_examples(dataset)))
+    assert report.versions["plain"].failures == 2
+
+    metrics = json.loads((output / "metrics.json").read_text())
+    assert metrics["completed"] == 80
+    with open(output / "results.jsonl", "a") as f:
+        f.write('{"id": "q0", "vers')  # Interrupted mid-write
+
+    second = EchoProvider()
+    report = asyncio.run(Evaluator(second, PROMPTS, output_dir=output)
+                         .run(iter_examples(dataset)))
+
+    assert second.calls == 2  # q3 and q23 share a question, sent once per version
+    assert report.completed == 80
+    assert report.versions["plain"].failures == 0
+    lines = (output / "results.jsonl").read_text().splitlines()
+    assert all(json.loads(line) for line in lines)
+
+
+def test_resume_drops_line_without_newline(dataset, tmp_path):
+    """Test that a complete record whose newline was never written is redone."""
+    output = tmp_path / "run"
+    asyncio.run(Evaluator(EchoProvider(fail_on={"q3"}), PROMPTS, output_dir=output)
+                .run(iter_examples(dataset)))
+
+    results_path = output / "results.jsonl"
+    results_path.write_text(results_path.read_text()[:-1])  # Cut after the last object
+    last = json.loads(results_path.read_text().splitlines()[-1])
+
+    second = EchoProvider()
+    asyncio.run(Evaluator(second, PROMPTS, output_dir=output).run(iter_examples(dataset)))
+
+    results = [json.loads(line) for line in results_path.read_text().splitlines()]
+    assert results[-1].get("error") is None
+    assert [(r["id"], r["version"]) for r in results].count((last["id"], last["version"])) == 1
+    assert second.calls >= 1
+
+
+def test_resume_rejects_changed_prompt(dataset, tmp_path):
+    """Test that a checkpoint is not resumed with a different prompt under the same label."""
+    output = tmp_path / "run"
+    asyncio.run(Evaluator(EchoProvider(), PROMPTS, output_dir=output)
+                .run(iter_examples(dataset)))
+
+    changed = {**PROMPTS, "plain": PromptBuilder().add_user("Q: {{ question }}").build()}
+    with pytest.raises(ValueError, match="changed"):
+        asyncio.run(Evaluator(EchoProvider(), changed, output_dir=output)
+                    .run(iter_examples(dataset)))
@@ -0,0 +1,105 @@
+"""
+Tests for the mock provider and the fake OpenAI server.
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.integrations.mock import FakeOpenAIServer, MockBehavior, MockProvider
+from evoluteprompt.integrations.openai import OpenAIProvider
+
+PROMPT = PromptBuilder().add_system("You are terse.").add_user("one two three four").build()
+
+
+def test_latency_distributions():
+    """Test that sampled latencies follow the configured distribution."""
+    rng = random.Random(0)
+    lognormal = MockBehavior(latency_ms=100, latency_distribution="lognormal", latency_sigma=0.5)
+    samples = sorted(lognormal.sample_latency_ms(rng) for _ in range(5000))
+    assert samples[2500] == pytest.approx(100, rel=0.05)
+
+    uniform = MockBehavior(latency_ms=50, latency_distribution="uniform", latency_spread_ms=10)
+    assert all(40 <= uniform.sample_latency_ms(rng) <= 60 for _ in range(1000))
+    assert MockBehavior().sample_latency_ms(rng) == 0
+
+
+def test_mock_provider_failures_and_streaming():
+    """Test error injection, chunk cadence and token usage of the mock provider."""
+    provider = MockProvider(echo=True, error_rate=0.3, seed=1, chunk_words=2,
+                            chunk_interval_ms=5, prompt_tokens=42)
+
+    async def scenario():
+        outcomes = []
+        for _ in range(200):
+            try:
+                outcomes.append(await provider.generate(PROMPT))
+            except ValueError:
+                outcomes.append(None)
+        provider.behavior = MockBehavior(echo=True, chunk_words=2, chunk_interval_ms=5)
+        return outcomes, await provider.generate_stream(PROMPT)
+
+    outcomes, streamed = asyncio.run(scenario())
+
+    failures = outcomes.count(None)
+    assert 40 < failures < 80
+    response = next(r for r in outcomes if r is not None)
+    assert response.text == "one two three four"
+    assert response.stats.prompt_tokens == 42
+    assert streamed.chunks == ["one two ", "three four"]
+    assert streamed.stats.latency_ms >= 5
+    assert provider.calls == 201
+
+
+def test_openai_provider_against_fake_server():
+    """Test the OpenAI provider end to end without an API key or network access."""
+
+    async def scenario():
+        async with FakeOpenAIServer(reply="Hello there, friend.", chunk_words=1) as server:
+            provider = OpenAIProvider(model="gpt-4o-mini", base_url=server.url)
+            completed = await provider.generate(PROMPT)
+            streamed = await provider.generate_stream(PROMPT)
+
+            server.behavior = MockBehavior(error_rate=1.0, error_status=429)
+            with pytest.raises(ValueError, match="429"):
+                await provider.generate(PROMPT)
+            return completed, streamed, server.requests
+
+    completed, streamed, requests = asyncio.run(scenario())
+
+    assert completed.text == "Hello there, friend."
+    assert completed.model == "gpt-4o-mini"
+    assert completed.stats.token_count == completed.stats.prompt_tokens > 0
+    assert streamed.text == "Hello there, friend."
+    assert streamed.chunks == ["Hello ", "there, ", "friend."]
+    assert streamed.stats.completion_tokens == completed.stats.completion_tokens
+    assert requests == 3
+
+
+def test_fake_server_checks_api_key(monkeypatch):
+    """Test that the API key is still required for the real API, and checked when set."""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+    with pytest.raises(ValueError, match="API key"):
+        OpenAIProvider()
+
+    async def scenario():
+        async with FakeOpenAIServer(api_key="secret") as server:
+            with pytest.raises(ValueError, match="401"):
+                await OpenAIProvider(base_url=server.url).generate(PROMPT)
+            return await OpenAIProvider(api_key="secret", base_url=server.url).generate(PROMPT)
+
+    assert asyncio.run(scenario()).text == MockBehavior().reply
+
+
+def test_openai_provider_default_parameters():
+    """Test that extra constructor arguments are sent, unless the prompt overrides them."""
+    provider = OpenAIProvider(base_url="http://localhost/v1", temperature=0.2, seed=7)
+
+    body = provider._build_request_body(PROMPT)
+    assert body["temperature"] == 0.2 and body["seed"] == 7
+
+    prompt = PROMPT.model_copy(deep=True).set_parameters(temperature=0.9)
+    assert provider._build_request_body(prompt)["temperature"] == 0.9
@@ -0,0 +1,60 @@
+"""
+Tests for lazy imports of the evoluteprompt package.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+import evoluteprompt
+
+# Generous enough for a slow CI machine; the import takes a few milliseconds
+IMPORT_BUDGET_US = 150_000
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter."""
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, check=True, timeout=60
+    )
+
+
+def test_base_import_skips_heavy_dependencies():
+    """Test that importing the package does not import its heavy dependencies."""
+    result = run_python(
+        "-c",
+        "import sys, evoluteprompt, evoluteprompt.core, evoluteprompt.utils, "
+        "evoluteprompt.prompt_filters, evoluteprompt.integrations, evoluteprompt.evaluate; "
+        "print(sorted(m for m in ('tortoise', 'semver', 'tiktoken', 'jinja2', 'aiohttp') "
+        "if m in sys.modules))",
+    )
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_base_import_time():
+    """Test that importing the package stays under the time budget."""
+    best = None
+    for _ in range(3):
+        stderr = run_python("-X", "importtime", "-c", "import evoluteprompt").stderr
+        line = next(
+            line for line in stderr.splitlines() if line.rstrip().endswith("| evoluteprompt")
+        )
+        cumulative = int(line.split("|")[1])
+        best = cumulative if best is None else min(best, cumulative)
+
+    assert best < IMPORT_BUDGET_US
+
+
+def test_lazy_attributes():
+    """Test that public names resolve on access and appear in dir()."""
+    from evoluteprompt.core.repository import PromptRepo
+
+    assert evoluteprompt.PromptRepo is PromptRepo
+    assert set(evoluteprompt.__all__) <= set(dir(evoluteprompt))
+    for name in evoluteprompt.__all__:
+        assert getattr(evoluteprompt, name) is not None
+
+    with pytest.raises(AttributeError):
+        evoluteprompt.DoesNotExist
@@ -0,0 +1,38 @@
+"""
+Tests for the LatencyHistogram class.
+"""
+
+import random
+
+import pytest
+
+from evoluteprompt.utils.histogram import LatencyHistogram
+
+
+def test_percentiles_within_one_percent():
+    """Test percentile estimates against the exact values of a skewed sample."""
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(4, 1) for _ in range(20000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    for p in (50, 95, 99):
+        exact = values[int(len(values) * p / 100) - 1]
+        assert histogram.percentile(p) == pytest.approx(exact, rel=0.01)
+    assert histogram.mean == pytest.approx(sum(values) / len(values), rel=1e-6)
+    assert len(histogram.counts) < 1500
+
+
+def test_merge_and_round_trip():
+    """Test merging histograms and serializing them."""
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(1.5, count=3)
+    second.record(250)
+
+    merged = LatencyHistogram.from_dict(first.merge(second).to_dict())
+
+    assert len(merged) == 4
+    assert merged.percentile(50) == 1.5
+    assert merged.percentile(100) == 250
+    assert LatencyHistogram().percentile(50) is None
@@ -0,0 +1,147 @@
+"""
+Tests for the instrumentation hooks.
+"""
+
+import asyncio
+import inspect
+
+import pytest
+
+from evoluteprompt.core.database import DBPromptRepo
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.core.provider import LLMProvider
+from evoluteprompt.core.response import LLMResponse
+from evoluteprompt.core.strategy import PromptSelector
+from evoluteprompt.core.template import PromptTemplate
+from evoluteprompt.prompt_filters import FilterPipeline, KeywordFilter
+from evoluteprompt.utils import InMemoryCache, instrumentation
+from evoluteprompt.utils.instrumentation import (
+    InMemoryExporter,
+    PrometheusExporter,
+    exporting,
+    span,
+    traced,
+)
+
+
+@traced("test.add", attribute="a")
+def add(a, b):
+    return a + b
+
+
+@traced("test.fail")
+async def fail():
+    raise RuntimeError("boom")
+
+
+class EchoProvider(LLMProvider):
+    """A provider that echoes the last message."""
+
+    async def generate(self, prompt):
+        return LLMResponse(text=prompt.messages[-1].content)
+
+    async def generate_stream(self, prompt):
+        return await self.generate(prompt)
+
+
+def test_disabled_by_default():
+    """Test that nothing is recorded without an exporter."""
+    assert not instrumentation.is_enabled()
+    with span("test.noop") as noop:
+        noop.set_attribute("ignored", True)
+
+    assert add(1, 2) == 3
+    assert inspect.iscoroutinefunction(fail)
+
+
+def test_disabled_path_creates_no_spans(monkeypatch):
+    """Test that traced calls go straight to the function while disabled."""
+    # Its cost is measured by the instrumentation.traced_disabled benchmark
+
+    def no_span(*args, **kwargs):
+        raise AssertionError("span created while disabled")
+
+    monkeypatch.setattr(instrumentation, "Span", no_span)
+
+    assert add(1, 2) == 3
+    coro = fail()
+    assert coro.cr_code is fail.__wrapped__.__code__  # no wrapper coroutine
+    with pytest.raises(RuntimeError):
+        asyncio.run(coro)
+
+
+def test_spans_nest_and_record_errors():
+    """Test span parents, attributes and errors."""
+    with exporting(InMemoryExporter()) as exporter:
+        with span("test.outer", kind="unit") as outer:
+            assert add(2, b=3) == 5
+        with pytest.raises(RuntimeError):
+            asyncio.run(fail())
+
+    inner = exporter.find("test.add")[0]
+    assert inner.parent is outer
+    assert inner.attributes == {"a": 2}
+    assert outer.attributes == {"kind": "unit"}
+    assert outer.duration_ns >= inner.duration_ns > 0
+    assert exporter.find("test.fail")[0].error == "RuntimeError"
+    assert not instrumentation.is_enabled()
+
+
+def test_library_hooks():
+    """Test the spans and counters emitted by templates, filters, caches and providers."""
+    prompt = PromptBuilder().add_user("hello there").build()
+    cache = InMemoryCache()
+    pipeline = FilterPipeline([KeywordFilter(["there"], name="banned")])
+
+    with exporting(InMemoryExporter()) as exporter:
+        PromptTemplate(template="Hi {{ name }}").render(name="Ada")
+        pipeline.check(prompt)
+        cache.get(prompt)
+        cache.set(prompt, LLMResponse(text="hi"))
+        cache.get(prompt)
+        asyncio.run(EchoProvider().generate(prompt))
+
+    assert len(exporter.find("template.render")) == 1
+    assert len(exporter.find("filters.check")) == 1
+    assert exporter.counter_value("filters.rejected", filter="banned") == 1
+    assert len(exporter.find("cache.get")) == 2
+    assert exporter.counter_value("cache.hit", cache="InMemoryCache") == 1
+    assert exporter.counter_value("cache.miss") == 1
+    assert exporter.find("provider.generate")[0].attributes == {"provider": "EchoProvider"}
+
+
+def test_repo_spans_nest_under_selector():
+    """Test that database spans are children of the selection that caused them."""
+
+    async def scenario():
+        repo = DBPromptRepo("sqlite://:memory:")
+        try:
+            prompt = PromptBuilder().add_user("hi").set_metadata(is_active=True).build()
+            await repo.save_prompt("greeting", prompt)
+            with exporting(InMemoryExporter()) as exporter:
+                await PromptSelector(repo).select_prompt("greeting")
+            return exporter
+        finally:
+            await repo.close()
+
+    exporter = asyncio.run(scenario())
+
+    select = exporter.find("selector.select_prompt")[0]
+    fetch = exporter.find("repo.get_active_prompt")[0]
+    assert select.attributes == {"prompt_name": "greeting"}
+    assert fetch.parent is select
+
+
+def test_prometheus_exporter():
+    """Test the Prometheus text format."""
+    with exporting(PrometheusExporter()) as exporter:
+        add(1, 2)
+        add(1, 3)
+        instrumentation.counter("cache.hit", cache='a"b')
+
+    text = exporter.render()
+
+    assert "# TYPE evoluteprompt_span_seconds summary" in text
+    assert 'evoluteprompt_span_seconds_count{span="test.add",a="1"} 2' in text
+    assert 'evoluteprompt_span_errors_total{span="test.add",a="1"} 0' in text
+    assert 'evoluteprompt_cache_hit_total{cache="a\\"b"} 1' in text
@@ -0,0 +1,42 @@
+"""
+Tests for the sampling utilities.
+"""
+
+import random
+
+import pytest
+
+from evoluteprompt.utils import AliasTable, stable_uniform
+
+
+def test_alias_table_matches_weights():
+    """Test that samples follow the requested weights."""
+    table = AliasTable([1, 2, 7])
+    rng = random.Random(42)
+
+    counts = [0, 0, 0]
+    for _ in range(20000):
+        counts[table.sample(rng)] += 1
+
+    assert counts[0] / 20000 == pytest.approx(0.1, abs=0.01)
+    assert counts[1] / 20000 == pytest.approx(0.2, abs=0.01)
+    assert counts[2] / 20000 == pytest.approx(0.7, abs=0.01)
+    # Zero-weight outcomes are never picked
+    assert {AliasTable([0, 1]).pick(i / 100) for i in range(100)} == {1}
+
+
+def test_alias_table_rejects_bad_weights():
+    """Test validation of the weights."""
+    for weights in ([], [1, -1], [0, 0]):
+        with pytest.raises(ValueError):
+            AliasTable(weights)
+
+
+def test_stable_uniform():
+    """Test that hashing is deterministic, salted and in range."""
+    values = [stable_uniform(f"user-{i}", "exp") for i in range(1000)]
+
+    assert values == [stable_uniform(f"user-{i}", "exp") for i in range(1000)]
+    assert values != [stable_uniform(f"user-{i}", "other") for i in range(1000)]
+    assert all(0.0 <= v < 1.0 for v in values)
+    assert sum(values) / len(values) == pytest.approx(0.5, abs=0.05)
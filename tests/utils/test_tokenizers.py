@@ -0,0 +1,69 @@
+"""
+Tests for the tokenizer registry.
+"""
+
+import pytest
+import tiktoken
+
+from evoluteprompt.core.prompt import PromptBuilder
+from evoluteprompt.prompt_filters import MaxTokenFilter
+from evoluteprompt.utils import tokenizers
+
+
+class FakeEncoding:
+    """An encoding that splits on whitespace."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def encode(self, text):
+        return text.split()
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Replace tiktoken's loader with one that records what it loads."""
+    loaded = []
+
+    def get_encoding(name):
+        loaded.append(name)
+        return FakeEncoding(name)
+
+    monkeypatch.setattr(tiktoken, "get_encoding", get_encoding)
+    tokenizers.clear()
+    yield loaded
+    tokenizers.clear()
+
+
+def test_encodings_are_loaded_once(loads):
+    """Test that each encoding is loaded once and shared."""
+    first = tokenizers.get_encoding("cl100k_base")
+
+    assert tokenizers.get_encoding("cl100k_base") is first
+    assert tokenizers.encoding_for_model("gpt-4") is first
+    assert tokenizers.encoding_for_model("gpt-4o").name == "o200k_base"
+    # Unknown models fall back to the default encoding
+    assert tokenizers.encoding_for_model("not-a-model") is first
+    assert loads == ["cl100k_base", "o200k_base"]
+    assert set(tokenizers.load_stats()) == {"cl100k_base", "o200k_base"}
+
+
+def test_warm_up(loads):
+    """Test that warm-up loads encodings ahead of use."""
+    tokenizers.warm_up(models=["gpt-4o"])
+
+    assert loads == ["cl100k_base", "o200k_base"]
+
+
+def test_max_token_filter_loads_lazily(loads):
+    """Test that creating a filter does not load its encoding."""
+    token_filter = MaxTokenFilter(max_tokens=10)
+    assert loads == []
+
+    prompt = PromptBuilder().add_user("one two three").build()
+
+    # 4 per message, 3 words and 3 for the request
+    assert tokenizers.count_prompt_tokens(prompt) == 10
+    assert token_filter.check(prompt).passed
+    assert not MaxTokenFilter(max_tokens=9).check(prompt).passed
+    assert loads == ["cl100k_base"]